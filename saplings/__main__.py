@@ -0,0 +1,7 @@
+# Standard Library
+import sys
+
+# Local Modules
+from saplings.cli import main
+
+sys.exit(main())
@@ -0,0 +1,366 @@
+# Standard Library
+import pickle
+from copy import deepcopy
+
+# Local Modules
+import saplings.utilities as utils
+from saplings.entities import ObjectNode
+from saplings.rendering import tuplify_tree, build_tree, iter_tree_paths
+from saplings.sketches import HyperLogLog
+
+CHECKPOINT_VERSION = 2
+
+
+#########
+# MERGING
+#########
+
+
+def merge_tree(target, source, copy=True):
+    """
+    Merges the object hierarchy rooted at `source` into the one rooted at
+    `target`. Both trees must have been consolidated (i.e. be outputs of
+    `Saplings.get_trees`), so children are matched on their name and order.
+    Frequencies of matching nodes are summed, and their input sketches (if
+    any) are merged.
+
+    Parameters
+    ----------
+    target : ObjectNode
+        root of the tree that's modified in place
+    source : ObjectNode
+        root of the tree that's merged in
+    copy : bool
+        if False, subtrees of `source` that have no match in `target` are
+        attached to `target` directly instead of being copied (cheaper, but
+        `source` must not be used afterwards)
+    """
+
+    target.frequency += source.frequency
+    target.is_callable = target.is_callable or source.is_callable
+
+    if source.input_sketch is not None:
+        if target.input_sketch is None:
+            target.input_sketch = source.input_sketch.copy() if copy else source.input_sketch
+        else:
+            target.input_sketch.merge(source.input_sketch)
+
+    if not source.children:
+        return
+
+    matching_children = {(c.name, c.order): c for c in target.children}
+    for child in source.children:
+        matching_child = matching_children.get((child.name, child.order))
+        if matching_child:
+            merge_tree(matching_child, child, copy)
+        else:
+            target.children.append(deepcopy(child) if copy else child)
+
+
+def merge_trees(forest, trees, copy=True):
+    """
+    Merges a list of object hierarchies into a forest, matching roots by name.
+
+    Parameters
+    ----------
+    forest : list
+        root nodes of the aggregated hierarchies; modified in place
+    trees : list
+        root nodes of the hierarchies to merge in
+    copy : bool
+        see `merge_tree`
+
+    Returns
+    -------
+    list
+        `forest`
+    """
+
+    roots = {root.name: root for root in forest}
+    for tree in trees:
+        if tree.name in roots:
+            merge_tree(roots[tree.name], tree, copy)
+        else:
+            tree = deepcopy(tree) if copy else tree
+            roots[tree.name] = tree
+            forest.append(tree)
+
+    return forest
+
+
+#############
+# AGGREGATION
+#############
+
+
+def _dump_input_sketches(node):
+    # Preorder, so it lines up with the nodes rebuilt from the tuplified tree
+    return [
+        n.input_sketch.to_bytes() if n.input_sketch is not None else None
+        for _, n in iter_tree_paths(node)
+    ]
+
+
+def _load_input_sketches(node, dumped_sketches):
+    for (_, n), data in zip(iter_tree_paths(node), dumped_sketches):
+        if data is not None:
+            n.input_sketch = HyperLogLog.from_bytes(data)
+
+
+class Aggregate(object):
+    """
+    Running state of a batch run: the object hierarchies merged from every
+    input so far, and the set of inputs that are done. Can be saved to and
+    restored from a checkpoint file, so an interrupted run can resume where it
+    left off.
+
+    Optionally, each node also gets a HyperLogLog sketch of the inputs that use
+    it (`ObjectNode.input_sketch`), which estimates how many distinct files use
+    an API path at a fixed cost per node.
+    """
+
+    def __init__(self, forest=None, completed=None, sketch_precision=None):
+        """
+        Parameters
+        ----------
+        forest : {list, None}
+            root nodes of the merged object hierarchies
+        completed : {set, None}
+            identifiers (e.g. paths) of the inputs that have been processed
+        sketch_precision : {int, None}
+            precision of the per-node input sketches (see
+            `sketches.HyperLogLog`); inputs aren't counted if None
+        """
+
+        self.forest = forest if forest is not None else []
+        self.completed = completed if completed is not None else set()
+        self.sketch_precision = sketch_precision
+
+    def __contains__(self, input_id):
+        return input_id in self.completed
+
+    def add(self, input_id, trees, copy=False):
+        """
+        Merges the hierarchies of one input into the aggregate and marks the
+        input as completed.
+
+        Parameters
+        ----------
+        input_id : str
+            identifier of the input (e.g. its path)
+        trees : list
+            root nodes of the input's object hierarchies
+        copy : bool
+            see `merge_tree`
+        """
+
+        if self.sketch_precision is not None:
+            input_sketch = HyperLogLog(self.sketch_precision)
+            input_sketch.add(input_id)
+            for tree in trees:
+                for _, node in iter_tree_paths(tree):
+                    if node.input_sketch is None:
+                        node.input_sketch = input_sketch.copy()
+                    else:
+                        node.input_sketch.merge(input_sketch)
+
+        merge_trees(self.forest, trees, copy)
+        self.completed.add(input_id)
+
+    def merge(self, other, copy=False):
+        """
+        Merges another aggregate (e.g. one built by another worker) into this
+        one. Input sketches are merged too, so inputs that are in both
+        aggregates are only counted once.
+        """
+
+        merge_trees(self.forest, other.forest, copy)
+        self.completed |= other.completed
+
+    def count_inputs(self):
+        """
+        Estimates how many distinct inputs use each node.
+
+        Returns
+        -------
+        dict
+            maps paths (see `rendering.iter_tree_paths`) to estimated counts,
+            for the nodes that have input sketches
+        """
+
+        counts = {}
+        for tree in self.forest:
+            for path, node in iter_tree_paths(tree):
+                if node.input_sketch is not None:
+                    counts[path] = node.input_sketch.count()
+
+        return counts
+
+    def save(self, path):
+        """
+        Writes a checkpoint. The write is atomic and durable, so a crash while
+        checkpointing leaves the previous checkpoint intact.
+        """
+
+        state = (
+            CHECKPOINT_VERSION,
+            [tuplify_tree(tree) for tree in self.forest],
+            list(self.completed),
+            self.sketch_precision,
+            [_dump_input_sketches(tree) for tree in self.forest]
+        )
+        payload = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+        utils.atomic_write(path, payload, fsync=True)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Restores an aggregate from a checkpoint written by `save`.
+        """
+
+        with open(path, "rb") as file:
+            version, tuplified_forest, completed, *sketch_state = pickle.load(file)
+
+        if version not in (1, CHECKPOINT_VERSION):
+            raise ValueError(f"unsupported checkpoint version: {version}")
+
+        forest = [build_tree(tree) for tree in tuplified_forest]
+        sketch_precision = None
+        if version == CHECKPOINT_VERSION:
+            sketch_precision, dumped_forest_sketches = sketch_state
+            for tree, dumped_sketches in zip(forest, dumped_forest_sketches):
+                _load_input_sketches(tree, dumped_sketches)
+
+        return cls(forest, set(completed), sketch_precision)
+
+
+class IncrementalAggregate(object):
+    """
+    Object hierarchies merged from a set of named contributions (e.g. one per
+    file), where each contribution can later be replaced or removed. Removing
+    a contribution subtracts its frequencies and prunes the nodes that drop to
+    zero, so the cost of an update is proportional to the size of the
+    contribution rather than the size of the aggregate.
+    """
+
+    def __init__(self):
+        self.forest = []
+
+        # Maps contribution keys to the root nodes they contributed
+        self._contributions = {}
+
+        # Per-node bookkeeping, keyed by node id: children indexed by (name,
+        # order), and the number of contributions in which the node is
+        # callable (so `is_callable` can be cleared when the last one goes)
+        self._children = {}
+        self._callable_counts = {}
+        self._roots = {}
+
+    def __contains__(self, key):
+        return key in self._contributions
+
+    ## Helpers ##
+
+    def _new_node(self, node):
+        new_node = ObjectNode(node.name, order=node.order)
+        new_node.frequency = 0
+        self._children[id(new_node)] = {}
+
+        return new_node
+
+    def _forget(self, node):
+        self._children.pop(id(node), None)
+        self._callable_counts.pop(id(node), None)
+        for child in node.children:
+            self._forget(child)
+
+    def _add(self, target, source):
+        target.frequency += source.frequency
+        if source.is_callable:
+            self._callable_counts[id(target)] = self._callable_counts.get(id(target), 0) + 1
+            target.is_callable = True
+
+        children = self._children[id(target)]
+        for child in source.children:
+            matching_child = children.get((child.name, child.order))
+            if not matching_child:
+                matching_child = self._new_node(child)
+                children[(child.name, child.order)] = matching_child
+                target.children.append(matching_child)
+
+            self._add(matching_child, child)
+
+    def _subtract(self, target, source):
+        target.frequency -= source.frequency
+        if source.is_callable:
+            num_callable = self._callable_counts[id(target)] - 1
+            if num_callable:
+                self._callable_counts[id(target)] = num_callable
+            else:
+                del self._callable_counts[id(target)]
+                target.is_callable = False
+
+        children = self._children[id(target)]
+        pruned_ids = set()
+        for child in source.children:
+            matching_child = children[(child.name, child.order)]
+            self._subtract(matching_child, child)
+
+            if matching_child.frequency <= 0:
+                del children[(child.name, child.order)]
+                pruned_ids.add(id(matching_child))
+                self._forget(matching_child)
+
+        if pruned_ids:
+            # Compared by identity, since ObjectNode.__eq__ only compares names
+            target.children = [c for c in target.children if id(c) not in pruned_ids]
+
+    ## Public Methods ##
+
+    def add(self, key, trees):
+        """
+        Adds a contribution. The trees are kept (and must not be modified) so
+        the contribution can be subtracted later.
+
+        Parameters
+        ----------
+        key : hashable
+            name of the contribution (e.g. a file path)
+        trees : list
+            root nodes of the contribution's consolidated object hierarchies
+        """
+
+        if key in self._contributions:
+            self.remove(key)
+
+        for tree in trees:
+            root = self._roots.get(tree.name)
+            if not root:
+                root = self._new_node(tree)
+                self._roots[tree.name] = root
+                self.forest.append(root)
+
+            self._add(root, tree)
+
+        self._contributions[key] = trees
+
+    def remove(self, key):
+        """
+        Subtracts a contribution, pruning nodes whose frequency drops to zero.
+        """
+
+        for tree in self._contributions.pop(key, []):
+            root = self._roots[tree.name]
+            self._subtract(root, tree)
+
+            if root.frequency <= 0:
+                del self._roots[tree.name]
+                self.forest = [r for r in self.forest if r is not root]
+                self._forget(root)
+
+    def replace(self, key, trees):
+        """
+        Replaces a contribution (equivalent to `remove` followed by `add`).
+        """
+
+        self.add(key, trees)
@@ -0,0 +1,360 @@
+# Standard Library
+import ast
+import glob
+import hashlib
+import multiprocessing
+import os
+import pickle
+import struct
+
+# Local Modules
+import saplings.archives as archives
+import saplings.utilities as utils
+from saplings.saplings import Saplings
+from saplings.notebooks import analyze_notebook
+from saplings.project import Project
+from saplings.rendering import tuplify_tree
+
+SOURCE_EXTENSIONS = (".py", ".ipynb")
+BINARY_HEADER = struct.Struct("<I")
+
+
+########
+# INPUTS
+########
+
+
+def iter_source_paths(patterns):
+    """
+    Expands a list of files, directories, and glob patterns into paths of
+    Python source files. Directories are searched recursively for `.py` and
+    `.ipynb` files. Each path is yielded once, in the order it's first found.
+
+    Parameters
+    ----------
+    patterns : list
+        file paths, directory paths, and/or glob patterns
+
+    Returns
+    -------
+    generator
+        paths (strings)
+    """
+
+    seen = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            paths = sorted(
+                path
+                for extension in SOURCE_EXTENSIONS
+                for path in glob.iglob(
+                    os.path.join(pattern, "**", '*' + extension),
+                    recursive=True
+                )
+            )
+        elif glob.has_magic(pattern):
+            paths = sorted(glob.iglob(pattern, recursive=True))
+        else:
+            paths = [pattern]
+
+        for path in paths:
+            if path in seen or os.path.isdir(path):
+                continue
+
+            seen.add(path)
+            yield path
+
+
+##########
+# ANALYSIS
+##########
+
+
+def analyze_source(source, filename="<unknown>", modules=None, provenance=None):
+    """
+    Parses a program and extracts its object hierarchies.
+
+    Parameters
+    ----------
+    source : {str, bytes}
+        source code of the program
+    filename : str
+        name used in syntax errors; sources whose name ends in `.ipynb` are
+        parsed as Jupyter notebooks
+    modules : {set, None}
+        names of the root modules to keep; all hierarchies are kept if None
+    provenance : {ProvenanceStore, None}
+        store that the source locations of every use are added to, under
+        `filename` (not supported for notebooks)
+
+    Returns
+    -------
+    list
+        root nodes (ObjectNodes) of the program's object hierarchies; cells of
+        a notebook that couldn't be analyzed are left out (see
+        `notebooks.analyze_notebook` for their errors)
+    """
+
+    if filename.endswith(".ipynb"):
+        trees, _ = analyze_notebook(source)
+    elif provenance is not None:
+        object_hierarchies, recorder = [], provenance.recorder(filename)
+        saplings = Saplings(ast.parse(source, filename), object_hierarchies, {}, recorder)
+        recorder.commit(object_hierarchies)
+        trees = saplings.get_trees()
+    else:
+        # Fresh containers are passed in since the defaults are shared between
+        # instances
+        trees = Saplings(ast.parse(source, filename), [], {}).get_trees()
+
+    if modules is None:
+        return trees
+
+    return [tree for tree in trees if tree.name in modules]
+
+
+class ResultCache(object):
+    """
+    On-disk cache of analysis results, keyed by the contents of the analyzed
+    source and of the analyzer itself. Results are stored as tuplified trees.
+    """
+
+    def __init__(self, directory):
+        """
+        Parameters
+        ----------
+        directory : str
+            directory in which results are stored; created if it doesn't exist
+        """
+
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+        # Results are keyed on every module of the package rather than a list
+        # of the analyzer's, which would go stale as modules are added, so any
+        # upgrade of saplings invalidates the cache
+        analyzer_digest = hashlib.sha1()
+        package_dir = os.path.dirname(os.path.abspath(__file__))
+        for path in sorted(glob.glob(os.path.join(package_dir, "*.py"))):
+            analyzer_digest.update(os.path.basename(path).encode("utf-8"))
+            with open(path, "rb") as file:
+                analyzer_digest.update(file.read())
+
+        self._analyzer_digest = analyzer_digest.digest()
+
+    def key(self, source):
+        if isinstance(source, str):
+            source = source.encode("utf-8")
+
+        return hashlib.sha1(self._analyzer_digest + source).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key[2:])
+
+    def get(self, key):
+        """
+        Returns the cached tuplified trees for `key`, or None on a miss.
+        """
+
+        try:
+            with open(self._path(key), "rb") as file:
+                return pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def set(self, key, tuplified_trees):
+        """
+        Stores tuplified trees under `key`. The write is atomic, so concurrent
+        workers never observe a partially written entry.
+        """
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        payload = pickle.dumps(tuplified_trees, protocol=pickle.HIGHEST_PROTOCOL)
+        utils.atomic_write(path, payload)
+
+
+def analyze_path(path, cache=None, modules=None):
+    """
+    Analyzes a Python source file or notebook, consulting the result cache (if
+    any) first.
+
+    Parameters
+    ----------
+    path : str
+        path to the source file
+    cache : {ResultCache, None}
+        cache for analysis results
+    modules : {set, None}
+        names of the root modules to keep; all hierarchies are kept if None
+
+    Returns
+    -------
+    list
+        tuplified object hierarchies (see `rendering.tuplify_tree`)
+    """
+
+    with open(path, "rb") as file:
+        source = file.read()
+
+    if cache:
+        key = cache.key(source)
+        tuplified_trees = cache.get(key)
+        if tuplified_trees is None:
+            trees = analyze_source(source, path)
+            tuplified_trees = [tuplify_tree(tree) for tree in trees]
+            cache.set(key, tuplified_trees)
+    else:
+        trees = analyze_source(source, path)
+        tuplified_trees = [tuplify_tree(tree) for tree in trees]
+
+    if modules is None:
+        return tuplified_trees
+
+    return [tree for tree in tuplified_trees if tree[0] in modules]
+
+
+#########
+# BATCHES
+#########
+
+
+_worker_options = {}
+
+
+def _init_worker(cache_dir, modules, project_root=None):
+    _worker_options["cache"] = ResultCache(cache_dir) if cache_dir else None
+    _worker_options["modules"] = modules
+    _worker_options["project"] = Project(project_root) if project_root else None
+
+
+def _analyze_input(path):
+    """
+    Analyzes one input in a worker. Errors are returned rather than raised so
+    that one bad file doesn't bring down the whole run. Archives produce one
+    result for all of their members, and notebooks report each cell that
+    couldn't be analyzed as an error.
+    """
+
+    cache, modules = _worker_options["cache"], _worker_options["modules"]
+    project = _worker_options["project"]
+    try:
+        if project and path.endswith(".py"):
+            # Not cached, since the result depends on the modules it imports
+            trees = project.analyze_path(path)
+            tuplified_trees = [
+                tuplify_tree(tree) for tree in trees
+                if modules is None or tree.name in modules
+            ]
+
+            return path, tuplified_trees, []
+        elif archives.is_archive(path):
+            trees, member_errors = archives.analyze_archive(path, cache, modules)
+            tuplified_trees = [tuplify_tree(tree) for tree in trees]
+            errors = [f"{member}: {error}" for member, error in member_errors]
+
+            return path, tuplified_trees, errors
+        elif path.endswith(".ipynb"):
+            with open(path, "rb") as file:
+                source = file.read()
+
+            key = cache.key(source) if cache else None
+            tuplified_trees = cache.get(key) if cache else None
+            if tuplified_trees is None:
+                trees, cell_errors = analyze_notebook(source)
+                tuplified_trees = [tuplify_tree(tree) for tree in trees]
+                errors = [f"cell {index}: {error}" for index, error in cell_errors]
+
+                # Notebooks with broken cells aren't cached, so that their
+                # errors are reported on every run
+                if cache and not errors:
+                    cache.set(key, tuplified_trees)
+            else:
+                errors = []
+
+            if modules is not None:
+                tuplified_trees = [tree for tree in tuplified_trees if tree[0] in modules]
+
+            return path, tuplified_trees, errors
+
+        return path, analyze_path(path, cache, modules), []
+    except Exception as error: # Analyzer bugs shouldn't end the whole run either
+        return path, None, [f"{type(error).__name__}: {error}"]
+
+
+def iter_results(paths, workers=1, cache_dir=None, modules=None, project_root=None):
+    """
+    Analyzes inputs and yields their results as soon as each one completes
+    (i.e. not necessarily in input order).
+
+    Parameters
+    ----------
+    paths : list
+        paths of the inputs to analyze
+    workers : int
+        number of worker processes; inputs are analyzed in this process if 1
+    cache_dir : {str, None}
+        directory of the result cache; caching is disabled if None
+    modules : {set, None}
+        names of the root modules to keep; all hierarchies are kept if None
+    project_root : {str, None}
+        root directory of the project, for resolving first-party imports (see
+        `project.Project`); each worker analyzes a shared module once
+
+    Returns
+    -------
+    generator
+        `(path, tuplified_trees, errors)` tuples; `errors` is a list of error
+        messages (for archives, one per failed member) and `tuplified_trees`
+        is None if the whole input failed
+    """
+
+    if workers == 1:
+        _init_worker(cache_dir, modules, project_root)
+        yield from map(_analyze_input, paths)
+        return
+
+    init_args = (cache_dir, modules, project_root)
+    with multiprocessing.Pool(workers, _init_worker, init_args) as pool:
+        yield from pool.imap_unordered(_analyze_input, paths)
+
+
+########
+# OUTPUT
+########
+
+
+def write_binary_result(stream, path, tuplified_trees):
+    """
+    Writes one length-prefixed, pickled `(path, tuplified_trees)` record to a
+    binary stream.
+    """
+
+    payload = pickle.dumps((path, tuplified_trees), protocol=pickle.HIGHEST_PROTOCOL)
+    stream.write(BINARY_HEADER.pack(len(payload)))
+    stream.write(payload)
+
+
+def iter_binary_results(stream):
+    """
+    Reads the records written by `write_binary_result`, one at a time.
+
+    Parameters
+    ----------
+    stream : file
+        binary stream (e.g. a file opened with "rb")
+
+    Returns
+    -------
+    generator
+        `(path, tuplified_trees)` tuples
+    """
+
+    while True:
+        header = stream.read(BINARY_HEADER.size)
+        if len(header) < BINARY_HEADER.size:
+            return
+
+        size, = BINARY_HEADER.unpack(header)
+        yield pickle.loads(stream.read(size))
@@ -0,0 +1,128 @@
+# Standard Library
+import tarfile
+import zipfile
+
+# Local Modules
+import saplings.analysis as analysis
+from saplings.aggregation import merge_trees
+from saplings.rendering import tuplify_tree, build_tree
+
+ZIP_EXTENSIONS = (".whl", ".zip", ".egg")
+TAR_EXTENSIONS = (".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz", ".tar")
+
+# Members larger than this are skipped (generated code, vendored bundles, and
+# decompression bombs), which bounds the memory used per archive
+DEFAULT_MAX_MEMBER_SIZE = 4 * 1024 * 1024
+
+
+def is_archive(path):
+    path = path.lower()
+    return path.endswith(ZIP_EXTENSIONS) or path.endswith(TAR_EXTENSIONS)
+
+
+def _read_member(file, max_member_size):
+    # Reads at most one byte past the limit, so a member whose header lies
+    # about its size can't be decompressed into memory in full
+    source = file.read(max_member_size + 1)
+    return source if len(source) <= max_member_size else None
+
+
+def iter_archive_sources(path, max_member_size=DEFAULT_MAX_MEMBER_SIZE):
+    """
+    Iterates over the Python source files in a wheel, zip, or tarball without
+    extracting it. Members are decompressed one at a time and tarballs are read
+    as a stream, so only one member is ever held in memory.
+
+    Parameters
+    ----------
+    path : str
+        path to the archive
+    max_member_size : int
+        members whose uncompressed size exceeds this many bytes are skipped
+
+    Returns
+    -------
+    generator
+        `(member_name, source)` tuples, where `source` is bytes
+    """
+
+    if path.lower().endswith(ZIP_EXTENSIONS):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or not info.filename.endswith(".py"):
+                    continue
+                if info.file_size > max_member_size:
+                    continue
+
+                with archive.open(info) as file:
+                    source = _read_member(file, max_member_size)
+
+                if source is not None:
+                    yield info.filename, source
+    else:
+        # "r|*" reads the tarball as a stream of blocks instead of seeking,
+        # which avoids decompressing .tar.gz files more than once
+        with tarfile.open(path, "r|*") as archive:
+            for member in archive:
+                if not member.isfile() or not member.name.endswith(".py"):
+                    continue
+                if member.size > max_member_size:
+                    continue
+
+                file = archive.extractfile(member)
+                source = _read_member(file, max_member_size)
+
+                if source is not None:
+                    yield member.name, source
+
+
+def analyze_archive(path, cache=None, modules=None, max_member_size=DEFAULT_MAX_MEMBER_SIZE):
+    """
+    Analyzes every Python source file in an archive and merges the results into
+    one set of object hierarchies for the whole archive. Only the aggregated
+    hierarchies and the current member are kept in memory.
+
+    Parameters
+    ----------
+    path : str
+        path to the archive
+    cache : {ResultCache, None}
+        cache for per-member analysis results
+    modules : {set, None}
+        names of the root modules to keep; all hierarchies are kept if None
+    max_member_size : int
+        members whose uncompressed size exceeds this many bytes are skipped
+
+    Returns
+    -------
+    list
+        root nodes of the aggregated object hierarchies
+    list
+        `(member_name, error_message)` tuples for members that failed to parse
+    """
+
+    forest, errors = [], []
+    for member_name, source in iter_archive_sources(path, max_member_size):
+        key = cache.key(source) if cache else None
+        tuplified_trees = cache.get(key) if cache else None
+
+        if tuplified_trees is not None:
+            trees = [build_tree(tree) for tree in tuplified_trees]
+        else:
+            try:
+                trees = analysis.analyze_source(source, member_name)
+            except Exception as error:
+                errors.append((member_name, f"{type(error).__name__}: {error}"))
+                continue
+
+            if cache:
+                cache.set(key, [tuplify_tree(tree) for tree in trees])
+
+        if modules is not None:
+            trees = [tree for tree in trees if tree.name in modules]
+
+        # The member's trees are discarded after merging, so they can be
+        # adopted by the aggregate instead of copied
+        merge_trees(forest, trees, copy=False)
+
+    return forest, errors
@@ -0,0 +1,592 @@
+# Standard Library
+import argparse
+import ast
+import gc
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+# Local Modules
+from saplings.saplings import Saplings
+
+
+DEFAULT_REPEAT = 5
+DEFAULT_RETRIES = 1
+DEFAULT_TIME_THRESHOLD = 0.50
+DEFAULT_MEMORY_THRESHOLD = 0.10
+MIN_MEMORY_INCREASE = 16 * 1024 # Smaller increases are allocator noise
+CALIBRATION_ITERATIONS = 20000
+MIN_BATCH_SECONDS = 0.2
+
+
+###########
+# SCENARIOS
+###########
+
+
+SCENARIOS = {}
+
+
+def scenario(*sizes):
+    """
+    Registers a function that generates the source of a benchmark program. Each
+    scenario is run once per size so that super-linear growth shows up as a
+    regression in the larger sizes, even if the smaller ones stay flat.
+
+    Parameters
+    ----------
+    sizes : int
+        sizes passed into the decorated source generator
+    """
+
+    def decorator(generator):
+        SCENARIOS[generator.__name__] = (generator, sizes)
+        return generator
+
+    return decorator
+
+
+@scenario(200, 800)
+def wide_hierarchy(size):
+    """
+    One module with many distinct attributes (stresses sibling lookups in
+    `ObjectNode.add_child` and `find_matching_node`).
+    """
+
+    lines = ["import numpy as np"]
+    lines += [f"np.attr_{i}.method_{i}()" for i in range(size)]
+    return '\n'.join(lines)
+
+
+@scenario(50, 200)
+def deep_attribute_chains(size):
+    """
+    Long attribute chains with calls and subscripts in between.
+    """
+
+    chain = ".".join(f"a{j}()[{j}]" for j in range(20))
+    lines = ["import torch"]
+    lines += [f"x_{i} = torch.nn.{chain}" for i in range(size)]
+    return '\n'.join(lines)
+
+
+@scenario(200, 800)
+def many_aliases(size):
+    """
+    Many variables aliasing module objects and then being reassigned (stresses
+    namespace copies and `delete_sub_aliases`).
+    """
+
+    lines = ["import pandas as pd"]
+    for i in range(size):
+        lines.append(f"df_{i} = pd.read_csv(path_{i})")
+        lines.append(f"df_{i}.head().describe()")
+        lines.append(f"df_{i} = None")
+    return '\n'.join(lines)
+
+
+@scenario(50, 200)
+def many_functions(size):
+    """
+    Many user-defined functions, half of which are never called (stresses
+    `_process_uncalled_functions` and per-call argument processing).
+    """
+
+    lines = ["import numpy as np"]
+    for i in range(size):
+        lines.append(f"def func_{i}(x, y=np.zeros, *args, **kwargs):")
+        lines.append(f"    z = x.reshape({i})")
+        lines.append(f"    return y(z.shape)")
+    for i in range(0, size, 2):
+        lines.append(f"func_{i}(np.array([{i}])).sum()")
+    return '\n'.join(lines)
+
+
+@scenario(20, 80)
+def class_heavy(size):
+    """
+    User-defined classes with several methods, instantiated repeatedly.
+    """
+
+    lines = ["import torch.nn as nn"]
+    for i in range(size):
+        lines += [
+            f"class Model_{i}(nn.Module):",
+            f"    scale = nn.Parameter({i})",
+            f"    def __init__(self, dim):",
+            f"        self.layer = nn.Linear(dim, dim)",
+            f"    def forward(self, x):",
+            f"        return self.layer(x).relu()",
+            f"    @staticmethod",
+            f"    def build():",
+            f"        return nn.Sequential()",
+            f"    def __call__(self, x):",
+            f"        return self.forward(x)"
+        ]
+    for i in range(size):
+        lines.append(f"model_{i} = Model_{i}(8)")
+        lines.append(f"model_{i}(nn.Identity()).mean()")
+    return '\n'.join(lines)
+
+
+@scenario(50, 200)
+def branch_heavy(size):
+    """
+    Nested conditionals, loops and try/except blocks.
+    """
+
+    lines = ["import os"]
+    for i in range(size):
+        lines += [
+            f"if os.path.exists(p_{i}):",
+            f"    for f in os.listdir(p_{i}):",
+            f"        try:",
+            f"            h = os.stat(f).st_size",
+            f"        except os.error as e:",
+            f"            e.strerror.lower()",
+            f"elif os.environ.get(k_{i}):",
+            f"    os.getcwd().upper()",
+            f"else:",
+            f"    os.sep.join(p_{i})"
+        ]
+    return '\n'.join(lines)
+
+
+@scenario(8, 32)
+def sequential_branches(size):
+    """
+    Consecutive `if`/`else` blocks that each rebind the same names, so the
+    number of distinct paths doubles with every block (stresses the state
+    limit of path-sensitive mode).
+    """
+
+    lines = ["import numpy as np", "x, y = np.zeros, np.ones"]
+    for i in range(size):
+        lines += [
+            f"if flag_{i}:",
+            f"    x = np.op_{i}",
+            f"    x.first_{i}()",
+            f"else:",
+            f"    y = np.alt_{i}",
+            f"    try:",
+            f"        y.second_{i}()",
+            f"    except np.error_{i}:",
+            f"        z_{i} = x.third_{i}()",
+            f"x().y().sum_{i}()"
+        ]
+    return '\n'.join(lines)
+
+
+@scenario(100, 400)
+def many_instances(size):
+    """
+    A class with many methods and class variables, instantiated repeatedly
+    (stresses the cost of creating instances).
+    """
+
+    lines = ["import numpy as np", "class Config(object):"]
+    for i in range(100):
+        lines += [
+            f"    default_{i} = np.float32({i})",
+            f"    def get_{i}(self):",
+            f"        return self.default_{i}"
+        ]
+    for i in range(size):
+        lines.append(f"config_{i} = Config()")
+        lines.append(f"config_{i}.get_{i % 100}().item()")
+    return '\n'.join(lines)
+
+
+@scenario(20, 80)
+def deep_inheritance(size):
+    """
+    A long chain of user-defined subclasses, each instantiated and calling a
+    method inherited from the root of the chain (stresses method resolution).
+    """
+
+    lines = [
+        "import django.db.models as models",
+        "class Model_0(models.Model):",
+        "    def __init__(self, manager):",
+        "        self.objects = manager",
+        "    def save(self):",
+        "        return self.objects.create()"
+    ]
+    for i in range(1, size):
+        lines += [
+            f"class Model_{i}(Model_{i - 1}):",
+            f"    field_{i} = models.CharField()"
+        ]
+    for i in range(size):
+        lines.append(f"Model_{i}(models.Manager()).save().pk")
+    return '\n'.join(lines)
+
+
+@scenario(50, 200)
+def functional_style(size):
+    """
+    Lambdas and generators called from many places with the same arguments
+    (stresses the reuse of body summaries).
+    """
+
+    lines = [
+        "import pandas as pd",
+        "normalize = lambda df: df.fillna(0).astype(float)",
+        "def batches(df):",
+        "    for chunk in df.groupby(key):",
+        "        yield chunk.reset_index()"
+    ]
+    for i in range(size):
+        lines += [
+            f"frame_{i} = normalize(pd.read_csv(path))",
+            f"for batch in batches(pd.read_csv(path)):",
+            f"    batch.apply(lambda row: row.value_{i % 4}).sum()"
+        ]
+    return '\n'.join(lines)
+
+
+#########
+# RUNNERS
+#########
+
+
+def _calibration_workload():
+    namespace = {}
+    for i in range(CALIBRATION_ITERATIONS):
+        node = ast.Attribute(value=ast.Name(id=f"n{i % 97}"), attr="a")
+        key = node.value.id + '.' + node.attr
+        namespace[key] = namespace.get(key, []) + [i % 7]
+        if len(namespace[key]) > 8:
+            del namespace[key]
+
+    return namespace
+
+
+def calibrate(repeat=DEFAULT_REPEAT):
+    """
+    Times a fixed, pure-Python workload that exercises the same kinds of
+    operations as the analyzer (AST construction, attribute lookups, dict and
+    list manipulation). Scenario timings are divided by this number so that
+    results recorded on one machine can be compared against another.
+
+    Parameters
+    ----------
+    repeat : int
+        number of times to run the workload (the fastest run is kept)
+
+    Returns
+    -------
+    float
+        duration of the fastest run, in seconds
+    """
+
+    return min(_time_once(_calibration_workload) for _ in range(repeat))
+
+
+def _time_once(func):
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        func()
+        return time.perf_counter() - start
+    finally:
+        gc.enable()
+
+
+def _analyze(tree, max_states=None):
+    return Saplings(tree, [], {}, max_states=max_states).get_trees()
+
+
+def run_scenario(generator, size, repeat=DEFAULT_REPEAT, max_states=None):
+    """
+    Runs a single scenario and measures its running time and peak memory usage.
+    Parsing is excluded from both; only `Saplings` and `get_trees` are
+    measured.
+
+    Each timed batch is paired with a run of the calibration workload right
+    before it, and the median of the batch-to-calibration ratios is kept. On a
+    shared machine, both timings of a pair see roughly the same load, so the
+    ratio varies much less between runs than the timings themselves.
+
+    Parameters
+    ----------
+    generator : function
+        scenario source generator
+    size : int
+        size passed into the generator
+    repeat : int
+        number of timed batches
+    max_states : {int, None}
+        runs the analysis in path-sensitive mode (see `Saplings`)
+
+    Returns
+    -------
+    float
+        median duration of one analysis relative to the calibration workload
+        (see `calibrate`)
+    int
+        peak memory allocated during a separate, traced run, in bytes
+    """
+
+    source = generator(size)
+
+    # Small scenarios finish in a few milliseconds, which is too close to timer
+    # and scheduler noise; they're run in batches of `number` analyses instead
+    number = 1
+    while number * _time_once(lambda: _analyze(ast.parse(source), max_states)) < MIN_BATCH_SECONDS:
+        number *= 2
+
+    ratios = []
+    for _ in range(repeat):
+        # Saplings mutates the AST, so each analysis gets a fresh tree
+        trees = [ast.parse(source) for _ in range(number)]
+        batch = lambda: [_analyze(tree, max_states) for tree in trees]
+        calibration = _time_once(_calibration_workload)
+        ratios.append(_time_once(batch) / number / calibration)
+
+    tree = ast.parse(source)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        _analyze(tree, max_states)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return statistics.median(ratios), peak_memory
+
+
+def _iter_runs(names=None, max_states=[]):
+    """
+    Yields `(key, generator, size, max_states)` for each scenario run, where
+    `key` is the run's name in the results.
+    """
+
+    for name, (generator, sizes) in SCENARIOS.items():
+        if names and name not in names:
+            continue
+
+        for mode in [None] + list(max_states):
+            for size in sizes:
+                key = f"{name}[{size}]"
+                if mode:
+                    key += f":max_states={mode}"
+
+                yield key, generator, size, mode
+
+
+def run_benchmarks(names=None, repeat=DEFAULT_REPEAT, max_states=[]):
+    """
+    Runs the registered scenarios.
+
+    Parameters
+    ----------
+    names : {list, None}
+        names of the scenarios to run; all scenarios are run if None
+    repeat : int
+        number of timed runs per scenario
+    max_states : list
+        each scenario is run in the default mode, and then once in
+        path-sensitive mode (see `Saplings`) per value in this list; those
+        runs' names get a `:max_states=N` suffix, so they're compared against
+        baselines recorded in the same mode
+
+    Returns
+    -------
+    dict
+        benchmark results, in the same format as the baseline file. Times are
+        normalized by the calibration workload and are therefore unitless.
+    """
+
+    results = {
+        "python": platform.python_version(),
+        "calibration_seconds": calibrate(repeat),
+        "scenarios": {}
+    }
+
+    for key, generator, size, mode in _iter_runs(names, max_states):
+        time_ratio, peak_memory = run_scenario(generator, size, repeat, mode)
+        results["scenarios"][key] = {
+            "time": time_ratio,
+            "peak_memory": peak_memory
+        }
+
+    return results
+
+
+def retime_scenarios(results, keys, repeat=DEFAULT_REPEAT, max_states=[]):
+    """
+    Times the given scenario runs again and keeps the lower of the two times
+    for each. A slowdown caused by load on a shared machine rarely survives a
+    rerun, whereas a real regression does. `results` is modified in place.
+
+    Parameters
+    ----------
+    results : dict
+        output of `run_benchmarks`
+    keys : set
+        names of the runs to time again (e.g. `"branch_heavy[50]"`)
+    repeat : int
+        number of timed batches per run
+    max_states : list
+        the `max_states` values passed into `run_benchmarks`
+    """
+
+    for key, generator, size, mode in _iter_runs(None, max_states):
+        if key in keys:
+            time_ratio, _ = run_scenario(generator, size, repeat, mode)
+            metrics = results["scenarios"][key]
+            metrics["time"] = min(metrics["time"], time_ratio)
+
+
+def compare_results(results, baseline, time_threshold=DEFAULT_TIME_THRESHOLD,
+                    memory_threshold=DEFAULT_MEMORY_THRESHOLD):
+    """
+    Compares benchmark results against a baseline.
+
+    Parameters
+    ----------
+    results : dict
+        output of `run_benchmarks`
+    baseline : dict
+        previously saved output of `run_benchmarks`
+    time_threshold : float
+        maximum allowed relative increase in normalized time (e.g. `0.25` allows
+        a scenario to be 25% slower than the baseline)
+    memory_threshold : float
+        maximum allowed relative increase in peak memory (increases of less
+        than `MIN_MEMORY_INCREASE` bytes are always allowed)
+
+    Returns
+    -------
+    list
+        one `(scenario, metric, baseline_value, value, relative_change,
+        is_regression)` tuple per metric of every scenario present in both
+    list
+        names of the scenarios that were run but aren't in the baseline; these
+        count as failures, since they'd otherwise never be gated
+    """
+
+    rows, missing = [], []
+    for name, metrics in results["scenarios"].items():
+        if name not in baseline["scenarios"]:
+            missing.append(name)
+            continue
+
+        base_metrics = baseline["scenarios"][name]
+        thresholds = (("time", time_threshold), ("peak_memory", memory_threshold))
+        for metric, threshold in thresholds:
+            base_value, value = base_metrics[metric], metrics[metric]
+            change = (value - base_value) / base_value if base_value else 0.0
+            is_regression = change > threshold
+            if metric == "peak_memory":
+                is_regression &= value - base_value >= MIN_MEMORY_INCREASE
+
+            rows.append((name, metric, base_value, value, change, is_regression))
+
+    return rows, missing
+
+
+######
+# MAIN
+######
+
+
+def _format_value(metric, value):
+    if metric == "peak_memory":
+        return f"{value / 1024:.1f}KiB"
+
+    return f"{value:.2f}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m saplings.benchmarks",
+        description="Benchmarks saplings and optionally gates on a baseline."
+    )
+    parser.add_argument("--scenario", action="append", dest="scenarios",
+                        choices=list(SCENARIOS), help="scenario(s) to run")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help="timed batches per scenario (the median is kept)")
+    parser.add_argument("--max-states", type=int, action="append", default=[],
+                        metavar="N",
+                        help="also run in path-sensitive mode with at most N "
+                             "states (can be repeated)")
+    parser.add_argument("--save", metavar="PATH",
+                        help="write the results to PATH as a new baseline")
+    parser.add_argument("--compare", metavar="PATH",
+                        help="fail if results regress against the baseline at PATH")
+    parser.add_argument("--time-threshold", type=float,
+                        default=DEFAULT_TIME_THRESHOLD,
+                        help="allowed relative slowdown (default: %(default)s)")
+    parser.add_argument("--memory-threshold", type=float,
+                        default=DEFAULT_MEMORY_THRESHOLD,
+                        help="allowed relative peak memory increase (default: %(default)s)")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES,
+                        help="times a scenario that regressed in time is rerun "
+                             "before it's reported (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.scenarios, args.repeat, args.max_states)
+
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+            file.write('\n')
+
+    if not args.compare:
+        for name, metrics in results["scenarios"].items():
+            print(f"{name:<40} time={metrics['time']:.2f} "
+                  f"peak_memory={metrics['peak_memory'] / 1024:.1f}KiB")
+
+        return 0
+
+    with open(args.compare) as file:
+        baseline = json.load(file)
+
+    if baseline["python"] != results["python"]:
+        print(f"warning: baseline was recorded on Python {baseline['python']}, "
+              f"running on {results['python']}", file=sys.stderr)
+
+    rows, missing = compare_results(
+        results,
+        baseline,
+        args.time_threshold,
+        args.memory_threshold
+    )
+    for _ in range(args.retries):
+        slower = {name for name, metric, *_, is_regression in rows if is_regression and metric == "time"}
+        if not slower:
+            break
+
+        retime_scenarios(results, slower, args.repeat, args.max_states)
+        rows, missing = compare_results(
+            results,
+            baseline,
+            args.time_threshold,
+            args.memory_threshold
+        )
+
+    regressions = [row for row in rows if row[-1]]
+    for name, metric, base_value, value, change, is_regression in rows:
+        status = "REGRESSION" if is_regression else "ok"
+        print(f"{name:<40} {metric:<12} {_format_value(metric, base_value):>12} -> "
+              f"{_format_value(metric, value):>12} ({change:+.1%}) {status}")
+
+    for name in missing:
+        print(f"{name:<40} missing from the baseline")
+
+    if regressions or missing:
+        print(f"\n{len(regressions)} regression(s) and {len(missing)} scenario(s) "
+              f"missing from {args.compare}", file=sys.stderr)
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,250 @@
+# Standard Library
+import argparse
+import json
+import os
+import sys
+import time
+
+# Local Modules
+from saplings.analysis import iter_source_paths, iter_results, write_binary_result
+from saplings.aggregation import Aggregate
+from saplings.rendering import render_tree, dictify_tree, build_tree, tuplify_tree
+from saplings.sketches import (
+    TopKPaths,
+    DEFAULT_SKETCH_WIDTH,
+    DEFAULT_SKETCH_DEPTH,
+    DEFAULT_HLL_PRECISION
+)
+
+OUTPUT_FORMATS = ("tree", "json", "ndjson", "binary")
+AGGREGATE_NAME = "<aggregate>"
+
+
+#########
+# WRITERS
+#########
+
+
+class ResultWriter(object):
+    """
+    Writes results to an output stream as they arrive, in one of
+    `OUTPUT_FORMATS`.
+    """
+
+    def __init__(self, stream, output_format):
+        self.stream = stream
+        self.output_format = output_format
+        self._num_written = 0
+
+    def begin(self):
+        if self.output_format == "json":
+            self.stream.write("{")
+
+    def write(self, path, tuplified_trees):
+        if self.output_format == "binary":
+            write_binary_result(self.stream.buffer, path, tuplified_trees)
+            self.stream.buffer.flush()
+        elif self.output_format == "tree":
+            self.stream.write(f"==> {path} <==\n")
+            for tuplified_tree in tuplified_trees:
+                for branches, node in render_tree(build_tree(tuplified_tree)):
+                    self.stream.write(f"{branches}{node}\n")
+            self.stream.write("\n")
+        else:
+            trees = [dictify_tree(build_tree(t)) for t in tuplified_trees]
+            if self.output_format == "ndjson":
+                self.stream.write(json.dumps({"path": path, "trees": trees}))
+                self.stream.write("\n")
+            else:
+                separator = ",\n " if self._num_written else "\n "
+                self.stream.write(separator + json.dumps(path) + ": ")
+                self.stream.write(json.dumps(trees))
+
+        self._num_written += 1
+        self.stream.flush()
+
+    def end(self):
+        if self.output_format == "json":
+            self.stream.write("\n}\n" if self._num_written else "}\n")
+            self.stream.flush()
+
+
+######
+# MAIN
+######
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(
+        prog="saplings",
+        description="Builds object hierarchies for the modules imported in Python programs."
+    )
+    parser.add_argument("inputs", nargs='+', metavar="PATH",
+                        help="Python files, directories, archives (.whl, .zip, "
+                             ".tar.gz, ...), or glob patterns")
+    parser.add_argument("-j", "--workers", type=int, default=1,
+                        help="number of worker processes (0 uses every CPU)")
+    parser.add_argument("--cache", metavar="DIR",
+                        help="cache results in DIR and reuse them for unchanged files")
+    parser.add_argument("-m", "--module", action="append", dest="modules",
+                        metavar="NAME", help="only output hierarchies rooted at NAME")
+    parser.add_argument("-f", "--format", choices=OUTPUT_FORMATS, default="tree",
+                        help="output format (default: %(default)s)")
+    parser.add_argument("--project", metavar="ROOT",
+                        help="resolve imports of modules under ROOT (and relative "
+                             "imports) to their functions and classes, so uses "
+                             "through the project's own helpers are tracked")
+    parser.add_argument("--progress", action="store_true",
+                        help="report progress on stderr")
+    parser.add_argument("--aggregate", action="store_true",
+                        help="output one set of hierarchies merged across all inputs")
+    parser.add_argument("--checkpoint", metavar="PATH",
+                        help="periodically save the merged hierarchies and completed "
+                             "inputs to PATH, and resume from PATH if it exists "
+                             "(requires --aggregate)")
+    parser.add_argument("--checkpoint-interval", type=float, default=300,
+                        metavar="SECONDS",
+                        help="seconds between checkpoints (default: %(default)s)")
+    parser.add_argument("--top-k", type=int, metavar="K",
+                        help="output the K most used API paths across all inputs, "
+                             "counted approximately in fixed memory")
+    parser.add_argument("--sketch-width", type=int, default=DEFAULT_SKETCH_WIDTH,
+                        help="counters per row of the --top-k sketch; the error "
+                             "bound shrinks as it grows (default: %(default)s)")
+    parser.add_argument("--sketch-depth", type=int, default=DEFAULT_SKETCH_DEPTH,
+                        help="rows of the --top-k sketch (default: %(default)s)")
+    parser.add_argument("--count-inputs", action="store_true",
+                        help="with --aggregate, output the estimated number of "
+                             "distinct inputs that use each API path instead of "
+                             "the merged hierarchies")
+    parser.add_argument("--sketch-precision", type=int, default=DEFAULT_HLL_PRECISION,
+                        help="precision of the --count-inputs sketches; the error "
+                             "shrinks as it grows, from 4 to 16 (default: %(default)s)")
+
+    return parser
+
+
+def write_top_paths(stream, top_paths, output_format):
+    top = top_paths.top()
+    if output_format == "tree":
+        width = max((len(path) for path, _ in top), default=0)
+        for path, count in top:
+            stream.write(f"{path:<{width}}  {count}\n")
+        stream.write(f"(counts overestimate by at most {top_paths.error_bound})\n")
+    else:
+        json.dump({
+            "total": top_paths.sketch.total,
+            "error_bound": top_paths.error_bound,
+            "paths": [{"path": path, "count": count} for path, count in top]
+        }, stream)
+        stream.write("\n")
+
+
+def write_input_counts(stream, aggregate, output_format):
+    counts = sorted(aggregate.count_inputs().items(), key=lambda item: (-item[1], item[0]))
+    relative_error = 1.04 / (1 << aggregate.sketch_precision) ** 0.5
+    if output_format == "tree":
+        width = max((len(path) for path, _ in counts), default=0)
+        for path, count in counts:
+            stream.write(f"{path:<{width}}  {count}\n")
+        stream.write(f"(estimates of {len(aggregate.completed)} inputs, with a relative "
+                     f"standard error of {relative_error:.1%})\n")
+    else:
+        json.dump({
+            "total": len(aggregate.completed),
+            "relative_error": relative_error,
+            "paths": [{"path": path, "inputs": count} for path, count in counts]
+        }, stream)
+        stream.write("\n")
+
+
+def main(argv=None):
+    parser = create_parser()
+    args = parser.parse_args(argv)
+    if args.checkpoint and not args.aggregate:
+        # Per-file results aren't kept in the checkpoint, so a resumed run
+        # couldn't output the files that were done before it
+        parser.error("--checkpoint requires --aggregate")
+
+    if args.top_k is not None:
+        if args.aggregate or args.checkpoint:
+            parser.error("--top-k can't be combined with --aggregate or --checkpoint")
+        elif args.format == "binary":
+            parser.error("--top-k can't be output in binary format")
+
+    if args.count_inputs:
+        if not args.aggregate:
+            parser.error("--count-inputs requires --aggregate")
+        elif args.format == "binary":
+            parser.error("--count-inputs can't be output in binary format")
+        elif not 4 <= args.sketch_precision <= 16:
+            parser.error("--sketch-precision must be between 4 and 16")
+
+    paths = list(iter_source_paths(args.inputs))
+    workers = args.workers or os.cpu_count()
+    modules = set(args.modules) if args.modules else None
+
+    aggregate = None
+    if args.checkpoint and os.path.exists(args.checkpoint):
+        aggregate = Aggregate.load(args.checkpoint)
+        paths = [path for path in paths if path not in aggregate]
+        if args.count_inputs and aggregate.sketch_precision != args.sketch_precision:
+            # Inputs from before the checkpoint would be missing from the counts
+            parser.error(f"{args.checkpoint} wasn't written with --count-inputs "
+                         f"--sketch-precision {args.sketch_precision}")
+    elif args.aggregate:
+        sketch_precision = args.sketch_precision if args.count_inputs else None
+        aggregate = Aggregate(sketch_precision=sketch_precision)
+
+    top_paths, writer = None, None
+    if args.top_k is not None:
+        top_paths = TopKPaths(args.top_k, args.sketch_width, args.sketch_depth)
+    elif not args.count_inputs:
+        writer = ResultWriter(sys.stdout, args.format)
+        writer.begin()
+
+    num_errors = 0
+    last_checkpoint_time = time.monotonic()
+    results = iter_results(paths, workers, args.cache, modules, args.project)
+    try:
+        for num_done, (path, tuplified_trees, errors) in enumerate(results, 1):
+            for error in errors:
+                print(f"saplings: {path}: {error}", file=sys.stderr)
+
+            num_errors += len(errors)
+            if aggregate is not None:
+                # Failed inputs are marked as completed too, since they'd only
+                # fail again after resuming
+                trees = [build_tree(tree) for tree in tuplified_trees or []]
+                aggregate.add(path, trees)
+            if tuplified_trees is not None and top_paths is not None:
+                top_paths.add_trees(tuplified_trees)
+            elif tuplified_trees is not None and not args.aggregate:
+                writer.write(path, tuplified_trees)
+
+            if args.progress:
+                print(f"[{num_done}/{len(paths)}] {path}", file=sys.stderr)
+
+            elapsed_time = time.monotonic() - last_checkpoint_time
+            if args.checkpoint and elapsed_time >= args.checkpoint_interval:
+                aggregate.save(args.checkpoint)
+                last_checkpoint_time = time.monotonic()
+    finally:
+        if args.checkpoint:
+            aggregate.save(args.checkpoint)
+
+    if top_paths is not None:
+        write_top_paths(sys.stdout, top_paths, args.format)
+    elif args.count_inputs:
+        write_input_counts(sys.stdout, aggregate, args.format)
+    else:
+        if args.aggregate:
+            writer.write(AGGREGATE_NAME, [tuplify_tree(t) for t in aggregate.forest])
+
+        writer.end()
+
+    return 1 if num_errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
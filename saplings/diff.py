@@ -0,0 +1,126 @@
+# Standard Library
+import argparse
+import json
+import sys
+
+# Local Modules
+from saplings.aggregation import merge_trees
+from saplings.analysis import iter_source_paths, iter_results
+from saplings.fingerprints import fingerprint_tree
+from saplings.rendering import iter_tree_paths, build_tree
+
+
+def _add_paths(report, node, parent_path):
+    for path, n in iter_tree_paths(node, parent_path):
+        report[path] = n.frequency
+
+
+def _diff_nodes(old_node, new_node, path, old_memo, new_memo, report):
+    # Interned trees may share subtrees, in which case fingerprints aren't needed
+    if old_node is new_node or old_memo[id(old_node)] == new_memo[id(new_node)]:
+        return
+
+    if old_node.frequency != new_node.frequency:
+        report["changed"][path] = new_node.frequency - old_node.frequency
+
+    new_children = {(c.name, c.order): c for c in new_node.children}
+    for old_child in old_node.children:
+        child_path = path + "()" * old_child.order + '.' + old_child.name
+        new_child = new_children.pop((old_child.name, old_child.order), None)
+        if new_child:
+            _diff_nodes(old_child, new_child, child_path, old_memo, new_memo, report)
+        else:
+            _add_paths(report["removed"], old_child, path)
+
+    for new_child in new_children.values():
+        _add_paths(report["added"], new_child, path)
+
+
+def diff_forests(old_forest, new_forest):
+    """
+    Compares two sets of object hierarchies (e.g. of two versions of a
+    library), matching roots by name and children by (name, order). Subtrees
+    whose fingerprints match are skipped without being walked, so the cost of
+    a diff is mostly in the parts of the trees that differ.
+
+    Parameters
+    ----------
+    old_forest : list
+        root nodes of the consolidated object hierarchies before
+    new_forest : list
+        root nodes of the consolidated object hierarchies after
+
+    Returns
+    -------
+    dict
+        `{"added": {path: frequency}, "removed": {path: frequency},
+        "changed": {path: frequency_delta}}`, where paths are formatted like
+        in `rendering.iter_tree_paths`
+    """
+
+    old_memo, new_memo = {}, {}
+    for tree in old_forest:
+        fingerprint_tree(tree, memo=old_memo)
+    for tree in new_forest:
+        fingerprint_tree(tree, memo=new_memo)
+
+    report = {"added": {}, "removed": {}, "changed": {}}
+
+    new_roots = {root.name: root for root in new_forest}
+    for old_root in old_forest:
+        new_root = new_roots.pop(old_root.name, None)
+        if new_root:
+            _diff_nodes(old_root, new_root, old_root.name, old_memo, new_memo, report)
+        else:
+            _add_paths(report["removed"], old_root, None)
+
+    for new_root in new_roots.values():
+        _add_paths(report["added"], new_root, None)
+
+    return report
+
+
+######
+# MAIN
+######
+
+
+def _analyze_inputs(patterns, modules):
+    forest, errors = [], []
+    paths = list(iter_source_paths(patterns))
+    for path, tuplified_trees, input_errors in iter_results(paths, modules=modules):
+        errors.extend(f"{path}: {error}" for error in input_errors)
+        if tuplified_trees is not None:
+            merge_trees(forest, [build_tree(tree) for tree in tuplified_trees], copy=False)
+
+    return forest, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m saplings.diff",
+        description="Compares the API usage of two versions of a codebase and "
+                    "prints the paths that were added, removed, or used more or "
+                    "less often (as JSON)."
+    )
+    parser.add_argument("old", help="file, directory, glob, or archive before")
+    parser.add_argument("new", help="file, directory, glob, or archive after")
+    parser.add_argument("-m", "--module", action="append", dest="modules",
+                        metavar="NAME", help="only compare hierarchies rooted at NAME")
+    args = parser.parse_args(argv)
+
+    modules = set(args.modules) if args.modules else None
+    old_forest, old_errors = _analyze_inputs([args.old], modules)
+    new_forest, new_errors = _analyze_inputs([args.new], modules)
+
+    json.dump(diff_forests(old_forest, new_forest), sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+    for error in old_errors + new_errors:
+        print(f"saplings: {error}", file=sys.stderr)
+
+    return 1 if old_errors or new_errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,22 @@
+# Standard Library
+import itertools
+from collections import deque
+from collections.abc import MutableMapping
+from copy import copy, deepcopy
+
+MAX_CONTAINER_ENTITIES = 16
+
+# Numbers functions, containers and instances in order of creation, so that
+# those created by a function's body can be told apart (see
+# `summaries.copy_return_value`), and uncalled functions are processed in the
+# order they were defined
+_serials = itertools.count()
+
+
+def next_serial():
+    return next(_serials)
+
+
 class ObjectNode(object):
     """
     Object hierarchy node. Represents an object that's descendant of an imported
@@ -30,6 +49,10 @@ class ObjectNode(object):
 
         self.frequency = 1
 
+        # HyperLogLog sketch of the inputs (e.g. files) that use the object;
+        # only tracked during corpus aggregation (see `aggregation.Aggregate`)
+        self.input_sketch = None
+
         for child in children:
             self.add_child(child)
 
@@ -63,12 +86,11 @@ class ObjectNode(object):
         return node
 
     def breadth_first(self):
-        node_queue = [self]
+        node_queue = deque([self])
         while node_queue:
-            node = node_queue.pop(0)
+            node = node_queue.popleft()
             yield node
-            for child in node.children:
-                node_queue.append(child)
+            node_queue.extend(node.children)
 
 
 class Function(object):
@@ -102,6 +124,80 @@ class Function(object):
         self.called = called
         self.method_type = method_type
         self.containing_class = containing_class
+        self.serial = next_serial()
+
+        # Maps parameter names to the entities of their default values (None
+        # if a default isn't an entity), evaluated when the function is defined
+        self.default_entities = {}
+
+        # For functions imported from a first-party module: maps the entities
+        # in `init_namespace` into the importing module (see `project.py`)
+        self.translation = None
+
+        # Recursion state (see `recursion.py`): whether the function is part
+        # of a cycle in the call graph (None until it's first processed), the
+        # cycle, whether it's being processed, and its return value in the
+        # latest fixed-point iteration
+        self.is_recursive = None
+        self.call_cycle = None
+        self.is_processing = False
+        self.summary = None
+
+        # Whether the function has a `yield` in its body, and, for lambdas and
+        # generators, the names its body may read and the results of
+        # processing it, keyed by the shape of the namespace it was processed
+        # in (see `summaries.py`)
+        self.is_generator = False
+        self.read_names = None
+        self.summaries = {}
+
+    def __deepcopy__(self, memo):
+        # The AST node is shared between copies; only analysis state is copied
+        function = copy(self)
+        memo[id(self)] = function
+        function.summaries = {} # Summaries are only a cache
+
+        function.init_namespace = deepcopy(self.init_namespace, memo)
+        function.default_entities = deepcopy(self.default_entities, memo)
+        function.containing_class = deepcopy(self.containing_class, memo)
+
+        return function
+
+
+def _merge_mros(sequences):
+    """
+    Merges the MROs of a class's bases (and the list of bases) by C3
+    linearization. Returns None if the MROs can't be merged consistently.
+    """
+
+    # Sequences are reversed, so that heads are popped off the end, and the
+    # number of tails each class is in is counted, so that checking a head
+    # doesn't search every sequence
+    sequences = [list(reversed(sequence)) for sequence in sequences if sequence]
+    tail_counts = {}
+    for sequence in sequences:
+        for class_entity in sequence[:-1]:
+            tail_counts[id(class_entity)] = tail_counts.get(id(class_entity), 0) + 1
+
+    merged = []
+    while sequences:
+        for sequence in sequences:
+            head = sequence[-1]
+            if not tail_counts.get(id(head)):
+                break
+        else:
+            return None
+
+        merged.append(head)
+        for sequence in sequences:
+            if sequence[-1] is head:
+                sequence.pop()
+                if sequence: # New head is no longer in a tail
+                    tail_counts[id(sequence[-1])] -= 1
+
+        sequences = [sequence for sequence in sequences if sequence]
+
+    return merged
 
 
 class Class(object):
@@ -109,7 +205,8 @@ class Class(object):
     Represents a user-defined class.
     """
 
-    def __init__(self, def_node, init_namespace, init_instance_namespace={}):
+    def __init__(self, def_node, init_namespace, init_instance_namespace={},
+                 bases=[]):
         """
         Parameters
         ----------
@@ -119,11 +216,172 @@ class Class(object):
         init_instance_namespace : dict
             namespace containing the methods and variables defined inside the
             class; everything in this namespace is an attribute of `self`
+        bases : list
+            user-defined base classes (Classes); bases that aren't
+            user-defined aren't included
         """
 
         self.def_node = def_node
+        self.bases = bases
+
+        # Incremented whenever `init_instance_namespace` is replaced, so that
+        # the namespaces cached by subclasses can be invalidated
+        self.version = 0
         self.init_instance_namespace = init_instance_namespace
 
+        # Caches for `get_mro` and `get_namespace`
+        self._mro = None
+        self._namespace = None
+        self._namespace_versions = None
+
+    @property
+    def init_instance_namespace(self):
+        return self._init_instance_namespace
+
+    @init_instance_namespace.setter
+    def init_instance_namespace(self, init_instance_namespace):
+        self._init_instance_namespace = init_instance_namespace
+        self.version += 1
+
+    def __copy__(self):
+        class_entity = Class.__new__(Class)
+        class_entity.__dict__.update(self.__dict__)
+        class_entity._mro = None
+        class_entity._namespace = None
+        class_entity._namespace_versions = None
+
+        return class_entity
+
+    def __deepcopy__(self, memo):
+        class_entity = copy(self)
+        memo[id(self)] = class_entity
+
+        class_entity.bases = deepcopy(self.bases, memo)
+        class_entity.init_instance_namespace = deepcopy(
+            self.init_instance_namespace,
+            memo
+        )
+
+        return class_entity
+
+    def get_mro(self):
+        """
+        Returns the method resolution order of the class: the class followed by
+        its user-defined base classes, in C3 linearization order (like
+        Python's). Computed once, since the bases of a class don't change.
+
+        Returns
+        -------
+        list
+            Classes, starting with this one
+        """
+
+        if self._mro is None:
+            base_mros = [base.get_mro() for base in self.bases]
+            merged = _merge_mros(base_mros + [self.bases])
+            if merged is None: # Inconsistent hierarchy; falls back to DFS
+                merged = []
+                for base_mro in base_mros:
+                    merged += [c for c in base_mro if not any(c is m for m in merged)]
+
+            self._mro = [self] + merged
+
+        return self._mro
+
+    def get_namespace(self):
+        """
+        Returns the attributes of the class, including those inherited from
+        its user-defined base classes (i.e. `init_instance_namespace` with
+        each name resolved through the MRO). The namespace is cached until the
+        namespace of a class in the MRO is replaced, so lookups don't search
+        the hierarchy. It's shared, and mustn't be modified.
+
+        Returns
+        -------
+        dict
+            maps attribute names to namespace entities
+        """
+
+        mro = self.get_mro()
+        if len(mro) == 1:
+            return self.init_instance_namespace
+
+        versions = tuple(c.version for c in mro)
+        if self._namespace is None or versions != self._namespace_versions:
+            namespace = {}
+            for class_entity in reversed(mro):
+                namespace.update(class_entity.init_instance_namespace)
+
+            self._namespace = namespace
+            self._namespace_versions = versions
+
+        return self._namespace
+
+
+class InstanceNamespace(MutableMapping):
+    """
+    Namespace of a class instance: an overlay of the instance's own attribute
+    writes (and deletions) on top of its class's namespace (see
+    `Class.get_namespace`), which is shared by every instance and never
+    modified. Creating an instance is O(1), and its memory grows only with
+    the attributes it sets.
+    """
+
+    def __init__(self, template, overlay=None, deleted=None):
+        """
+        Parameters
+        ----------
+        template : dict
+            namespace of the class (read-only)
+        overlay : {dict, None}
+            attributes set on the instance
+        deleted : {set, None}
+            names in `template` that were deleted from the instance
+        """
+
+        self.template = template
+        self.overlay = {} if overlay is None else overlay
+        self.deleted = set() if deleted is None else deleted
+
+    def __getitem__(self, name):
+        if name in self.overlay:
+            return self.overlay[name]
+        elif name in self.deleted:
+            raise KeyError(name)
+
+        return self.template[name]
+
+    def __contains__(self, name):
+        if name in self.overlay:
+            return True
+
+        return name in self.template and name not in self.deleted
+
+    def __setitem__(self, name, entity):
+        self.overlay[name] = entity
+        if self.deleted:
+            self.deleted.discard(name)
+
+    def __delitem__(self, name):
+        if name not in self:
+            raise KeyError(name)
+
+        self.overlay.pop(name, None)
+        if name in self.template:
+            self.deleted.add(name)
+
+    def __iter__(self):
+        yield from self.overlay
+        for name in self.template:
+            if name not in self.overlay and name not in self.deleted:
+                yield name
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def copy(self):
+        return InstanceNamespace(self.template, self.overlay.copy(), self.deleted.copy())
+
 
 class ClassInstance(object):
     """
@@ -136,10 +394,175 @@ class ClassInstance(object):
         ----------
         class_entity : Class
             class entity for which this is an instance of
-        namespace : dict
+        namespace : {InstanceNamespace, dict}
             namespace/state of the instance (everything here is an attribute of
             `self`)
         """
 
         self.class_entity = class_entity
         self.namespace = namespace
+        self.serial = next_serial()
+
+    def __copy__(self):
+        class_instance = ClassInstance.__new__(ClassInstance)
+        class_instance.__dict__.update(self.__dict__)
+
+        return class_instance
+
+
+class Container(object):
+    """
+    Represents a list, tuple, set, or dict (or a comprehension or generator
+    producing one) holding namespace entities. Rather than one entry per
+    element, a container keeps a summary: the distinct entities among its
+    elements, up to `MAX_CONTAINER_ENTITIES` (past that, its elements are
+    unknown). Containers with at most `MAX_CONTAINER_ENTITIES` elements also
+    keep their positions (or constant keys, for dicts), so that `x[0]` and
+    `a, b = x` resolve to the exact element. Memory stays bounded no matter
+    how large the container is.
+    """
+
+    def __init__(self, kind, is_ordered=True):
+        """
+        Parameters
+        ----------
+        kind : str
+            type of container (e.g. "list", "tuple", "dict")
+        is_ordered : bool
+            whether the positions of the elements are known (False for sets
+            and comprehensions)
+        """
+
+        self.kind = kind
+
+        # Entities at each position (None for elements that aren't entities),
+        # and the constant keys of a dict's values (None for other keys); None
+        # once the positions are unknown
+        self.elements = [] if is_ordered else None
+        self.keys = [] if is_ordered and kind == "dict" else None
+
+        # Distinct entities among the elements; None if there are too many
+        self.entities = []
+
+        self.serial = next_serial()
+
+    def __copy__(self):
+        container = Container.__new__(Container)
+        container.__dict__.update(self.__dict__)
+
+        return container
+
+    def add(self, entity, key=None):
+        """
+        Adds an element (or a value, with its key if it's a constant, for
+        dicts).
+        """
+
+        if self.elements is not None:
+            if len(self.elements) < MAX_CONTAINER_ENTITIES:
+                self.elements.append(entity)
+                if self.keys is not None:
+                    self.keys.append(key)
+            else:
+                self.elements, self.keys = None, None
+
+        self._add_entity(entity)
+
+    def _add_entity(self, entity):
+        if entity is None or self.entities is None:
+            return
+
+        if not any(e is entity for e in self.entities):
+            self.entities.append(entity)
+            if len(self.entities) > MAX_CONTAINER_ENTITIES:
+                self.entities = None
+
+    def set_element(self, entity, key=None, is_known_key=False):
+        """
+        Handles an item assignment (e.g. `x[0] = a`).
+        """
+
+        if is_known_key and self.elements is not None:
+            if self.keys is not None and key in self.keys:
+                self.elements[self.keys.index(key)] = entity
+            elif self.keys is not None:
+                self.add(entity, key)
+                return
+            elif isinstance(key, int) and -len(self.elements) <= key < len(self.elements):
+                self.elements[key] = entity
+            else:
+                self.elements = None
+        else:
+            self.elements, self.keys = None, None
+
+        self._add_entity(entity)
+
+    def get_slice(self):
+        """
+        Returns a container of the same elements, in unknown positions (e.g.
+        for `x[1:]`).
+        """
+
+        container = Container(self.kind, is_ordered=False)
+        container.entities = None if self.entities is None else list(self.entities)
+
+        return container
+
+    def get_element(self, key=None, is_known_key=False):
+        """
+        Returns the entity of an element: the one at `key` if the key and the
+        container's positions are known, otherwise the only distinct entity
+        among the elements (or None if there are several).
+
+        Parameters
+        ----------
+        key : object
+            constant index or key
+        is_known_key : bool
+            True if `key` was given as a constant
+        """
+
+        if is_known_key and self.elements is not None:
+            if self.keys is not None:
+                if key in self.keys:
+                    return self.elements[self.keys.index(key)]
+            elif isinstance(key, int) and not isinstance(key, bool) \
+                    and -len(self.elements) <= key < len(self.elements):
+                return self.elements[key]
+
+        if self.entities is not None and len(self.entities) == 1:
+            return self.entities[0]
+
+        return None
+
+    def unpack(self, num_targets, star_index=None):
+        """
+        Returns the entities that `num_targets` targets (e.g. `a, b = x`) are
+        bound to when the container is unpacked. A starred target (e.g. `*c`)
+        is bound to a list of the elements it consumes.
+        """
+
+        elements = self.elements
+        num_after = 0 if star_index is None else num_targets - star_index - 1
+        if star_index is None:
+            is_known = elements is not None and len(elements) == num_targets
+        else:
+            is_known = elements is not None and len(elements) >= num_targets - 1
+
+        if self.kind == "dict" or not is_known:
+            # Unpacking a dict produces its keys
+            element = None if self.kind == "dict" else self.get_element()
+            unpacked = [element] * num_targets
+            if star_index is not None:
+                unpacked[star_index] = Container("list", is_ordered=False)
+                unpacked[star_index].add(element)
+
+            return unpacked
+        elif star_index is None:
+            return list(elements)
+
+        starred = Container("list")
+        for element in elements[star_index:len(elements) - num_after]:
+            starred.add(element)
+
+        return elements[:star_index] + [starred] + elements[len(elements) - num_after:]
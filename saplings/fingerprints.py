@@ -0,0 +1,160 @@
+# Standard Library
+from hashlib import blake2b
+
+DIGEST_SIZE = 16
+
+
+def _digest(name, is_callable, order, frequency, child_digests):
+    # Children are sorted since they're matched on (name, order), not on their
+    # position
+    header = f"{len(name)}:{name}|{order}|{int(is_callable)}|{frequency}"
+
+    digest = blake2b(header.encode("utf-8", "surrogateescape"), digest_size=DIGEST_SIZE)
+    for child_digest in sorted(child_digests):
+        digest.update(child_digest)
+
+    return digest.digest()
+
+
+def fingerprint_tree(node, frequencies=True, memo=None):
+    """
+    Computes a Merkle fingerprint of an object hierarchy, bottom-up from the
+    fingerprints of its subtrees. Two trees have the same fingerprint iff
+    they're structurally identical: same names, orders, callability, and (if
+    `frequencies` is True) frequencies, with the same children in any order.
+
+    Parameters
+    ----------
+    node : ObjectNode
+        root of the tree
+    frequencies : bool
+        whether frequencies are part of the fingerprint; if False, only the
+        shape of the tree is
+    memo : {dict, None}
+        maps node ids to fingerprints; filled in for every node of the tree, so
+        the fingerprints of subtrees can be looked up afterwards
+
+    Returns
+    -------
+    bytes
+        fingerprint of the tree
+    """
+
+    if memo is None:
+        memo = {}
+    elif id(node) in memo:
+        return memo[id(node)]
+
+    fingerprint = _digest(
+        node.name,
+        node.is_callable,
+        node.order,
+        node.frequency if frequencies else None,
+        [fingerprint_tree(child, frequencies, memo) for child in node.children]
+    )
+    memo[id(node)] = fingerprint
+
+    return fingerprint
+
+
+def fingerprint_tuplified_tree(node_tuple, frequencies=True):
+    """
+    Same as `fingerprint_tree`, for a tree in the form produced by
+    `rendering.tuplify_tree`.
+    """
+
+    name, is_callable, order, frequency, children = node_tuple
+    return _digest(
+        name,
+        is_callable,
+        order,
+        frequency if frequencies else None,
+        [fingerprint_tuplified_tree(child, frequencies) for child in children]
+    )
+
+
+class TreeInterner(object):
+    """
+    Hash-conses object hierarchies: identical subtrees (by fingerprint,
+    including frequencies) are replaced by a single shared instance. Across
+    many analysis results, most subtrees repeat (e.g. `numpy -> array ->
+    shape`), so interning them saves a lot of memory, and pickling interned
+    trees only stores each shared subtree once.
+
+    Interned trees share nodes with each other, so they must be treated as
+    immutable. In particular, they must not be merged into with `copy=False`.
+    """
+
+    def __init__(self):
+        self._nodes = {} # Maps fingerprints to canonical ObjectNodes
+        self._tuples = {} # Maps fingerprints to canonical tuplified trees
+
+    def __len__(self):
+        return len(self._nodes) + len(self._tuples)
+
+    def intern(self, node):
+        """
+        Interns an object hierarchy in place, bottom-up.
+
+        Parameters
+        ----------
+        node : ObjectNode
+            root of the tree
+
+        Returns
+        -------
+        ObjectNode
+            canonical instance of the tree (which may be `node` itself)
+        """
+
+        return self._intern(node)[0]
+
+    def _intern(self, node):
+        interned_children, child_fingerprints = [], []
+        for child in node.children:
+            interned_child, child_fingerprint = self._intern(child)
+            interned_children.append(interned_child)
+            child_fingerprints.append(child_fingerprint)
+
+        fingerprint = _digest(
+            node.name,
+            node.is_callable,
+            node.order,
+            node.frequency,
+            child_fingerprints
+        )
+        interned = self._nodes.get(fingerprint)
+        if interned is None:
+            node.children = interned_children
+            interned = self._nodes[fingerprint] = node
+
+        return interned, fingerprint
+
+    def intern_tuple(self, node_tuple):
+        """
+        Interns a tuplified tree (see `rendering.tuplify_tree`).
+
+        Returns
+        -------
+        tuple
+            canonical instance of the tree
+        """
+
+        return self._intern_tuple(node_tuple)[0]
+
+    def _intern_tuple(self, node_tuple):
+        name, is_callable, order, frequency, children = node_tuple
+
+        interned_children, child_fingerprints = [], []
+        for child in children:
+            interned_child, child_fingerprint = self._intern_tuple(child)
+            interned_children.append(interned_child)
+            child_fingerprints.append(child_fingerprint)
+
+        fingerprint = _digest(name, is_callable, order, frequency, child_fingerprints)
+        interned = self._tuples.get(fingerprint)
+        if interned is None:
+            interned = (name, is_callable, order, frequency, tuple(interned_children))
+            self._tuples[fingerprint] = interned
+
+        return interned, fingerprint
@@ -0,0 +1,362 @@
+# Standard Library
+import argparse
+import json
+import subprocess
+import sys
+
+# Local Modules
+from saplings.analysis import analyze_source, SOURCE_EXTENSIONS
+from saplings.aggregation import merge_trees
+from saplings.fingerprints import TreeInterner
+from saplings.rendering import tuplify_tree, build_tree, flatten_tree
+
+COMMIT_SEPARATOR = b"\x01"
+NULL_SHA = "0" * 40
+TRACKED_MODES = {"100644", "100755"} # Regular files (not symlinks or submodules)
+READ_SIZE = 1 << 16
+
+
+#####
+# GIT
+#####
+
+
+def iter_commit_changes(repo, rev="HEAD", first_parent=True):
+    """
+    Streams the commits reachable from `rev`, oldest first, along with the
+    files each one changed. Uses a single `git log` process, so the cost is
+    proportional to the number of changes rather than the size of each
+    commit's tree.
+
+    Parameters
+    ----------
+    repo : str
+        path to a local git repository
+    rev : str
+        revision (or range) to walk
+    first_parent : bool
+        only follows the first parent of merge commits, and diffs merges
+        against it; this gives a linear history of the mainline
+
+    Returns
+    -------
+    generator
+        `(sha, timestamp, changes)` tuples, where `changes` is a list of
+        `(path, blob_sha)` tuples and `blob_sha` is None for deleted files
+    """
+
+    command = [
+        "git", "-C", repo, "log", "--reverse", "--raw", "-z", "--no-abbrev",
+        "--no-renames", "--root", "--format=%x01%H %ct"
+    ]
+    if first_parent:
+        command += ["--first-parent", "--diff-merges=first-parent"]
+    command += [rev, "--"]
+
+    process = subprocess.Popen(command, stdout=subprocess.PIPE)
+    try:
+        buffer = b""
+        while True:
+            data = process.stdout.read(READ_SIZE)
+            buffer += data
+            *chunks, buffer = buffer.split(COMMIT_SEPARATOR)
+            for chunk in chunks:
+                if chunk:
+                    yield _parse_commit_chunk(chunk)
+
+            if not data:
+                break
+
+        if buffer:
+            yield _parse_commit_chunk(buffer)
+    finally:
+        process.stdout.close()
+        if process.wait() and sys.exc_info()[0] is None:
+            raise subprocess.CalledProcessError(process.returncode, command)
+
+
+def _parse_commit_chunk(chunk):
+    header, _, raw_diff = chunk.partition(b"\0")
+    sha, timestamp = header.decode().split()
+
+    changes = []
+    fields = raw_diff.lstrip(b"\n").split(b"\0")
+    for meta, path in zip(fields[::2], fields[1::2]):
+        _, new_mode, _, blob_sha, _ = meta.decode().split()
+        path = path.decode("utf-8", "surrogateescape")
+        if not path.endswith(SOURCE_EXTENSIONS):
+            continue
+
+        if blob_sha == NULL_SHA or new_mode not in TRACKED_MODES:
+            changes.append((path, None))
+        else:
+            changes.append((path, blob_sha))
+
+    return sha, int(timestamp), changes
+
+
+class BlobReader(object):
+    """
+    Reads blobs from a repository through one long-running
+    `git cat-file --batch` process.
+    """
+
+    def __init__(self, repo):
+        self._process = subprocess.Popen(
+            ["git", "-C", repo, "cat-file", "--batch"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE
+        )
+
+    def read(self, blob_sha):
+        self._process.stdin.write(blob_sha.encode() + b"\n")
+        self._process.stdin.flush()
+
+        header = self._process.stdout.readline().split()
+        if header[1] == b"missing":
+            raise KeyError(blob_sha)
+
+        size = int(header[2])
+        content = self._process.stdout.read(size)
+        self._process.stdout.read(1) # Trailing newline
+
+        return content
+
+    def close(self):
+        self._process.stdin.close()
+        self._process.wait()
+
+
+########
+# MINING
+########
+
+
+class HistoryMiner(object):
+    """
+    Walks the history of a git repository and tracks API usage at every
+    commit. Files are identified by their blob hash, so each distinct version
+    of a file is analyzed once no matter how many commits contain it, and each
+    commit only costs as much as the number of files it changed. Results are
+    interned, so subtrees that are the same across versions of a file (or
+    across files) are only stored once.
+    """
+
+    def __init__(self, repo, modules=None, cache=None):
+        """
+        Parameters
+        ----------
+        repo : str
+            path to a local git repository
+        modules : {set, None}
+            names of the root modules to track; all modules are tracked if None
+        cache : {ResultCache, None}
+            on-disk cache for analysis results (shared across runs/repos)
+        """
+
+        self.repo = repo
+        self.modules = modules
+        self.cache = cache
+
+        # Maps blob hashes to (tuplified trees, flattened frequencies)
+        self._blob_results = {}
+        self._interner = TreeInterner()
+
+        # State of the commit that was yielded last
+        self.files = {} # Maps paths to blob hashes
+        self.frequencies = {} # Maps API paths to total frequencies
+
+        self.errors = [] # (blob sha, path, error message) tuples
+
+    def _analyze_blob(self, blob_reader, blob_sha, path):
+        if blob_sha in self._blob_results:
+            return self._blob_results[blob_sha]
+
+        source = blob_reader.read(blob_sha)
+
+        tuplified_trees = None
+        if self.cache:
+            key = self.cache.key(source)
+            tuplified_trees = self.cache.get(key)
+
+        if tuplified_trees is None:
+            try:
+                trees = analyze_source(source, path)
+            except Exception as error:
+                trees = []
+                self.errors.append((blob_sha, path, f"{type(error).__name__}: {error}"))
+
+            tuplified_trees = [tuplify_tree(tree) for tree in trees]
+            if self.cache:
+                self.cache.set(key, tuplified_trees)
+        else:
+            trees = [build_tree(tree) for tree in tuplified_trees]
+
+        if self.modules is not None:
+            trees = [tree for tree in trees if tree.name in self.modules]
+            tuplified_trees = [tree for tree in tuplified_trees if tree[0] in self.modules]
+
+        frequencies = {}
+        for tree in trees:
+            frequencies.update(flatten_tree(tree))
+
+        tuplified_trees = [self._interner.intern_tuple(tree) for tree in tuplified_trees]
+        result = (tuplified_trees, frequencies)
+        self._blob_results[blob_sha] = result
+
+        return result
+
+    def _apply(self, frequencies, delta, sign):
+        for path, frequency in frequencies.items():
+            delta[path] = delta.get(path, 0) + sign * frequency
+
+            total = self.frequencies.get(path, 0) + sign * frequency
+            if total:
+                self.frequencies[path] = total
+            else:
+                del self.frequencies[path]
+
+    def iter_commits(self, rev="HEAD", first_parent=True):
+        """
+        Walks the commits reachable from `rev`, oldest first.
+
+        Parameters
+        ----------
+        rev : str
+            revision (or range) to walk
+        first_parent : bool
+            see `iter_commit_changes`
+
+        Returns
+        -------
+        generator
+            `(sha, timestamp, delta)` tuples, where `delta` maps each API path
+            whose total frequency changed in the commit to the change. After
+            each tuple is yielded, `files`, `frequencies` and `get_trees`
+            reflect that commit.
+        """
+
+        blob_reader = BlobReader(self.repo)
+        try:
+            for sha, timestamp, changes in iter_commit_changes(self.repo, rev, first_parent):
+                delta = {}
+                for path, blob_sha in changes:
+                    old_blob_sha = self.files.pop(path, None)
+                    if old_blob_sha:
+                        _, old_frequencies = self._blob_results[old_blob_sha]
+                        self._apply(old_frequencies, delta, -1)
+
+                    if blob_sha:
+                        _, frequencies = self._analyze_blob(blob_reader, blob_sha, path)
+                        self._apply(frequencies, delta, 1)
+                        self.files[path] = blob_sha
+
+                yield sha, timestamp, {p: d for p, d in delta.items() if d}
+        finally:
+            blob_reader.close()
+
+    def get_trees(self):
+        """
+        Merges the cached results of every file in the current commit into one
+        set of object hierarchies.
+
+        Returns
+        -------
+        list
+            root nodes of the merged object hierarchies
+        """
+
+        forest = []
+        for blob_sha in self.files.values():
+            tuplified_trees, _ = self._blob_results[blob_sha]
+            merge_trees(forest, [build_tree(t) for t in tuplified_trees], copy=False)
+
+        return forest
+
+
+def usage_time_series(repo, rev="HEAD", paths=None, modules=None, cache=None):
+    """
+    Computes how often each API path is used at every commit of a repository.
+    Series are stored as change points rather than one value per commit, so
+    their size is proportional to the number of changes in the history.
+
+    Parameters
+    ----------
+    repo : str
+        path to a local git repository
+    rev : str
+        revision (or range) to walk
+    paths : {set, None}
+        API paths (e.g. "numpy.linalg.svd") to track; all paths if None
+    modules : {set, None}
+        names of the root modules to track; all modules are tracked if None
+    cache : {ResultCache, None}
+        on-disk cache for analysis results
+
+    Returns
+    -------
+    list
+        `(sha, timestamp)` tuples of each commit, oldest first
+    dict
+        maps API paths to lists of `(commit_index, frequency)` change points;
+        a path's frequency at commit `i` is the value of the last change point
+        at or before `i` (zero before its first)
+    """
+
+    miner = HistoryMiner(repo, modules, cache)
+
+    commits, series = [], {}
+    for index, (sha, timestamp, delta) in enumerate(miner.iter_commits(rev)):
+        commits.append((sha, timestamp))
+        for path in delta:
+            if paths is None or path in paths:
+                frequency = miner.frequencies.get(path, 0)
+                series.setdefault(path, []).append((index, frequency))
+
+    return commits, series
+
+
+######
+# MAIN
+######
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m saplings.history",
+        description="Tracks API usage across the commits of a git repository."
+    )
+    parser.add_argument("repo", help="path to a local git repository")
+    parser.add_argument("--rev", default="HEAD",
+                        help="revision or range to walk (default: %(default)s)")
+    parser.add_argument("-m", "--module", action="append", dest="modules",
+                        metavar="NAME", help="only track hierarchies rooted at NAME")
+    parser.add_argument("-p", "--path", action="append", dest="paths",
+                        metavar="API_PATH", help="only report API_PATH (e.g. numpy.linalg.svd)")
+    args = parser.parse_args(argv)
+
+    modules = set(args.modules) if args.modules else None
+    paths = set(args.paths) if args.paths else None
+
+    # One NDJSON line per commit, with the frequencies that changed in it
+    miner = HistoryMiner(args.repo, modules)
+    for sha, timestamp, delta in miner.iter_commits(args.rev):
+        frequencies = {
+            path: miner.frequencies.get(path, 0)
+            for path in delta
+            if paths is None or path in paths
+        }
+        print(json.dumps({
+            "commit": sha,
+            "timestamp": timestamp,
+            "frequencies": frequencies
+        }))
+
+    for blob_sha, path, error in miner.errors:
+        print(f"saplings: {path} ({blob_sha}): {error}", file=sys.stderr)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,519 @@
+# Standard Library
+import ast
+import difflib
+from copy import deepcopy
+
+# Local Modules
+import saplings.utilities as utils
+from saplings.entities import ObjectNode, Function, Class
+from saplings.notebooks import CellSaplings
+
+MISSING = object() # Value of names that aren't bound
+
+
+###########
+# RECORDING
+###########
+
+
+class NamespaceLog(object):
+    """
+    Names read from, and values overwritten in, the module's namespace while
+    the current unit of a module is being analyzed.
+    """
+
+    def __init__(self):
+        self.reads = set()
+        self.undo = {} # Maps names to their values before the unit rebound them
+
+
+class TrackedNamespace(dict):
+    """
+    Namespace that logs every name that's looked up in it. Copies share the
+    log, so lookups made in nested scopes (e.g. the body of a called function,
+    which is processed in a copy of the caller's namespace) are logged too.
+    """
+
+    def __init__(self, items, log):
+        dict.__init__(self, items)
+        self._log = log
+
+    def __contains__(self, name):
+        self._log.reads.add(name)
+        return dict.__contains__(self, name)
+
+    def __getitem__(self, name):
+        self._log.reads.add(name)
+        return dict.__getitem__(self, name)
+
+    def copy(self):
+        return TrackedNamespace(self, self._log)
+
+
+class JournaledNamespace(TrackedNamespace):
+    """
+    Module-level namespace. Also logs the value a name had before the current
+    unit first rebinds or deletes it, so that the namespace can be rolled back
+    to its state before any unit.
+    """
+
+    def _journal(self, name):
+        if name not in self._log.undo:
+            self._log.undo[name] = dict.get(self, name, MISSING)
+
+    def __setitem__(self, name, value):
+        self._journal(name)
+        dict.__setitem__(self, name, value)
+
+    def __delitem__(self, name):
+        self._journal(name)
+        dict.__delitem__(self, name)
+
+
+class ContributionRecorder(object):
+    """
+    Receives the changes `Saplings` makes to the object hierarchies while the
+    current unit of a module is being analyzed (see the `recorder` parameter of
+    `Saplings`).
+    """
+
+    def __init__(self):
+        self.location = None # Unused
+        self.begin()
+
+    def begin(self):
+        self.increments = {} # Maps node ids to [node, count] pairs
+        self.uses = {} # Maps ids of processed functions/classes to themselves
+        self.lookups = {} # Maps ids of counted nodes imports reused to themselves
+
+    def record_increment(self, node):
+        increment = self.increments.get(id(node))
+        if increment:
+            increment[1] += 1
+        else:
+            self.increments[id(node)] = [node, 1]
+
+    def record_use(self, entity):
+        if isinstance(entity, ObjectNode): # Already counted by an earlier unit
+            self.lookups[id(entity)] = entity
+        else:
+            self.uses[id(entity)] = entity
+
+
+class _Record(object):
+    """
+    What analyzing one unit of a module did: either a top-level statement, or
+    the processing of a function that was never called.
+    """
+
+    def __init__(self, node=None):
+        self.node = node
+        self.fingerprint = ast.dump(node) if node else None
+        self.targets = _get_targets(node) if node else set()
+
+        self.increments = {} # See ContributionRecorder
+        self.uses = {} # See ContributionRecorder
+        self.lookups = {} # See ContributionRecorder
+        self.created = {} # Maps ids of nodes no earlier unit counted to themselves
+        self.reads = set() # Names looked up in the module's namespace
+        self.undo = {} # Maps rebound names to their values before the unit
+        self.redo = {} # Maps rebound names to their values after the unit
+        self.functions = set() # Functions to process if they're never called
+        self.entities = [] # User-defined functions/classes bound by the unit
+
+
+def _get_targets(node):
+    """
+    Returns the names (e.g. `x` or `x.attr`) a statement assigns to or
+    deletes, whether or not they were bound.
+    """
+
+    return {
+        utils.stringify_node(n) for n in ast.walk(node)
+        if isinstance(n, (ast.Name, ast.Attribute)) and isinstance(n.ctx, (ast.Store, ast.Del))
+    }
+
+
+def _iter_base_aliases(name):
+    """
+    Yields the aliases a name is a sub-alias of (e.g. `x` and `x.attr` for
+    `x.attr()`), which delete it when they're rebound (see
+    `utilities.delete_sub_aliases`).
+    """
+
+    for index, char in enumerate(name):
+        if char in ".(":
+            yield name[:index]
+
+
+def _restore(namespace, name, value):
+    if value is MISSING:
+        dict.pop(namespace, name, None)
+    else:
+        dict.__setitem__(namespace, name, value)
+
+
+########
+# MODULE
+########
+
+
+class IncrementalModule(object):
+    """
+    Keeps the object hierarchies of a single module up to date as its source
+    is edited. Each top-level statement (e.g. a function or class definition)
+    is analyzed as a separate unit, and the analysis records:
+        1. Which changes to the object hierarchies the unit made
+        2. Which names it read from the module's namespace, and which it rebound
+        3. Which user-defined functions and classes it called or instantiated
+        4. Which nodes its imports counted, or resolved to without counting
+           them since an earlier unit already had
+    When the source changes, only the edited statements are re-analyzed, along
+    with the units that depend on them: those that read a name an edited
+    statement rebound differently (or rebind a name whose sub-aliases it
+    rebound, since they're deleted), that called a function (or used a class)
+    an edited statement defined, or whose imports would now count a module
+    differently (e.g. when the unit that first imported it was removed). The
+    contributions of the units from the first edit on are subtracted from the
+    hierarchies, and added back as each unit is reached, so every unit is
+    analyzed with the hierarchies a fresh analysis would give it.
+
+    Functions that are never called are processed at the end, in the namespace
+    they were defined in (like `Saplings` does), and the results of that are
+    recorded and invalidated the same way. They're processed in definition
+    order, and a function that's called while processing another uncalled
+    function isn't processed on its own, so the result doesn't depend on the
+    order in which a set of functions happens to be iterated.
+
+    NOTE: Dependencies are tracked through namespace names, function/class
+    entities, and object hierarchy nodes. State that's mutated in place, like
+    the attributes of a class instance, isn't tracked; call `reset` to
+    re-analyze everything.
+    """
+
+    def __init__(self, source=None):
+        """
+        Parameters
+        ----------
+        source : {str, bytes, None}
+            initial source code of the module
+        """
+
+        self._log = NamespaceLog()
+        self._recorder = ContributionRecorder()
+        self.reset()
+
+        if source is not None:
+            self.update(source)
+
+    ## Helpers ##
+
+    def _begin(self):
+        self._log.reads, self._log.undo = set(), {}
+        self._recorder.begin()
+
+    def _end(self, record):
+        record.reads, record.undo = self._log.reads, self._log.undo
+        record.increments = self._recorder.increments
+        record.uses = self._recorder.uses
+        record.lookups = self._recorder.lookups
+
+        # The hierarchies only hold the contributions of earlier units (see
+        # `update`)
+        record.created = {
+            node_id: node
+            for node_id, (node, count) in record.increments.items()
+            if node.frequency == count
+        }
+
+    def _subtract(self, record):
+        for node, count in record.increments.values():
+            node.frequency -= count
+
+    def _add(self, record):
+        for node, count in record.increments.values():
+            node.frequency += count
+
+    def _is_import_changed(self, record):
+        """
+        Checks whether analyzing a unit again would count the nodes its imports
+        resolve to differently, given the contributions of the units before it:
+        a node it found already counted no longer is, or a node it was the
+        first to count now is counted by an earlier unit.
+        """
+
+        return any(not node.frequency for node in record.lookups.values()) \
+            or any(node.frequency for node in record.created.values())
+
+    def _register(self, entity, unit):
+        if isinstance(entity, Function):
+            unit.entities.append(entity)
+        elif isinstance(entity, Class):
+            unit.entities.append(entity)
+            for attribute in entity.init_instance_namespace.values():
+                self._register(attribute, unit)
+
+    def _analyze_unit(self, unit):
+        self._begin()
+        saplings = CellSaplings(
+            ast.Module(body=[unit.node], type_ignores=[]),
+            self._object_hierarchies,
+            self._namespace,
+            self._recorder
+        )
+        self._end(unit)
+
+        unit.functions = saplings._functions
+        unit.redo = {n: dict.get(self._namespace, n, MISSING) for n in unit.undo}
+        unit.entities = []
+        for entity in unit.redo.values():
+            self._register(entity, unit)
+
+    def _patch_captured_namespaces(self, unit, changed_names):
+        """
+        Updates the namespaces captured by the functions a unit defined, for
+        units that weren't re-analyzed but were defined after a name changed.
+        """
+
+        for entity in unit.entities:
+            if not isinstance(entity, Function):
+                continue
+
+            for name, value in changed_names.items():
+                _restore(entity.init_namespace, name, value)
+
+    def _process_uncalled_functions(self, changed_names, replaced_ids):
+        """
+        Processes the functions that are never called, reusing the results
+        from the last update for functions whose processing isn't affected by
+        the changes.
+        """
+
+        for function_id, record in list(self._uncalled.items()):
+            is_affected = function_id in replaced_ids \
+                or not record.reads.isdisjoint(changed_names) \
+                or not replaced_ids.isdisjoint(record.uses) \
+                or self._is_import_changed(record)
+            if is_affected:
+                del self._uncalled[function_id]
+            else:
+                self._add(record)
+
+        saplings = CellSaplings(
+            ast.Module(body=[], type_ignores=[]),
+            self._object_hierarchies,
+            self._namespace,
+            self._recorder
+        )
+        while True:
+            records = self._units + list(self._uncalled.values())
+            functions = [
+                function for record in records
+                for function in sorted(record.functions, key=lambda f: f.serial)
+            ]
+            function_ids = {id(function) for function in functions}
+
+            called_ids = set()
+            for unit in self._units:
+                called_ids.update(unit.uses)
+            for function_id, record in self._uncalled.items():
+                called_ids.update(i for i in record.uses if i != function_id)
+
+            # Functions that are called now, or that no longer exist
+            stale_ids = [
+                function_id for function_id in self._uncalled
+                if function_id in called_ids or function_id not in function_ids
+            ]
+            for function_id in stale_ids:
+                self._subtract(self._uncalled.pop(function_id))
+
+            if stale_ids:
+                continue
+
+            uncalled = [
+                function for function in functions
+                if id(function) not in called_ids and id(function) not in self._uncalled
+            ]
+            if not uncalled:
+                break
+
+            for function in uncalled:
+                if id(function) in called_ids: # Called by an earlier function
+                    continue
+
+                record = _Record()
+                self._begin()
+                saplings._process_function(function, function.init_namespace)
+                self._end(record)
+
+                record.functions = saplings._functions
+                saplings._functions = set()
+
+                self._uncalled[id(function)] = record
+                called_ids.update(i for i in record.uses if i != id(function))
+
+    ## Public Methods ##
+
+    def reset(self):
+        """
+        Discards all analysis state.
+        """
+
+        self._object_hierarchies = []
+        self._namespace = JournaledNamespace({}, self._log)
+        self._units = [] # One record per top-level statement
+        self._uncalled = {} # Maps ids of uncalled functions to their records
+
+    def update(self, source):
+        """
+        Re-analyzes the module after its source changed. If the new source
+        doesn't parse, the previous analysis is kept.
+
+        Parameters
+        ----------
+        source : {str, bytes}
+            new source code of the module
+
+        Returns
+        -------
+        list
+            indices of the top-level statements that were (re-)analyzed
+        """
+
+        nodes = ast.parse(source).body
+        fingerprints = [ast.dump(node) for node in nodes]
+
+        # Pairs each old unit with its new statement; unchanged units are
+        # paired with their own statement, and added/removed statements with
+        # None
+        steps = []
+        matcher = difflib.SequenceMatcher(
+            None,
+            [unit.fingerprint for unit in self._units],
+            fingerprints,
+            autojunk=False
+        )
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == "equal":
+                steps.extend((unit, unit.node) for unit in self._units[i1:i2])
+                continue
+
+            old_units, new_nodes = self._units[i1:i2], nodes[j1:j2]
+            for index in range(max(len(old_units), len(new_nodes))):
+                steps.append((
+                    old_units[index] if index < len(old_units) else None,
+                    new_nodes[index] if index < len(new_nodes) else None
+                ))
+
+        first_edit = next(
+            (i for i, (unit, node) in enumerate(steps) if not unit or node is not unit.node),
+            len(steps)
+        )
+        if first_edit == len(steps):
+            return []
+
+        # Rolls the namespace back to its state before the first edit
+        for unit in reversed(self._units[first_edit:]):
+            for name, value in unit.undo.items():
+                _restore(self._namespace, name, value)
+
+        # Takes the contributions of the units from the first edit on, and of
+        # the uncalled functions, out of the hierarchies; each is added back
+        # once it's reached and found unaffected (or analyzed again)
+        for unit in self._units[first_edit:]:
+            self._subtract(unit)
+        for record in self._uncalled.values():
+            self._subtract(record)
+
+        # Call cycles may have changed, so they're found again (see
+        # `recursion.py`), and cached body summaries are dropped (see
+        # `summaries.py`)
+        for unit in self._units:
+            for entity in unit.entities:
+                if isinstance(entity, Function):
+                    entity.is_recursive, entity.call_cycle = None, None
+                    entity.summaries = {}
+
+        changed_names = {} # Names whose current values differ from before
+        old_values = {} # Maps changed names to their values before the edit
+        all_changed_names = set()
+        replaced_ids = set() # Functions/classes defined by re-analyzed units
+
+        units, reanalyzed = self._units[:first_edit], []
+        for unit, node in steps[first_edit:]:
+            if unit and node is unit.node: # Unchanged statement
+                is_affected = not unit.reads.isdisjoint(changed_names) \
+                    or not replaced_ids.isdisjoint(unit.uses) \
+                    or self._is_import_changed(unit) \
+                    or any(
+                        alias in unit.undo or alias in unit.targets
+                        for name in changed_names
+                        for alias in _iter_base_aliases(name)
+                    )
+                if not is_affected:
+                    unit.undo = {
+                        name: dict.get(self._namespace, name, MISSING)
+                        for name in unit.undo
+                    }
+                    for name, value in unit.redo.items():
+                        _restore(self._namespace, name, value)
+                        changed_names.pop(name, None)
+                        old_values.pop(name, None)
+
+                    self._patch_captured_namespaces(unit, changed_names)
+                    self._add(unit)
+                    units.append(unit)
+                    continue
+
+            old_redo = {}
+            if unit:
+                replaced_ids.update(id(entity) for entity in unit.entities)
+                old_redo = unit.redo
+
+            new_redo = {}
+            if node:
+                new_unit = _Record(node)
+                self._analyze_unit(new_unit)
+                reanalyzed.append(len(units))
+                units.append(new_unit)
+                new_redo, undo = new_unit.redo, new_unit.undo
+
+            for name in old_redo.keys() | new_redo.keys():
+                if name in old_redo:
+                    old_value = old_redo[name]
+                elif name in changed_names:
+                    old_value = old_values[name]
+                else: # Bound the same before the unit, before and after the edit
+                    old_value = undo[name]
+
+                value = dict.get(self._namespace, name, MISSING)
+                if value is not old_value:
+                    changed_names[name], old_values[name] = value, old_value
+                    all_changed_names.add(name)
+                else:
+                    changed_names.pop(name, None)
+                    old_values.pop(name, None)
+
+        self._units = units
+        self._process_uncalled_functions(all_changed_names, replaced_ids)
+
+        return reanalyzed
+
+    def get_trees(self):
+        """
+        Returns the current object hierarchies of the module. These are copies,
+        so they can be modified freely.
+
+        Returns
+        -------
+        list
+            root nodes (ObjectNodes) of the module's object hierarchies
+        """
+
+        trees = []
+        for root_node in deepcopy(self._object_hierarchies):
+            if utils.prune_unused_nodes(root_node):
+                utils.consolidate_call_nodes(root_node)
+                trees.append(root_node)
+
+        return trees
@@ -0,0 +1,165 @@
+# Standard Library
+import bisect
+
+# Local Modules
+from saplings.rendering import iter_tree_paths
+from saplings.patterns import Pattern
+
+
+def parse_path(path):
+    """
+    Splits a path in the format of `rendering.iter_tree_paths` (e.g.
+    `torch.nn.Linear().forward`) into the `(name, order)` keys of the nodes
+    along it.
+
+    Parameters
+    ----------
+    path : str
+        dotted path, where a node that's an nth-order child of its parent is
+        preceded by n calls
+
+    Returns
+    -------
+    list
+        `(name, order)` tuples, starting with the root (whose order is -1)
+    """
+
+    keys, order = [], -1
+    for segment in path.split('.'):
+        name = segment.rstrip("()")
+        if not name or (len(segment) - len(name)) % 2:
+            raise ValueError(f"invalid path: {path!r}")
+
+        keys.append((name, order))
+        order = (len(segment) - len(name)) // 2
+
+    if order: # Trailing calls with nothing after them
+        raise ValueError(f"invalid path: {path!r}")
+
+    return keys
+
+
+class TreeIndex(object):
+    """
+    Index over a set of consolidated object hierarchies, built once so that
+    repeated queries don't re-scan the trees. Supports:
+        1. Looking up the node at a path in O(depth)
+        2. Enumerating the paths that start with a prefix
+        3. Finding every node with a given name
+        4. Matching glob-style patterns (see `patterns.Pattern`)
+    The index isn't updated when the trees change; build a new one instead.
+    """
+
+    def __init__(self, forest):
+        """
+        Parameters
+        ----------
+        forest : list
+            root nodes of consolidated object hierarchies (e.g. the output of
+            `Saplings.get_trees`)
+        """
+
+        self.forest = forest
+
+        self._roots = {}
+        self._children = {} # Maps node ids to {(name, order): child}
+        self._parents = {} # Maps node ids to parent nodes (None for roots)
+        self._nodes_by_name = {} # Maps names to [(path, node)]
+        self._paths, self._nodes = [], [] # Sorted by path
+
+        indexed_paths = []
+        for root in forest:
+            self._roots[root.name] = root
+            self._parents[id(root)] = None
+            for path, node in iter_tree_paths(root):
+                self._children[id(node)] = {(c.name, c.order): c for c in node.children}
+                for child in node.children:
+                    self._parents[id(child)] = node
+                self._nodes_by_name.setdefault(node.name, []).append((path, node))
+                indexed_paths.append((path, node))
+
+        indexed_paths.sort(key=lambda item: item[0])
+        for path, node in indexed_paths:
+            self._paths.append(path)
+            self._nodes.append(node)
+
+    def __len__(self):
+        return len(self._paths)
+
+    def __contains__(self, path):
+        return self.lookup(path) is not None
+
+    @property
+    def roots(self):
+        return self._roots
+
+    def get_children(self, node):
+        """
+        Returns the children of an indexed node, keyed by (name, order).
+        """
+
+        return self._children[id(node)]
+
+    def get_parent(self, node):
+        return self._parents[id(node)]
+
+    def lookup(self, path):
+        """
+        Returns the node at a path (e.g. `torch.nn.Linear().forward`), or None
+        if there's no such node. A path ending in a call (e.g.
+        `torch.nn.Linear()`) only matches a callable node.
+        """
+
+        stripped_path = path.rstrip("()")
+        must_be_callable = stripped_path != path
+
+        (root_name, _), *keys = parse_path(stripped_path)
+
+        node = self._roots.get(root_name)
+        for key in keys:
+            if not node:
+                break
+
+            node = self._children[id(node)].get(key)
+
+        if node and must_be_callable and not node.is_callable:
+            return None
+
+        return node
+
+    def iter_prefix(self, prefix):
+        """
+        Enumerates the indexed paths that start with a string prefix, in sorted
+        order. A full path as the prefix gives the node's whole subtree (plus
+        any siblings whose names extend it, e.g. `numpy.array` also matches
+        `numpy.array_split`; add a trailing '.' or '(' to avoid that).
+
+        Returns
+        -------
+        generator
+            `(path, node)` tuples
+        """
+
+        index = bisect.bisect_left(self._paths, prefix)
+        while index < len(self._paths) and self._paths[index].startswith(prefix):
+            yield self._paths[index], self._nodes[index]
+            index += 1
+
+    def find(self, name):
+        """
+        Returns every `(path, node)` whose node is named `name` (e.g. all the
+        `forward` methods across the hierarchies).
+        """
+
+        return list(self._nodes_by_name.get(name, []))
+
+    def query(self, pattern):
+        """
+        Returns every `(path, node)` that matches a glob-style pattern (e.g.
+        `pandas.DataFrame().**.__index__`); see `patterns.Pattern`.
+        """
+
+        if not isinstance(pattern, Pattern):
+            pattern = Pattern(pattern)
+
+        return pattern.search(self)
@@ -0,0 +1,211 @@
+# Standard Library
+import argparse
+import json
+import sys
+from itertools import combinations
+from math import comb
+
+# Local Modules
+from saplings.analysis import iter_binary_results
+from saplings.rendering import iter_tree_paths
+
+DEFAULT_MAX_SIZE = 3
+
+
+def _iter_tuplified_paths(node_tuple, parent_path=None):
+    name, _, order, _, children = node_tuple
+    if parent_path is None:
+        path = name
+    else:
+        path = parent_path + "()" * order + '.' + name
+
+    yield path
+    for child in children:
+        yield from _iter_tuplified_paths(child, path)
+
+
+def get_path_set(trees):
+    """
+    Returns the set of API paths used in one file's object hierarchies.
+
+    Parameters
+    ----------
+    trees : list
+        root nodes of the hierarchies, either ObjectNodes or tuplified trees
+    """
+
+    paths = set()
+    for tree in trees:
+        if isinstance(tree, tuple):
+            paths.update(_iter_tuplified_paths(tree))
+        else:
+            paths.update(path for path, _ in iter_tree_paths(tree))
+
+    return paths
+
+
+def _iter_ancestor_paths(path):
+    for index, char in enumerate(path):
+        if char == '.':
+            yield path[:index].rstrip("()")
+
+
+def _count_candidates(load_forests, item_ids, candidates, size):
+    """
+    Counts, in one pass over the files, how many contain each candidate.
+    """
+
+    counts = dict.fromkeys(candidates, 0)
+    for trees in load_forests():
+        items = sorted(
+            item_ids[path] for path in get_path_set(trees)
+            if path in item_ids
+        )
+        if len(items) < size:
+            continue
+
+        # Enumerates the file's own itemsets when there are fewer of them than
+        # candidates; checks every candidate otherwise
+        if comb(len(items), size) <= len(counts):
+            for itemset in combinations(items, size):
+                if itemset in counts:
+                    counts[itemset] += 1
+        else:
+            item_set = set(items)
+            for candidate in counts:
+                if item_set.issuperset(candidate):
+                    counts[candidate] += 1
+
+    return counts
+
+
+def _generate_candidates(frequent_itemsets, ancestor_ids):
+    """
+    Apriori candidate generation: joins pairs of frequent k-itemsets that
+    share their first k - 1 items, and prunes candidates that have an
+    infrequent k-subset. Pairs of paths where one is an ancestor of the other
+    are skipped, since a file that uses a path always uses its ancestors.
+    """
+
+    candidates = []
+    prefixes = {}
+    for itemset in sorted(frequent_itemsets):
+        prefixes.setdefault(itemset[:-1], []).append(itemset[-1])
+
+    for prefix, last_items in prefixes.items():
+        for first, second in combinations(last_items, 2):
+            is_lineage = first in ancestor_ids[second] or second in ancestor_ids[first]
+            if not prefix and is_lineage:
+                continue
+
+            candidate = prefix + (first, second)
+            is_prunable = any(
+                candidate[:i] + candidate[i + 1:] not in frequent_itemsets
+                for i in range(len(candidate) - 2)
+            )
+            if not is_prunable:
+                candidates.append(candidate)
+
+    return candidates
+
+
+def mine_frequent_pathsets(load_forests, min_support, max_size=DEFAULT_MAX_SIZE):
+    """
+    Finds sets of API paths that are used together in many files, with the
+    Apriori algorithm. Each level is one streaming pass over the files, so
+    only the counts of frequent paths and of the current candidates are kept
+    in memory, never the files themselves.
+
+    Parameters
+    ----------
+    load_forests : function
+        called once per pass; returns an iterable of the object hierarchies
+        of each file (lists of ObjectNodes or tuplified trees)
+    min_support : {int, float}
+        minimum number of files a set must appear in; a float below 1 is a
+        fraction of the number of files
+    max_size : int
+        largest set size to mine
+
+    Returns
+    -------
+    list
+        `(paths, support)` tuples, where `paths` is a sorted tuple of paths,
+        sorted by descending support
+    """
+
+    # First pass: single paths
+    num_files, path_counts = 0, {}
+    for trees in load_forests():
+        num_files += 1
+        for path in get_path_set(trees):
+            path_counts[path] = path_counts.get(path, 0) + 1
+
+    if isinstance(min_support, float) and min_support < 1:
+        min_support = max(1, int(min_support * num_files + 0.5))
+
+    frequent_paths = sorted(p for p, c in path_counts.items() if c >= min_support)
+    item_ids = {path: i for i, path in enumerate(frequent_paths)}
+    ancestor_ids = [
+        {item_ids[a] for a in _iter_ancestor_paths(path) if a in item_ids}
+        for path in frequent_paths
+    ]
+
+    results = [((path,), path_counts[path]) for path in frequent_paths]
+    del path_counts
+
+    frequent_itemsets = {(i,) for i in range(len(frequent_paths))}
+    for size in range(2, max_size + 1):
+        candidates = _generate_candidates(frequent_itemsets, ancestor_ids)
+        if not candidates:
+            break
+
+        counts = _count_candidates(load_forests, item_ids, candidates, size)
+        frequent_itemsets = {c for c, count in counts.items() if count >= min_support}
+        results.extend(
+            (tuple(frequent_paths[i] for i in itemset), counts[itemset])
+            for itemset in frequent_itemsets
+        )
+
+    results.sort(key=lambda result: (-result[1], len(result[0]), result[0]))
+    return results
+
+
+######
+# MAIN
+######
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m saplings.mining",
+        description="Finds sets of API paths that are frequently used together, "
+                    "from results saved with `saplings -f binary`."
+    )
+    parser.add_argument("results", nargs='+', metavar="FILE",
+                        help="binary results files")
+    parser.add_argument("-s", "--min-support", type=float, default=0.05,
+                        help="minimum number of files a set must appear in, or a "
+                             "fraction of the files if below 1 (default: %(default)s)")
+    parser.add_argument("--max-size", type=int, default=DEFAULT_MAX_SIZE,
+                        help="largest set size to mine (default: %(default)s)")
+    parser.add_argument("--min-size", type=int, default=1,
+                        help="smallest set size to print (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    def load_forests():
+        for results_path in args.results:
+            with open(results_path, "rb") as stream:
+                for _, tuplified_trees in iter_binary_results(stream):
+                    yield tuplified_trees
+
+    min_support = args.min_support if args.min_support < 1 else int(args.min_support)
+    for paths, support in mine_frequent_pathsets(load_forests, min_support, args.max_size):
+        if len(paths) >= args.min_size:
+            print(json.dumps({"paths": paths, "support": support}))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,338 @@
+# Standard Library
+import ast
+import json
+import re
+from copy import deepcopy
+
+# Local Modules
+from saplings.saplings import Saplings
+
+# Line magics (%timeit x), shell escapes (!ls), magic/shell assignments
+# (files = !ls), and help queries (np.array?, ??np.load, np.*load*?). Help
+# queries must be a bare (dotted) name, so that lines in strings that end in
+# a question mark are kept. Each match is replaced with `pass` at the same
+# indentation so that enclosing blocks stay valid.
+MAGIC_LINE_REGEX = re.compile(
+    r"^([ \t]*)(?:[%!]|[\w.]+[ \t]*=[ \t]*[%!]"
+    r"|\?{0,2}[\w.*]+\?{1,2}[ \t]*$|\?{1,2}[\w.*]+[ \t]*$).*$",
+    re.MULTILINE
+)
+
+# Line magics that wrap a Python statement (%time df = pd.read_csv(...)); the
+# magic and its options are stripped and the statement is kept
+TIMING_MAGIC_REGEX = re.compile(
+    r"^([ \t]*)%(?:time|timeit|prun)[ \t]+(?:-\w+[ \t]+(?:\d+[ \t]+)?)*",
+    re.MULTILINE
+)
+
+# Cell magics whose body is still Python (the first line is stripped); the
+# bodies of all other cell magics (%%bash, %%html, ...) are skipped
+PYTHON_CELL_MAGICS = {"time", "timeit", "capture", "prun", "debug"}
+
+
+def _scan_line(line, depth, quote):
+    """
+    Scans a physical line that starts inside `depth` open brackets and the
+    string opened by `quote` (None if it isn't in one), and returns the state
+    at the end of the line.
+
+    Returns
+    -------
+    int
+        number of brackets still open
+    {str, None}
+        quote of the string that's still open, if any
+    bool
+        whether the next line continues the same logical line
+    """
+
+    index, escaped_newline = 0, False
+    while index < len(line):
+        char = line[index]
+        if quote:
+            if char == '\\':
+                escaped_newline = line[index + 1:] in ('\n', "\r\n", '')
+                index += 2
+                continue
+            elif line.startswith(quote, index):
+                index += len(quote)
+                quote = None
+                continue
+        elif char == '#':
+            break
+        elif char == '\\':
+            escaped_newline = line[index + 1:] in ('\n', "\r\n", '')
+        elif char in "\"'":
+            quote = line[index:index + 3] if line[index:index + 3] in ('"""', "'''") else char
+            index += len(quote)
+            continue
+        elif char in "([{":
+            depth += 1
+        elif char in ")]}":
+            depth = max(depth - 1, 0)
+
+        index += 1
+
+    # Single-quoted strings can't span lines unless the newline is escaped
+    if quote and len(quote) == 1 and not escaped_newline:
+        quote = None
+
+    return depth, quote, bool(depth or quote or escaped_newline)
+
+
+def strip_magics(source):
+    """
+    Removes IPython syntax from a code cell so it can be parsed by `ast`.
+    Only lines that start a logical line are stripped; lines that continue
+    one (inside brackets or strings, or after a backslash) are kept as is.
+
+    Parameters
+    ----------
+    source : str
+        source of the code cell
+
+    Returns
+    -------
+    {str, None}
+        Python source; None if the cell isn't Python (e.g. a %%bash cell)
+    """
+
+    if source.lstrip().startswith("%%"):
+        magic_line, _, source = source.lstrip().partition('\n')
+        magic_name = (magic_line[2:].split() or [''])[0]
+        if magic_name not in PYTHON_CELL_MAGICS:
+            return None
+
+    # Most cells have no IPython syntax at all, so skip the regex when none of
+    # its trigger characters appear
+    if '%' not in source and '!' not in source and '?' not in source:
+        return source
+
+    lines, depth, quote, is_continuation = [], 0, None, False
+    for line in source.splitlines(keepends=True):
+        if not is_continuation:
+            line = TIMING_MAGIC_REGEX.sub(r"\1", line)
+            stripped_line = MAGIC_LINE_REGEX.sub(r"\1pass", line)
+            if stripped_line != line:
+                # Magics are never continued, whatever they contain
+                lines.append(stripped_line)
+                continue
+
+        depth, quote, is_continuation = _scan_line(line, depth, quote)
+        lines.append(line)
+
+    return ''.join(lines)
+
+
+def load_notebook_cells(notebook):
+    """
+    Extracts the code cells of a notebook in execution order. If every code
+    cell has an execution count, cells are sorted by it; otherwise they're
+    kept in document order.
+
+    Parameters
+    ----------
+    notebook : {str, bytes, dict}
+        contents of an .ipynb file, either raw or already decoded
+
+    Returns
+    -------
+    list
+        sources of the code cells (strings)
+    """
+
+    if not isinstance(notebook, dict):
+        notebook = json.loads(notebook)
+
+    if "worksheets" in notebook: # nbformat 3
+        cells = [c for ws in notebook["worksheets"] for c in ws.get("cells", [])]
+    else:
+        cells = notebook.get("cells", [])
+
+    code_cells = []
+    for cell in cells:
+        if cell.get("cell_type") != "code":
+            continue
+
+        source = cell.get("source", cell.get("input", ""))
+        if isinstance(source, list):
+            source = ''.join(source)
+
+        code_cells.append((cell.get("execution_count"), source))
+
+    if code_cells and all(count is not None for count, _ in code_cells):
+        code_cells.sort(key=lambda cell: cell[0])
+
+    return [source for _, source in code_cells]
+
+
+class CellSaplings(Saplings):
+    """
+    Saplings for a single notebook cell. Functions that are never called in
+    the cell aren't processed at the end of it, since a later cell may call
+    them; `NotebookAnalyzer` processes them once all cells are done.
+    """
+
+    def _process_uncalled_functions(self):
+        pass
+
+
+def analyze_cell(source, state):
+    """
+    Analyzes a code cell, continuing from (and updating) the given state.
+
+    Parameters
+    ----------
+    source : str
+        source of the code cell
+    state : tuple
+        `(object_hierarchies, namespace, functions)` left by the previous cells
+
+    Returns
+    -------
+    {str, None}
+        reason the cell couldn't be analyzed, if any
+    """
+
+    object_hierarchies, namespace, functions = state
+
+    source = strip_magics(source)
+    if source is None:
+        return None
+
+    try:
+        tree = ast.parse(source)
+    except SyntaxError as error:
+        return f"SyntaxError: {error}"
+
+    cell_saplings = CellSaplings(tree, object_hierarchies, namespace)
+    functions |= cell_saplings._functions
+
+    return None
+
+
+def finalize_state(state):
+    """
+    Processes the functions that were never called, in the state of the
+    namespace in which they were defined (like `Saplings` does at the end of a
+    regular program), and returns the resulting object hierarchies. `state` is
+    modified in place.
+    """
+
+    object_hierarchies, namespace, functions = state
+
+    saplings = CellSaplings(ast.Module(body=[]), object_hierarchies, namespace)
+    saplings._functions = functions
+    Saplings._process_uncalled_functions(saplings)
+
+    return saplings.get_trees()
+
+
+class NotebookAnalyzer(object):
+    """
+    Analyzes the code cells of a notebook in one shared namespace, in order.
+    The analysis state is checkpointed after every cell, so editing cell `k`
+    only re-analyzes cells `k` through `n`.
+    """
+
+    def __init__(self, cells=[]):
+        """
+        Parameters
+        ----------
+        cells : list
+            sources of the code cells, in execution order
+        """
+
+        self._cells = []
+
+        # Maps each cell to the reason it couldn't be analyzed, if any
+        self.errors = {}
+
+        # _checkpoints[i] is the analysis state before cell i is executed: a
+        # tuple of (object hierarchies, namespace, functions defined so far)
+        self._checkpoints = [([], {}, set())]
+
+        for source in cells:
+            self.append_cell(source)
+
+    def __len__(self):
+        return len(self._cells)
+
+    ## Helpers ##
+
+    def _reanalyze_from(self, index):
+        """
+        Restores the checkpoint taken before cell `index` and re-analyzes
+        every cell from there on.
+        """
+
+        del self._checkpoints[index + 1:]
+        for key in [k for k in self.errors if k >= index]:
+            del self.errors[key]
+
+        state = deepcopy(self._checkpoints[index])
+        for cell_index in range(index, len(self._cells)):
+            error = analyze_cell(self._cells[cell_index], state)
+            if error:
+                self.errors[cell_index] = error
+
+            self._checkpoints.append(deepcopy(state))
+
+    ## Public Methods ##
+
+    def append_cell(self, source):
+        self._cells.append(source)
+        self._reanalyze_from(len(self._cells) - 1)
+
+    def update_cell(self, index, source):
+        self._cells[index] = source
+        self._reanalyze_from(index)
+
+    def insert_cell(self, index, source):
+        self._cells.insert(index, source)
+        self._reanalyze_from(index)
+
+    def delete_cell(self, index):
+        del self._cells[index]
+        self._reanalyze_from(index)
+
+    def get_trees(self):
+        """
+        Returns the object hierarchies of the notebook after its last cell (see
+        `finalize_state`). The checkpoints themselves aren't modified.
+
+        Returns
+        -------
+        list
+            root nodes (ObjectNodes) of the notebook's object hierarchies
+        """
+
+        return finalize_state(deepcopy(self._checkpoints[-1]))
+
+
+def analyze_notebook(notebook):
+    """
+    Extracts the object hierarchies of a notebook.
+
+    Parameters
+    ----------
+    notebook : {str, bytes, dict}
+        contents of an .ipynb file, either raw or already decoded
+
+    Returns
+    -------
+    list
+        root nodes (ObjectNodes) of the notebook's object hierarchies
+    list
+        `(cell_index, error_message)` tuples for code cells that couldn't be
+        analyzed (indices are in execution order)
+    """
+
+    # No checkpoints are needed for a one-off analysis
+    state, errors = ([], {}, set()), []
+    for index, source in enumerate(load_notebook_cells(notebook)):
+        error = analyze_cell(source, state)
+        if error:
+            errors.append((index, error))
+
+    return finalize_state(state), errors
@@ -0,0 +1,309 @@
+# Standard Library
+import operator
+import re
+from fnmatch import translate
+
+SEGMENT_REGEX = re.compile(r"(\*\*|[^.\[\]()]+)(?:\[([^\]]*)\])?((?:\(\))*)")
+CALLABLE_PREDICATE_REGEX = re.compile(r"^\s*(!?)callable\s*$")
+COMPARISON_PREDICATE_REGEX = re.compile(
+    r"^\s*(order|freq|frequency)\s*(==|=|!=|<=|>=|<|>)\s*(-?\d+)\s*$"
+)
+OPERATORS = {
+    "=": operator.eq,
+    "==": operator.eq,
+    "!=": operator.ne,
+    '<': operator.lt,
+    "<=": operator.le,
+    '>': operator.gt,
+    ">=": operator.ge
+}
+
+
+class _Segment(object):
+    """
+    One dot-separated segment of a pattern.
+    """
+
+    def __init__(self, name, order, predicates):
+        self.is_descendants = name == "**"
+        self.is_literal = '*' not in name and '?' not in name
+        self.name = name
+        self._name_regex = re.compile(translate(name))
+
+        # Order the matching node must have, set by the calls that precede the
+        # segment; None if any order matches
+        self.order = order
+
+        self.predicates = predicates # (attribute, operator, value) tuples
+
+    def matches(self, node):
+        if self.is_literal:
+            if node.name != self.name:
+                return False
+        elif not self._name_regex.match(node.name):
+            return False
+
+        for attribute, compare, value in self.predicates:
+            if not compare(getattr(node, attribute), value):
+                return False
+
+        return True
+
+
+def _parse_predicates(text, pattern):
+    predicates, has_order = [], False
+    for predicate in text.split(','):
+        callable_match = CALLABLE_PREDICATE_REGEX.match(predicate)
+        if callable_match:
+            predicates.append(("is_callable", operator.eq, not callable_match.group(1)))
+            continue
+
+        comparison_match = COMPARISON_PREDICATE_REGEX.match(predicate)
+        if not comparison_match:
+            raise ValueError(f"invalid predicate {predicate.strip()!r} in pattern {pattern!r}")
+
+        attribute, op, value = comparison_match.groups()
+        attribute = "order" if attribute == "order" else "frequency"
+        has_order = has_order or attribute == "order"
+        predicates.append((attribute, OPERATORS[op], int(value)))
+
+    return predicates, has_order
+
+
+def _combine_orders(order, other_order):
+    if order is None:
+        return other_order
+    elif other_order is None:
+        return order
+
+    return order + other_order
+
+
+class Pattern(object):
+    """
+    Glob-style pattern over the paths of object hierarchies. Patterns use the
+    same format as paths (see `rendering.iter_tree_paths`), with extensions:
+        1. `*` and `?` match any characters in a name (e.g. `numpy.lin*`)
+        2. `**` matches any number of nodes, including none, at any order
+           (e.g. `pandas.DataFrame().**.__index__`)
+        3. Predicates in brackets after a name, separated by commas:
+           `callable`, `!callable`, `order<op>N`, and `freq<op>N`, where <op>
+           is one of =, !=, <, <=, >, >= (e.g. `numpy.**.*[callable,order>=2]`)
+    A name's order is set by the calls before it, like in paths (`a().b`
+    matches order-1 children of `a`), unless it has an order predicate; names
+    right after a `**` match any order (`a.**.b` matches `a().x().b`) unless
+    the `**` is followed by calls. A pattern that ends in a call only matches
+    callable nodes.
+
+    Patterns are evaluated against a `TreeIndex`. Subtrees that can't contain
+    a match aren't visited: literal names are looked up directly instead of
+    scanning children, and when a `**` is followed by a literal name, the
+    search starts from the nodes with that name (found through the index)
+    rather than from the roots.
+    """
+
+    def __init__(self, pattern):
+        """
+        Parameters
+        ----------
+        pattern : str
+            the pattern
+
+        Raises
+        ------
+        ValueError
+            if the pattern is malformed
+        """
+
+        self.pattern = pattern
+        self._segments = []
+
+        position, num_calls = 0, None # Roots have no order constraint
+        while True:
+            match = SEGMENT_REGEX.match(pattern, position)
+            if not match:
+                raise ValueError(f"invalid pattern: {pattern!r}")
+
+            name, predicate_text, calls = match.groups()
+            predicates, has_order = [], False
+            if predicate_text is not None:
+                if name == "**":
+                    raise ValueError(f"'**' can't have predicates: {pattern!r}")
+
+                predicates, has_order = _parse_predicates(predicate_text, pattern)
+
+            # Names right after a `**`, and `**`s themselves, match any order
+            # unless calls are given
+            is_after_descendants = self._segments and self._segments[-1].is_descendants
+            if has_order or (not num_calls and (name == "**" or is_after_descendants)):
+                order = None
+            else:
+                order = num_calls
+
+            self._segments.append(_Segment(name, order, predicates))
+            num_calls = len(calls) // 2
+
+            position = match.end()
+            if position == len(pattern):
+                break
+            elif pattern[position] != '.':
+                raise ValueError(f"invalid pattern: {pattern!r}")
+
+            position += 1
+
+        if num_calls: # Trailing call
+            self._segments[-1].predicates.append(("is_callable", operator.eq, True))
+
+        # _closures[i] is the set of states in which the next node can be
+        # consumed once segment i is next (see _closure)
+        self._closures = [
+            self._closure(i, s.order) for i, s in enumerate(self._segments)
+        ] + [(frozenset(), True)]
+        self._initial_states = self._closure(0, None)[0]
+
+        # Literal name that follows a `**`, used to start the search from the
+        # nodes with that name
+        self._anchor = None
+        for index, segment in enumerate(self._segments[:-1]):
+            next_segment = self._segments[index + 1]
+            if segment.is_descendants and not next_segment.is_descendants \
+                    and next_segment.is_literal:
+                self._anchor = next_segment.name
+                break
+
+    def __repr__(self):
+        return f"Pattern({self.pattern!r})"
+
+    ## Helpers ##
+
+    def _closure(self, index, order):
+        """
+        States are (segment index, required order) tuples. Since `**` can match
+        no nodes, the segments after it can match the next node too.
+
+        Returns
+        -------
+        frozenset
+            states
+        bool
+            True if the pattern can end here (i.e. the last consumed node is a
+            match)
+        """
+
+        states = set()
+        while index < len(self._segments):
+            segment = self._segments[index]
+            states.add((index, order))
+            if not segment.is_descendants:
+                return frozenset(states), False
+
+            index += 1
+            if index < len(self._segments):
+                order = _combine_orders(order, self._segments[index].order)
+
+        return frozenset(states), True
+
+    def _step(self, node, states):
+        """
+        Consumes a node. Returns the states for its children, and whether the
+        node is a match.
+        """
+
+        next_states, is_match = set(), False
+        for index, order in states:
+            if order is not None and node.order != order:
+                continue
+
+            segment = self._segments[index]
+            if segment.is_descendants:
+                next_states.add((index, None))
+            elif not segment.matches(node):
+                continue
+
+            closure, accepts = self._closures[index + 1]
+            next_states |= closure
+            is_match = is_match or accepts
+
+        return frozenset(next_states), is_match
+
+    def _select(self, nodes_by_key, states):
+        """
+        Picks the nodes (out of children or roots) that can match one of the
+        states, without scanning them when every state is a literal name.
+        """
+
+        keys = []
+        for index, order in states:
+            segment = self._segments[index]
+            if segment.is_descendants or not segment.is_literal:
+                return list(nodes_by_key.values())
+
+            keys.append((segment.name, order))
+
+        selected = []
+        for name, order in keys:
+            if order is None:
+                selected.extend(
+                    n for (n_name, _), n in nodes_by_key.items() if n_name == name
+                )
+            elif (name, order) in nodes_by_key:
+                selected.append(nodes_by_key[(name, order)])
+
+        return selected
+
+    ## Public Methods ##
+
+    def search(self, index):
+        """
+        Finds the nodes that match the pattern.
+
+        Parameters
+        ----------
+        index : TreeIndex
+            index over the object hierarchies to search
+
+        Returns
+        -------
+        list
+            `(path, node)` tuples, sorted by path
+        """
+
+        stack = []
+        if self._anchor is None:
+            roots = {(name, root.order): root for name, root in index.roots.items()}
+            for root in self._select(roots, self._initial_states):
+                stack.append((root, root.name, self._initial_states))
+        else:
+            for path, node in index.find(self._anchor):
+                ancestors = []
+                parent = index.get_parent(node)
+                while parent:
+                    ancestors.append(parent)
+                    parent = index.get_parent(parent)
+
+                states = self._initial_states
+                for ancestor in reversed(ancestors):
+                    states, _ = self._step(ancestor, states)
+                    if not states:
+                        break
+
+                if states:
+                    stack.append((node, path, states))
+
+        results, matched_ids = [], set()
+        while stack:
+            node, path, states = stack.pop()
+            next_states, is_match = self._step(node, states)
+            if is_match and id(node) not in matched_ids:
+                matched_ids.add(id(node))
+                results.append((path, node))
+
+            if not next_states:
+                continue
+
+            for child in self._select(index.get_children(node), next_states):
+                child_path = path + "()" * child.order + '.' + child.name
+                stack.append((child, child_path, next_states))
+
+        results.sort(key=lambda result: result[0])
+        return results
@@ -0,0 +1,484 @@
+# Standard Library
+import ast
+import os
+from copy import copy, deepcopy
+
+# Local Modules
+import saplings.utilities as utils
+from saplings.saplings import Saplings
+from saplings.entities import ObjectNode, Function, Class, ClassInstance, Container
+
+
+class _Translation(object):
+    """
+    Maps the entities of a first-party module into a module that imports it.
+    Object hierarchy nodes are mapped to the matching nodes of the importing
+    module's hierarchies (which are created, with zero frequency, if they don't
+    exist), so uses through imported functions count towards the importing
+    module. Everything is mapped lazily, when an imported entity is bound or
+    an imported function is called, so the cost of an import is proportional
+    to what's used rather than to the size of the imported module.
+    """
+
+    def __init__(self, summary, object_hierarchies):
+        self._summary = summary
+        self._object_hierarchies = object_hierarchies
+        self._memo = {} # Maps ids of the module's entities to their mappings
+
+    ## Helpers ##
+
+    def _translate_node(self, node):
+        node_copy = ObjectNode(node.name, order=node.order)
+        node_copy.frequency = 0
+
+        try:
+            parent = self._summary.get_parent(node)
+        except KeyError: # Not in any hierarchy
+            return node_copy
+
+        if parent is None:
+            for root in self._object_hierarchies:
+                if root.name == node.name:
+                    return root
+
+            siblings = self._object_hierarchies
+        else:
+            siblings = self.translate(parent).children
+            for sibling in siblings:
+                if sibling.name == node.name:
+                    return sibling
+
+        siblings.append(node_copy)
+
+        return node_copy
+
+    ## Public Methods ##
+
+    def translate(self, entity):
+        entity_copy = self._memo.get(id(entity))
+        if entity_copy is not None:
+            return entity_copy
+
+        if isinstance(entity, ObjectNode):
+            entity_copy = self._translate_node(entity)
+        elif isinstance(entity, Function):
+            # Imported functions are processed in the namespace of their own
+            # module, like closures, rather than in the namespace of the caller
+            entity_copy = copy(entity)
+            entity_copy.is_closure = True
+            if entity.translation: # Imported by the module in turn
+                entity_copy.translation = _TranslationChain(entity.translation, self)
+            else:
+                entity_copy.translation = self
+            entity_copy.containing_class = None
+            entity_copy.summaries = {}
+            self._memo[id(entity)] = entity_copy
+            entity_copy.containing_class = self.translate(entity.containing_class)
+            entity_copy.default_entities = {
+                name: self.translate(e) for name, e in entity.default_entities.items()
+            }
+        elif isinstance(entity, Class):
+            entity_copy = copy(entity)
+            self._memo[id(entity)] = entity_copy
+            entity_copy.bases = [self.translate(base) for base in entity.bases]
+            entity_copy.init_instance_namespace = self.translate_namespace(
+                entity.init_instance_namespace
+            )
+        elif isinstance(entity, ClassInstance):
+            entity_copy = copy(entity)
+            self._memo[id(entity)] = entity_copy
+            entity_copy.class_entity = self.translate(entity.class_entity)
+            entity_copy.namespace = self.translate_namespace(entity.namespace)
+        elif isinstance(entity, Container):
+            entity_copy = copy(entity)
+            self._memo[id(entity)] = entity_copy
+            if entity.elements is not None:
+                entity_copy.elements = [self.translate(e) for e in entity.elements]
+            if entity.entities is not None:
+                entity_copy.entities = [self.translate(e) for e in entity.entities]
+        else:
+            return entity
+
+        self._memo[id(entity)] = entity_copy
+        return entity_copy
+
+    def translate_namespace(self, namespace):
+        return {name: self.translate(entity) for name, entity in namespace.items()}
+
+
+class _TranslationChain(object):
+    """
+    Maps the entities of a first-party module into a module that imports it
+    through another one (e.g. a function that a package's `__init__.py`
+    imports from one of its modules).
+    """
+
+    def __init__(self, first, second):
+        self._first = first
+        self._second = second
+
+    def translate_namespace(self, namespace):
+        return self._second.translate_namespace(self._first.translate_namespace(namespace))
+
+
+class ModuleSummary(object):
+    """
+    Result of analyzing a first-party module once: the entities it binds at
+    module level (Functions, Classes, ObjectNodes, ...) and the unconsolidated
+    object hierarchies they refer to.
+    """
+
+    def __init__(self, path, namespace, object_hierarchies):
+        self.path = path
+        self.namespace = namespace
+        self.object_hierarchies = object_hierarchies
+
+        # Maps names to the (dotted name, entity) pairs of their attributes that
+        # the namespace tracks (e.g. `np.linalg` for `np`)
+        self._attributes = {}
+        for key, entity in namespace.items():
+            if '.' in key:
+                self._attributes.setdefault(key.split('.', 1)[0], []).append((key, entity))
+
+        self._parents = {} # Maps node ids to parent nodes (None for roots)
+        self._orphan_ids = set() # Ids of nodes that aren't in any hierarchy
+        self._index_parents()
+
+    def _index_parents(self):
+        self._parents = {}
+        for root in self.object_hierarchies:
+            self._parents[id(root)] = None
+            for node in root.breadth_first():
+                for child in node.children:
+                    self._parents[id(child)] = node
+
+    def get_parent(self, node):
+        """
+        Returns the parent of a node in the module's object hierarchies (None
+        for a root), or raises a KeyError if the node isn't in any. Nodes can
+        be grafted onto the hierarchies after the module is analyzed, when a
+        function it imported is called from a module that imports it in turn
+        (see `_TranslationChain`).
+        """
+
+        if id(node) not in self._parents and id(node) not in self._orphan_ids:
+            self._index_parents()
+            if id(node) not in self._parents:
+                self._orphan_ids.add(id(node))
+
+        return self._parents[id(node)]
+
+    def get_entities(self, names):
+        """
+        Returns the entities bound to a set of names, keyed by the names they're
+        imported as.
+
+        Parameters
+        ----------
+        names : list
+            `(name, alias)` tuples from an import statement, where `alias` is
+            None if the name isn't renamed; a name of '*' imports every public
+            name
+        """
+
+        entities = {}
+        for name, alias in names:
+            if name == '*':
+                public_names = (
+                    n for n in self.namespace
+                    if '.' not in n and not n.startswith('_')
+                )
+                entities.update(self.get_entities([(n, None) for n in public_names]))
+                continue
+
+            if name not in self.namespace:
+                continue
+
+            alias = alias or name
+            entities[alias] = self.namespace[name]
+            for key, entity in self._attributes.get(name, []):
+                entities[alias + key[len(name):]] = entity
+
+        return entities
+
+    def get_attributes(self, alias):
+        """
+        Returns the entities the module binds, keyed by their names as
+        attributes of the name the module is imported as (e.g. `utils.load`
+        for `load`, in `import utils`).
+        """
+
+        return {'.'.join((alias, name)): entity for name, entity in self.namespace.items()}
+
+
+class ModuleImporter(object):
+    """
+    Resolves the imports of one module in a project (see the `importer`
+    parameter of `Saplings`).
+    """
+
+    def __init__(self, project, path):
+        self.project = project
+        self.path = path
+
+    ## Helpers ##
+
+    def _get_summary(self, module, level):
+        path = self.project.resolve(module, level, self.path)
+        if path is None:
+            return None
+
+        return self.project.get_summary(path)
+
+    def _import_module(self, module, level, alias, object_hierarchies):
+        summary = self._get_summary(module, level)
+        if summary is None:
+            return None
+
+        # The module itself is bound to a node that isn't in any hierarchy, so
+        # its attributes are resolved through the names bound along with it,
+        # and uses of attributes it doesn't bind aren't counted
+        module_node = ObjectNode(alias.rsplit('.', 1)[-1])
+        module_node.frequency = 0
+
+        translation = _Translation(summary, object_hierarchies)
+        entities = {alias: module_node}
+        for name, entity in summary.get_attributes(alias).items():
+            entities[name] = translation.translate(entity)
+
+        return entities
+
+    ## Public Methods ##
+
+    def import_module(self, module, alias, object_hierarchies):
+        """
+        Imports a first-party module, binding its entities as attributes of
+        the name it's imported as. Without an alias, `import a.b` binds `a`,
+        so the entities of `a` (i.e. its `__init__.py`) are bound as
+        attributes of `a`, and those of `a.b` as attributes of `a.b`.
+
+        Parameters
+        ----------
+        module : str
+            dotted name of the module
+        alias : {str, None}
+            name the module is imported as, if it's renamed
+        object_hierarchies : list
+            root nodes of the importing module's object hierarchies; grafted
+            nodes are added to these
+
+        Returns
+        -------
+        {dict, None}
+            maps the names the entities are bound to in the importing module
+            to the entities; None if the module isn't first-party (or can't be
+            analyzed), in which case it's treated as an external module
+        """
+
+        if alias:
+            return self._import_module(module, 0, alias, object_hierarchies)
+
+        entities, sub_modules = None, module.split('.')
+        for index in range(len(sub_modules)):
+            prefix = '.'.join(sub_modules[:index + 1])
+            prefix_entities = self._import_module(prefix, 0, prefix, object_hierarchies)
+            if prefix_entities is None:
+                break
+
+            entities = entities or {}
+            entities.update(prefix_entities)
+
+        return entities
+
+    def import_from(self, module, level, names, object_hierarchies):
+        """
+        Imports names from a first-party module. The imported entities are
+        mapped into the importing module (see `_Translation`). Names the
+        module doesn't bind are imported as its submodules, if they're
+        first-party (e.g. `from pkg import utils`, where `pkg/__init__.py`
+        doesn't import `utils`); other names are left out of the result.
+
+        Parameters
+        ----------
+        module : {str, None}
+            name of the module (None for `from . import x`)
+        level : int
+            number of leading dots in a relative import
+        names : list
+            `(name, alias)` tuples; see `ModuleSummary.get_entities`
+        object_hierarchies : list
+            root nodes of the importing module's object hierarchies; grafted
+            nodes are added to these
+
+        Returns
+        -------
+        {dict, None}
+            maps the names the entities are bound to in the importing module
+            to the entities; None if neither the module nor any of the names
+            is first-party (or can be analyzed), in which case the module is
+            treated as an external module
+        """
+
+        # A package's submodules can be imported from its `__init__.py`, whose
+        # summary isn't available yet
+        summary, entities = self._get_summary(module, level), {}
+        namespace = summary.namespace if summary else {}
+        if summary:
+            translation = _Translation(summary, object_hierarchies)
+            for name, entity in summary.get_entities(names).items():
+                entities[name] = translation.translate(entity)
+
+        for name, alias in names:
+            if name == '*' or name in namespace:
+                continue
+
+            sub_module = '.'.join((module, name)) if module else name
+            sub_module_entities = self._import_module(
+                sub_module,
+                level,
+                alias or name,
+                object_hierarchies
+            )
+            entities.update(sub_module_entities or {})
+
+        if summary is None and not entities:
+            return None
+
+        return entities
+
+
+class Project(object):
+    """
+    Project mode: first-party modules (those under the project's root) are
+    resolved on disk, and import statements that refer to them bind the
+    module's Functions and Classes instead of creating object hierarchy nodes
+    for an external module. This way, uses of external modules through
+    the project's own helpers (e.g. `from .utils import load_model`) are
+    tracked.
+
+    Each module is analyzed at most once, into a `ModuleSummary` that's reused
+    by every module that imports it, so a project is analyzed in roughly
+    linear time. Import cycles are broken by treating the module that closes
+    the cycle as external.
+    """
+
+    def __init__(self, root):
+        """
+        Parameters
+        ----------
+        root : str
+            directory that absolute imports are resolved against (e.g. the
+            directory containing the project's top-level package)
+        """
+
+        self.root = os.path.abspath(root)
+
+        self._summaries = {} # Maps paths to ModuleSummaries (None if failed)
+        self._in_progress = set()
+
+    ## Helpers ##
+
+    def _analyze(self, path):
+        with open(path, "rb") as file:
+            tree = ast.parse(file.read(), path)
+
+        namespace, object_hierarchies = {}, []
+        Saplings(
+            tree,
+            object_hierarchies,
+            namespace,
+            importer=ModuleImporter(self, path)
+        )
+
+        return ModuleSummary(path, namespace, object_hierarchies)
+
+    ## Public Methods ##
+
+    def resolve(self, module, level, importer_path):
+        """
+        Finds the file of a first-party module.
+
+        Parameters
+        ----------
+        module : {str, None}
+            dotted name of the module
+        level : int
+            number of leading dots in a relative import (0 if absolute)
+        importer_path : str
+            path of the importing module
+
+        Returns
+        -------
+        {str, None}
+            path of the module's `.py` file (or its package's `__init__.py`),
+            or None if it isn't in the project
+        """
+
+        if level:
+            base = os.path.dirname(os.path.abspath(importer_path))
+            for _ in range(level - 1):
+                base = os.path.dirname(base)
+        else:
+            base = self.root
+
+        if os.path.commonpath([base, self.root]) != self.root:
+            return None
+
+        module_path = os.path.join(base, *module.split('.')) if module else base
+        for candidate in (module_path + ".py", os.path.join(module_path, "__init__.py")):
+            if os.path.isfile(candidate):
+                return candidate
+
+        return None
+
+    def get_summary(self, path):
+        """
+        Returns the summary of a module, analyzing it if it hasn't been yet.
+        Returns None if the module can't be analyzed, or if it's still being
+        analyzed (i.e. it's part of an import cycle).
+        """
+
+        path = os.path.abspath(path)
+        if path in self._summaries:
+            return self._summaries[path]
+        elif path in self._in_progress:
+            return None
+
+        self._in_progress.add(path)
+        try:
+            summary = self._analyze(path)
+        except (SyntaxError, ValueError, OSError):
+            summary = None
+        finally:
+            self._in_progress.discard(path)
+
+        self._summaries[path] = summary
+        return summary
+
+    def analyze_path(self, path):
+        """
+        Returns the object hierarchies of a module in the project, reusing its
+        summary if it was already analyzed as a dependency.
+
+        Returns
+        -------
+        list
+            root nodes (ObjectNodes) of the module's object hierarchies
+
+        Raises
+        ------
+        SyntaxError
+            if the module can't be parsed
+        """
+
+        summary = self.get_summary(path)
+        if summary is None: # Analyzed again to raise the error
+            summary = self._analyze(path)
+
+        trees = []
+        for root in deepcopy(summary.object_hierarchies):
+            if utils.prune_unused_nodes(root):
+                utils.consolidate_call_nodes(root)
+                trees.append(root)
+
+        return trees
@@ -0,0 +1,255 @@
+# Standard Library
+import bisect
+import os
+import tempfile
+from array import array
+
+DEFAULT_MAX_BUFFERED_ROWS = 1 << 20
+COLUMN_TYPE = 'i'
+
+
+def _iter_raw_paths(node, path, num_calls=0):
+    """
+    Generates the path each node of an unconsolidated object hierarchy will
+    have once it's consolidated (see `utilities.consolidate_call_nodes`). Call
+    nodes ("()") are skipped, since they're merged into their parents and
+    their uses aren't counted in any frequency.
+    """
+
+    for child in node.children:
+        if child.name == "()":
+            yield from _iter_raw_paths(child, path, num_calls + 1)
+        else:
+            child_path = path + "()" * num_calls + '.' + child.name
+            yield child, child_path
+            yield from _iter_raw_paths(child, child_path)
+
+
+class ProvenanceRecorder(object):
+    """
+    Recorder (see the `recorder` parameter of `Saplings`) that notes the
+    source location of every use of an object hierarchy node in one file (one
+    per unit of the node's frequency). Uses are buffered until `commit` adds
+    them to a `ProvenanceStore`.
+    """
+
+    def __init__(self, store, filename):
+        self._store = store
+        self._filename = filename
+        self._location = None
+        self._uses = [] # (node, line, column) tuples
+
+    @property
+    def location(self):
+        return self._location
+
+    @location.setter
+    def location(self, node):
+        # Synthesized AST nodes have no position; the enclosing one is kept
+        if hasattr(node, "lineno"):
+            self._location = node
+
+    def record_increment(self, node):
+        location = self._location
+        if location is None:
+            self._uses.append((node, 0, 0))
+        else:
+            self._uses.append((node, location.lineno, location.col_offset))
+
+    def record_use(self, entity):
+        pass
+
+    def commit(self, object_hierarchies):
+        """
+        Adds the buffered uses to the store. Must be called before the object
+        hierarchies are consolidated (i.e. before `Saplings.get_trees`).
+
+        Parameters
+        ----------
+        object_hierarchies : list
+            root nodes of the file's unconsolidated object hierarchies
+        """
+
+        paths = {}
+        for root in object_hierarchies:
+            paths[id(root)] = root.name
+            for node, path in _iter_raw_paths(root, root.name):
+                paths[id(node)] = path
+
+        file_id = self._store.add_file(self._filename)
+        for node, line, column in self._uses:
+            path = paths.get(id(node))
+            if path is not None:
+                self._store.append(path, file_id, line, column)
+
+        self._uses = []
+
+
+class ProvenanceStore(object):
+    """
+    Append-only store of where each API path is used: one row per use, with
+    the path's id, the file's id, and the line and column of the use. Rows are
+    kept in columns of 32-bit integers rather than as objects on the nodes, and
+    once `max_buffered_rows` accumulate they're sorted by path id and spilled
+    to a file (if a spill directory is given), so memory stays bounded.
+
+    Lookups by path use an index over the buffered rows, and binary searches
+    over the spilled chunks (each of which is sorted).
+    """
+
+    def __init__(self, spill_dir=None, max_buffered_rows=DEFAULT_MAX_BUFFERED_ROWS):
+        """
+        Parameters
+        ----------
+        spill_dir : {str, None}
+            directory for the spill file; rows are only kept in memory if None
+        max_buffered_rows : int
+            number of rows kept in memory before they're spilled
+        """
+
+        self.paths, self._path_ids = [], {}
+        self.files, self._file_ids = [], {}
+
+        self._max_buffered_rows = max_buffered_rows
+        self._columns = self._new_columns()
+
+        # Maps path ids to the positions of their buffered rows; built lazily
+        self._index = {}
+        self._num_indexed_rows = 0
+
+        self._spill_file = None
+        if spill_dir is not None:
+            self._spill_file = tempfile.TemporaryFile(dir=spill_dir, prefix="saplings-provenance-")
+        self._chunks = [] # (offset, number of rows) of each spilled chunk
+        self._num_spilled_rows = 0
+
+    def __len__(self):
+        return self._num_spilled_rows + len(self._columns[0])
+
+    ## Helpers ##
+
+    @staticmethod
+    def _new_columns():
+        # Path ids, file ids, lines, columns
+        return tuple(array(COLUMN_TYPE) for _ in range(4))
+
+    def _intern(self, ids, values, value):
+        value_id = ids.get(value)
+        if value_id is None:
+            value_id = ids[value] = len(values)
+            values.append(value)
+
+        return value_id
+
+    def _update_index(self):
+        path_ids = self._columns[0]
+        for row in range(self._num_indexed_rows, len(path_ids)):
+            self._index.setdefault(path_ids[row], []).append(row)
+
+        self._num_indexed_rows = len(path_ids)
+
+    def _read_chunk_rows(self, offset, num_rows, path_id):
+        item_size = array(COLUMN_TYPE).itemsize
+
+        path_ids = array(COLUMN_TYPE)
+        self._spill_file.seek(offset)
+        path_ids.frombytes(self._spill_file.read(num_rows * item_size))
+
+        start = bisect.bisect_left(path_ids, path_id)
+        end = bisect.bisect_right(path_ids, path_id)
+        if start == end:
+            return []
+
+        columns = []
+        for column_index in range(1, 4):
+            column = array(COLUMN_TYPE)
+            self._spill_file.seek(offset + (column_index * num_rows + start) * item_size)
+            column.frombytes(self._spill_file.read((end - start) * item_size))
+            columns.append(column)
+
+        return list(zip(*columns))
+
+    ## Public Methods ##
+
+    def add_file(self, filename):
+        """
+        Returns the id of a file, assigning one if it's new.
+        """
+
+        return self._intern(self._file_ids, self.files, filename)
+
+    def recorder(self, filename):
+        """
+        Returns a `ProvenanceRecorder` for one file's analysis.
+        """
+
+        return ProvenanceRecorder(self, filename)
+
+    def append(self, path, file_id, line, column):
+        path_id = self._intern(self._path_ids, self.paths, path)
+        for values, value in zip(self._columns, (path_id, file_id, line, column)):
+            values.append(value)
+
+        if self._spill_file and len(self._columns[0]) >= self._max_buffered_rows:
+            self.spill()
+
+    def spill(self):
+        """
+        Writes the buffered rows to the spill file as one chunk, sorted by path
+        id, and clears the buffer.
+        """
+
+        num_rows = len(self._columns[0])
+        if not self._spill_file or not num_rows:
+            return
+
+        order = sorted(range(num_rows), key=self._columns[0].__getitem__)
+
+        offset = self._spill_file.seek(0, os.SEEK_END)
+        for values in self._columns:
+            self._spill_file.write(array(COLUMN_TYPE, map(values.__getitem__, order)).tobytes())
+
+        self._chunks.append((offset, num_rows))
+        self._num_spilled_rows += num_rows
+
+        self._columns = self._new_columns()
+        self._index, self._num_indexed_rows = {}, 0
+
+    def locate(self, path):
+        """
+        Finds where an API path is used.
+
+        Parameters
+        ----------
+        path : str
+            path of a node (see `rendering.iter_tree_paths`)
+
+        Returns
+        -------
+        list
+            `(filename, line, column)` tuples, sorted
+        """
+
+        path_id = self._path_ids.get(path)
+        if path_id is None:
+            return []
+
+        rows = []
+        for offset, num_rows in self._chunks:
+            rows.extend(self._read_chunk_rows(offset, num_rows, path_id))
+
+        self._update_index()
+        _, file_ids, lines, columns = self._columns
+        for row in self._index.get(path_id, []):
+            rows.append((file_ids[row], lines[row], columns[row]))
+
+        return sorted((self.files[file_id], line, column) for file_id, line, column in rows)
+
+    def close(self):
+        """
+        Deletes the spill file.
+        """
+
+        if self._spill_file:
+            self._spill_file.close()
+            self._spill_file = None
@@ -0,0 +1,244 @@
+# Standard Library
+import ast
+
+# Local Modules
+from saplings.entities import Function, Class, ClassInstance, Container
+from saplings.summaries import get_body
+
+MAX_ITERATIONS = 4
+
+
+###################
+# CALL GRAPH CYCLES
+###################
+
+
+class CallCycle(object):
+    """
+    Strongly connected component of the call graph with at least one cycle
+    (i.e. a set of recursive or mutually recursive functions). The function of
+    the cycle that's called first iterates to a fixed point, and the other
+    functions are processed once per iteration.
+    """
+
+    def __init__(self, functions):
+        self.functions = functions
+        self.is_iterating = False
+        self.has_changed = False # True if a summary changed this iteration
+        self.processed = set() # Functions processed this iteration
+
+
+def _get_called_names(def_node):
+    """
+    Returns the names (e.g. `helper` or `self.visit`) that are called in a
+    function's body, not counting nested functions and classes.
+    """
+
+    names, nodes = set(), list(get_body(def_node))
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda)):
+            continue
+
+        if isinstance(node, ast.Call):
+            func, attributes = node.func, []
+            while isinstance(func, ast.Attribute):
+                attributes.append(func.attr)
+                func = func.value
+
+            if isinstance(func, ast.Name):
+                names.add('.'.join([func.id] + attributes[::-1]))
+
+        nodes.extend(ast.iter_child_nodes(node))
+
+    return names
+
+
+def _resolve(name, namespace):
+    if name in namespace:
+        return namespace[name]
+
+    base, _, attribute = name.partition('.')
+    entity = namespace.get(base)
+    if isinstance(entity, ClassInstance):
+        return entity.namespace.get(attribute)
+    elif isinstance(entity, Class):
+        return entity.get_namespace().get(attribute)
+
+    return None
+
+
+def find_call_cycles(function, namespace):
+    """
+    Finds the strongly connected components of the call graph reachable from
+    a function (with Tarjan's algorithm), and sets `is_recursive` and
+    `call_cycle` on every function in it. Calls are resolved statically, in
+    the namespace the function is called in (falling back to the namespace
+    each function was defined in).
+
+    Parameters
+    ----------
+    function : Function
+        function that's about to be processed
+    namespace : dict
+        namespace the function is processed in
+    """
+
+    indices, low_links = {}, {}
+    stack, on_stack = [], set()
+
+    def callees(caller):
+        for name in _get_called_names(caller.def_node):
+            callee = _resolve(name, namespace)
+            if callee is None:
+                callee = _resolve(name, caller.init_namespace)
+
+            if not isinstance(callee, Function):
+                continue
+            # Functions analyzed by an earlier search are complete components
+            elif callee.is_recursive is None or id(callee) in indices:
+                yield callee
+
+    # Iterative, since call chains can be deeper than the recursion limit
+    indices[id(function)] = low_links[id(function)] = 0
+    stack.append(function)
+    on_stack.add(id(function))
+    work = [(function, callees(function))]
+    while work:
+        caller, callee_iter = work[-1]
+        for callee in callee_iter:
+            if id(callee) not in indices:
+                indices[id(callee)] = low_links[id(callee)] = len(indices)
+                stack.append(callee)
+                on_stack.add(id(callee))
+                work.append((callee, callees(callee)))
+                break
+            elif id(callee) in on_stack:
+                low_links[id(caller)] = min(low_links[id(caller)], indices[id(callee)])
+                if callee is caller:
+                    caller.is_recursive = True
+        else:
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low_links[id(parent)] = min(low_links[id(parent)], low_links[id(caller)])
+
+            if low_links[id(caller)] != indices[id(caller)]:
+                continue
+
+            component = []
+            while True:
+                member = stack.pop()
+                on_stack.discard(id(member))
+                component.append(member)
+                if member is caller:
+                    break
+
+            if len(component) > 1 or caller.is_recursive:
+                call_cycle = CallCycle(component)
+                for member in component:
+                    member.is_recursive = True
+                    member.call_cycle = call_cycle
+            else:
+                caller.is_recursive = False
+
+
+def is_same_summary(entity, other_entity):
+    """
+    Checks whether two return values of a function are the same, for deciding
+    whether a fixed point has been reached. Instances of the same class are
+    treated as the same, since each iteration creates new ones.
+    """
+
+    if isinstance(entity, ClassInstance) and isinstance(other_entity, ClassInstance):
+        return entity.class_entity is other_entity.class_entity
+    elif isinstance(entity, Container) and isinstance(other_entity, Container):
+        return entity.kind == other_entity.kind \
+            and _is_same_entity_list(entity.elements, other_entity.elements) \
+            and _is_same_entity_list(entity.entities, other_entity.entities)
+
+    return entity is other_entity
+
+
+def _is_same_entity_list(entities, other_entities):
+    if entities is None or other_entities is None:
+        return entities is other_entities
+
+    return len(entities) == len(other_entities) and all(
+        is_same_summary(e, other_e) for e, other_e in zip(entities, other_entities)
+    )
+
+
+###############
+# ITERATION LOG
+###############
+
+
+class IterationLog(object):
+    """
+    Recorder (see the `recorder` parameter of `Saplings`) that logs the changes
+    made to the object hierarchies in each fixed-point iteration, so that all
+    but the last iteration can be undone. The changes of the last iteration
+    are then passed on to the enclosing recorder, if any.
+    """
+
+    def __init__(self, recorder=None):
+        self.location = None
+        self._recorder = recorder
+        self._iterations = []
+
+    def begin(self):
+        self._iterations.append([])
+
+    def record_increment(self, node):
+        self._iterations[-1].append((True, node, self.location))
+
+    def record_use(self, entity):
+        self._iterations[-1].append((False, entity, self.location))
+
+    def commit(self, object_hierarchies):
+        """
+        Undoes every iteration except the last, removing the nodes they created
+        that the last iteration doesn't use, and replays the last iteration to
+        the enclosing recorder (along with the functions and classes every
+        iteration used).
+        """
+
+        emptied_ids = set()
+        for iteration in self._iterations[:-1]:
+            for is_increment, node, _ in iteration:
+                if is_increment:
+                    node.frequency -= 1
+                    if not node.frequency:
+                        emptied_ids.add(id(node))
+
+        if emptied_ids:
+            object_hierarchies[:] = [
+                root for root in object_hierarchies
+                if _prune_emptied_nodes(root, emptied_ids)
+            ]
+
+        if self._recorder and self._iterations:
+            # Uses from every iteration are passed on, since the summaries the
+            # last iteration relied on may have come from earlier ones
+            for iteration in self._iterations[:-1]:
+                for is_increment, entity, _ in iteration:
+                    if not is_increment:
+                        self._recorder.record_use(entity)
+
+            location = self._recorder.location
+            for is_increment, entity, entity_location in self._iterations[-1]:
+                self._recorder.location = entity_location
+                if is_increment:
+                    self._recorder.record_increment(entity)
+                else:
+                    self._recorder.record_use(entity)
+
+            self._recorder.location = location
+
+        self._iterations = []
+
+
+def _prune_emptied_nodes(node, emptied_ids):
+    node.children = [c for c in node.children if _prune_emptied_nodes(c, emptied_ids)]
+    return node.frequency or id(node) not in emptied_ids or node.children
@@ -2,6 +2,9 @@
 import ast
 from collections import defaultdict
 
+# Local Modules
+from saplings.entities import ObjectNode
+
 HORIZ_EDGE = "+--"
 VERT_EDGE = "|"
 INDENT = "    "
@@ -45,3 +48,59 @@ def dictify_tree(node):
         d[node.name]["children"].append(dictify_tree(child))
 
     return d
+
+
+def tuplify_tree(node):
+    """
+    Compact, picklable representation of a tree. Each node becomes a
+    `(name, is_callable, order, frequency, children)` tuple, where `children` is
+    a tuple of child tuples.
+    """
+
+    return (
+        node.name,
+        node.is_callable,
+        node.order,
+        node.frequency,
+        tuple(tuplify_tree(child) for child in node.children)
+    )
+
+
+def build_tree(node_tuple):
+    """
+    Inverse of `tuplify_tree`.
+    """
+
+    name, is_callable, order, frequency, children = node_tuple
+
+    node = ObjectNode(name, is_callable, order)
+    node.frequency = frequency
+    node.children = [build_tree(child) for child in children]
+
+    return node
+
+
+def iter_tree_paths(node, parent_path=None):
+    """
+    Generates the path of every node in a tree, along with the node. Paths are
+    dotted attribute chains, where a node that's an nth-order child of its
+    parent is preceded by n calls (e.g. `torch.nn.Linear().forward`).
+    """
+
+    if parent_path is None:
+        path = node.name
+    else:
+        path = parent_path + "()" * node.order + '.' + node.name
+
+    yield path, node
+    for child in node.children:
+        yield from iter_tree_paths(child, path)
+
+
+def flatten_tree(node):
+    """
+    Maps the path of every node in a tree (see `iter_tree_paths`) to its
+    frequency.
+    """
+
+    return {path: n.frequency for path, n in iter_tree_paths(node)}
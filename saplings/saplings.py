@@ -4,12 +4,16 @@ from collections import defaultdict
 from copy import copy
 
 # Local Modules
-# import saplings.utilities as utils
-# import saplings.tokenization as tkn
-# from saplings.entities import ObjectNode, Function, Class, ClassInstance
-import utilities as utils
-import tokenization as tkn
-from entities import ObjectNode, Function, Class, ClassInstance
+import saplings.utilities as utils
+import saplings.tokenization as tkn
+import saplings.recursion as rec
+import saplings.states as sts
+import saplings.summaries as smry
+from saplings.entities import ObjectNode, Function, Class, ClassInstance, Container
+from saplings.entities import InstanceNamespace, next_serial
+
+# Methods of containers whose results are tracked (see `_call_container_method`)
+CONTAINER_METHODS = {"__index__", "__iter__", "get", "pop", "values", "append", "add"}
 
 
 ##########
@@ -18,7 +22,8 @@ from entities import ObjectNode, Function, Class, ClassInstance
 
 
 class Saplings(ast.NodeVisitor):
-    def __init__(self, tree, object_hierarchies=[], namespace={}):
+    def __init__(self, tree, object_hierarchies=[], namespace={}, recorder=None,
+                 importer=None, max_states=None):
         """
         Extracts object hierarchies for imported modules in a program, given its
         AST.
@@ -31,9 +36,27 @@ class Saplings(ast.NodeVisitor):
             root nodes of existing object hierarchies
         namespace : {dict, optional}
             mapping of identifiers to ObjectNodes/Functions/Classes/ClassInstances
+        recorder : {object, None}
+            notified of every change to the object hierarchies (through
+            `record_increment(node)`) and of every user-defined function or
+            class that's processed, or existing node an import resolves to
+            without counting it (through `record_use(entity)`); its
+            `location` attribute is set to the AST node being processed before
+            the node's changes are recorded; passed down to nested scopes
+        importer : {ModuleImporter, None}
+            resolves imports of first-party modules to their Functions,
+            Classes, etc. (see `project.Project`); all
+            imports are treated as external modules if None
+        max_states : {int, None}
+            enables path-sensitive analysis, where both sides of a branch (and
+            executed and skipped loops) are tracked as separate namespaces, up
+            to this many at a time (see `states.join_states`); if None, only
+            the namespace of the first `if` block persists
         """
 
         self._object_hierarchies = object_hierarchies
+        self._recorder = recorder
+        self._importer = importer
 
         # Maps active identifiers to namespace entities (e.g. ObjectNodes,
         # Functions, Classes, and ClassInstances)
@@ -46,11 +69,31 @@ class Saplings(ast.NodeVisitor):
         # the AST
         self._return_value = None
 
+        # Container of the entities yielded in the AST, if any (i.e. the
+        # elements of a generator, when the AST is a generator's body)
+        self._yielded = None
+
+        # Distinct entities among the elements of the Container that was last
+        # iterated over, if there are several (see `_bind_loop_target`)
+        self._iterated_entities = None
+
         # True when a Return, Continue, or Break node is hit –– stops traversal
         # of subtree
         self._is_traversal_halted = False
 
+        # Path-sensitive mode: the live states, the one being processed, the
+        # number of live states the current statement is processed in, and the
+        # names the traversal may read (see `_fork_state`)
+        self._max_states = max_states
+        self._state = sts.State(namespace)
+        self._states = [self._state]
+        self._num_paths = 1
+        self._tree = tree
+        self._read_names = None
+
         self.visit(tree)
+        if max_states:
+            self._write_back_states(namespace)
         self._process_uncalled_functions()
 
     ## Overloaded Methods ##
@@ -73,8 +116,12 @@ class Saplings(ast.NodeVisitor):
         method = "visit_" + node.__class__.__name__
         visitor = getattr(self, method, self.generic_visit)
 
-        if not self._is_traversal_halted:
-            return visitor(node)
+        if self._is_traversal_halted:
+            return None
+        elif self._max_states and isinstance(node, ast.stmt):
+            return self._visit_in_states(node, visitor)
+
+        return visitor(node)
 
     ## Helpers ##
 
@@ -90,13 +137,41 @@ class Saplings(ast.NodeVisitor):
         if returns_closure and self._return_value in self._functions:
             self._functions.remove(self._return_value)
 
+        # Functions are processed in the order they were defined, since one
+        # that's processed first can call (and so use up) one that's defined
+        # later; iterating over the set would make the result vary between runs
         while any(not f.called for f in self._functions):
-            for function in self._functions.copy():
+            for function in sorted(self._functions, key=lambda f: f.serial):
                 if function.called:
                     self._functions.remove(function)
                     continue
 
+                # In path-sensitive mode, a function defined on several paths
+                # has a copy per path, which are processed like one statement
+                if self._max_states:
+                    copies = [
+                        f for f in sorted(self._functions, key=lambda f: f.serial)
+                        if f.def_node is function.def_node and not f.called
+                    ]
+                    if len(copies) > 1:
+                        self._process_function_copies(copies)
+                        continue
+
+                self._process_function(function, function.init_namespace)
+
+    def _process_function_copies(self, functions):
+        outer_recorder = self._recorder
+        self._recorder = log = sts.StateLog(outer_recorder)
+        self._num_paths = len(functions)
+        try:
+            for function in functions:
+                log.begin()
                 self._process_function(function, function.init_namespace)
+        finally:
+            self._recorder = outer_recorder
+            self._num_paths = 1
+
+        log.commit()
 
     def _process_subtree_in_new_scope(self, tree, namespace):
         """
@@ -117,7 +192,154 @@ class Saplings(ast.NodeVisitor):
             instance of a Saplings object
         """
 
-        return Saplings(tree, self._object_hierarchies, namespace)
+        # The subtree is processed once per path through the current scope,
+        # so it gets a share of the states: the number of paths along the call
+        # stack stays bounded by `max_states`, rather than multiplying with
+        # each nested call
+        max_states = self._max_states
+        if max_states:
+            max_states = max(1, max_states // self._num_paths)
+
+        if not self._recorder:
+            return Saplings(
+                tree,
+                self._object_hierarchies,
+                namespace,
+                importer=self._importer,
+                max_states=max_states
+            )
+
+        # The subtree is processed in the middle of the current node
+        location = self._recorder.location
+        saplings = Saplings(
+            tree,
+            self._object_hierarchies,
+            namespace,
+            self._recorder,
+            self._importer,
+            max_states
+        )
+        self._recorder.location = location
+
+        return saplings
+
+    def _activate_state(self, state):
+        self._state = state
+        self._namespace = state.namespace
+        self._is_traversal_halted = state.is_halted
+
+    def _fork_state(self, state):
+        """
+        Forks a state for another path (see `states.State.fork`). Only the
+        instances and containers that the traversal may reach are copied: those
+        bound to names read in the tree, or by the functions they reach.
+        """
+
+        if self._read_names is None:
+            names = {n.id for n in ast.walk(self._tree) if isinstance(n, ast.Name)}
+            self._read_names = smry.get_reachable_names(names, state.namespace)
+
+        return state.fork(self._read_names)
+
+    def _visit_in_states(self, node, visitor):
+        """
+        Processes a statement once in each live state (in path-sensitive mode).
+        Uses of a node by the statement are only counted once, no matter how
+        many states it's processed in (see `states.StateLog`). Visitors of
+        branching statements replace `self._states` with the states at the end
+        of each path.
+        """
+
+        states = self._states
+        if len(states) == 1:
+            visitor(node)
+            if self._states is states:
+                self._state.is_halted = self._is_traversal_halted
+        else:
+            outer_recorder, num_paths = self._recorder, self._num_paths
+            self._recorder = log = sts.StateLog(outer_recorder)
+            self._num_paths = sum(1 for state in states if not state.is_halted)
+            try:
+                next_states = []
+                for state in states:
+                    if state.is_halted:
+                        next_states.append(state)
+                        continue
+
+                    log.begin()
+                    self._states = [state]
+                    self._activate_state(state)
+                    visitor(node)
+                    if self._states == [state]:
+                        state.is_halted = self._is_traversal_halted
+
+                    next_states.extend(self._states)
+            finally:
+                self._recorder = outer_recorder
+                self._num_paths = num_paths
+
+            log.commit()
+            if len(next_states) > len(states): # Forked in more than one state
+                self._join_states(next_states)
+            else:
+                self._states = next_states
+
+        # The traversal of the block only halts once every path has halted
+        live_states = [state for state in self._states if not state.is_halted]
+        self._activate_state(live_states[0] if live_states else self._states[0])
+
+    def _visit_block_in_states(self, body, states):
+        """
+        Processes a block of statements starting from the given states, and
+        returns the states at the end of it.
+        """
+
+        self._states = states
+        self._activate_state(states[0])
+        self.visit(ast.Module(body=body))
+
+        return self._states
+
+    def _join_states(self, states):
+        self._states = sts.join_states(states, self._max_states)
+
+    def _write_back_states(self, namespace):
+        """
+        Merges the states left at the end of the traversal into the namespace
+        the traversal started with, so the caller sees one namespace.
+        """
+
+        if len(self._states) == 1 and self._states[0].namespace is namespace:
+            return
+
+        state = sts.State(self._states[0].namespace.copy())
+        for other_state in self._states[1:]:
+            sts.merge_states(state, other_state)
+
+        sts.write_back_state(state, namespace)
+        self._namespace = namespace
+
+    def _increment_count(self, node):
+        node.increment_count()
+        if self._recorder:
+            self._recorder.record_increment(node)
+
+    def _add_child(self, parent, node):
+        """
+        Adds a child to an object hierarchy node, or increments the count of the
+        existing child with the same name.
+
+        Returns
+        -------
+        ObjectNode
+            the new or existing child
+        """
+
+        child = parent.add_child(node)
+        if self._recorder:
+            self._recorder.record_increment(child)
+
+        return child
 
     def _process_node(self, node):
         """
@@ -140,6 +362,9 @@ class Saplings(ast.NodeVisitor):
             node was processed in
         """
 
+        if self._recorder:
+            self._recorder.location = node
+
         tokenized_node = tkn.recursively_tokenize_node(node, [])
         entity, instance = self._process_attribute_chain(tokenized_node)
 
@@ -166,11 +391,17 @@ class Saplings(ast.NodeVisitor):
         TODO
         """
 
-        if function.is_closure:
-            func_namespace = {
-                **self._namespace.copy(),
-                **function.init_namespace
-            }
+        # NOTE: Namespaces are copied with .copy() rather than unpacked into a
+        # new dict so that dict subclasses (e.g. the read-tracking namespaces in
+        # incremental.py) keep their type
+        if function.translation:
+            func_namespace = self._namespace.copy()
+            func_namespace.update(
+                function.translation.translate_namespace(function.init_namespace)
+            )
+        elif function.is_closure:
+            func_namespace = self._namespace.copy()
+            func_namespace.update(function.init_namespace)
         else:
             func_namespace = self._namespace.copy()
 
@@ -181,7 +412,7 @@ class Saplings(ast.NodeVisitor):
         ) # TODO (V2): Handle tuple returns
 
         if isinstance(return_value, ObjectNode):
-            return_value.increment_count()
+            self._increment_count(return_value)
 
         return return_value
 
@@ -256,6 +487,11 @@ class Saplings(ast.NodeVisitor):
 
             if matching_module:
                 term_node = matching_module
+                if not term_node.frequency: # Grafted from a first-party module
+                    self._increment_count(term_node)
+                elif self._recorder:
+                    self._recorder.record_use(term_node)
+
                 break
 
         if not term_node:
@@ -265,6 +501,8 @@ class Saplings(ast.NodeVisitor):
 
             term_node = root_node
             self._object_hierarchies.append(term_node)
+            if self._recorder:
+                self._recorder.record_increment(term_node)
 
         for index in range(len(sub_modules[1:])):
             sub_module = sub_modules[index + 1]
@@ -274,66 +512,58 @@ class Saplings(ast.NodeVisitor):
 
             if matching_sub_module:
                 term_node = matching_sub_module
+                if not term_node.frequency: # Grafted from a first-party module
+                    self._increment_count(term_node)
+                elif self._recorder:
+                    self._recorder.record_use(term_node)
             else:
                 new_sub_module = ObjectNode(sub_module)
                 if standard_import:
                     self._namespace[sub_module_alias] = new_sub_module
 
-                term_node.add_child(new_sub_module)
-                term_node = new_sub_module
+                term_node = self._add_child(term_node, new_sub_module)
 
         return term_node
 
-    def _process_default_args(self, arg_names, defaults, namespace):
+    def _process_default_args(self, parameters):
         """
-        Takes arguments from a user-defined function's signature and processes
-        their default values.
+        Evaluates the default values of a user-defined function's parameters.
+        Like in Python, defaults are evaluated once, in the current namespace,
+        when the function is defined; calls of the function only bind them.
 
         Parameters
         ----------
-        arg_names : list
-            list of argument names (strings)
-        defaults : list
-            list of default values for the args (ast.AST nodes)
-        namespace : dict
-            namespace in which the function with the defaults was defined
+        parameters : ast.arguments
+            signature of the function
 
         Returns
         -------
         dict
-            map of argument names to their default value's namespace entity
-        list
-            list of argument names whose defaults had no corresponding
-            namespace entity
-        """
-
-        num_args, num_defaults = len(arg_names), len(defaults)
-        arg_to_default_node, null_defaults = {}, []
-        for index, default in enumerate(defaults):
-            if not default: # Only kw_defaults can be None
-                continue
-
-            arg_name_index = index + (num_args - num_defaults)
-            arg_name = arg_names[arg_name_index]
-
-            tokenized_default = tkn.recursively_tokenize_node(default, [])
-            default_node, _ = self._process_subtree_in_new_scope(
-                ast.Module(body=[]),
-                namespace
-            )._process_attribute_chain(tokenized_default)
-
-            if not default_node:
-                null_defaults.append(arg_name)
-                continue
+            map of parameter names to their default value's namespace entity
+            (None for defaults that have no corresponding namespace entity)
+        """
+
+        # Positional-only parameters aren't in the AST before Python 3.8
+        pos_params = getattr(parameters, "posonlyargs", []) + parameters.args
+        default_entities = {}
+        for params, defaults in ((pos_params, parameters.defaults),
+                                 (parameters.kwonlyargs, parameters.kw_defaults)):
+            num_params, num_defaults = len(params), len(defaults)
+            for index, default in enumerate(defaults):
+                if not default: # Only kw_defaults can be None
+                    continue
 
-            arg_to_default_node[arg_name] = default_node
+                param = params[index + (num_params - num_defaults)]
+                _, default_entities[param.arg], _ = self._process_node(default)
 
-        return arg_to_default_node, null_defaults
+        return default_entities
 
     def _process_function(self, function, namespace, arguments=[]):
         """
         Processes the arguments and body of a user-defined function. If the
-        function is recursive, the recursive calls are not processed (otherwise
+        function is part of a cycle in the call graph, its body is processed
+        by fixed-point iteration (see `_process_recursive_function`); recursive
+        calls that can't be resolved statically aren't processed (otherwise
         this would throw `Saplings` into an infinite loop). If the function
         returns a closure, that function is added to the list of functions in
         the current scope.
@@ -357,29 +587,24 @@ class Saplings(ast.NodeVisitor):
             namespace)
         """
 
+        if self._recorder:
+            self._recorder.record_use(function)
+
         parameters = function.def_node.args
 
-        pos_params = [a.arg for a in parameters.args]
+        positional = getattr(parameters, "posonlyargs", []) + parameters.args
+        pos_params = [a.arg for a in positional]
         kw_params = [a.arg for a in parameters.kwonlyargs]
 
-        # Namespace entities corresponding to default values
-        default_entities, null_defaults = self._process_default_args(
-            pos_params,
-            parameters.defaults,
-            namespace
-        )
-        kw_default_entities, null_kw_defaults = self._process_default_args(
-            kw_params,
-            parameters.kw_defaults,
-            namespace
-        )
-
-        # Update namespace with default values
-        namespace = {**namespace, **default_entities, **kw_default_entities}
-        for null_arg_name in null_defaults + null_kw_defaults:
-            if null_arg_name in namespace:
-                del namespace[null_arg_name]
-                utils.delete_sub_aliases(null_arg_name, namespace)
+        # Binds the default values, which were evaluated when the function was
+        # defined (see `_process_default_args`)
+        namespace = namespace.copy()
+        for arg_name, default_entity in function.default_entities.items():
+            if default_entity:
+                namespace[arg_name] = default_entity
+            elif arg_name in namespace:
+                del namespace[arg_name]
+                utils.delete_sub_aliases(arg_name, namespace)
 
         for index, argument in enumerate(arguments):
             if argument.arg_name == '': # Positional argument
@@ -417,18 +642,36 @@ class Saplings(ast.NodeVisitor):
             del namespace[parameters.kwarg.arg]
             utils.delete_sub_aliases(parameters.kwarg.arg, namespace)
 
-        # Handles recursive functions by deleting all names of the function node
-        for name, node in list(namespace.items()):
-            if node == function:
-                del namespace[name]
+        if function.is_processing: # Recursive call
+            return function.summary, None
+
+        if function.is_recursive is None:
+            rec.find_call_cycles(function, namespace)
+
+        if function.is_recursive:
+            return_value, func_saplings = self._process_recursive_function(
+                function,
+                namespace
+            )
+        else:
+            # Handles recursive functions by deleting all names of the function
+            # node
+            for name, node in list(namespace.items()):
+                if node == function:
+                    del namespace[name]
+
+            # Recursive calls that can't be resolved statically (e.g. through
+            # the attributes of another instance) aren't processed again
+            function.is_processing = True
+            try:
+                return_value, func_saplings = self._process_function_body(
+                    function,
+                    namespace
+                )
+            finally:
+                function.is_processing = False
 
-        # Processes function body
-        func_saplings = self._process_subtree_in_new_scope(
-            ast.Module(body=function.def_node.body),
-            namespace
-        )
         function.called = True
-        return_value = func_saplings._return_value
 
         # If the function returns a closure then treat it like a function
         # defined in the current scope by adding it to self._functions
@@ -448,6 +691,167 @@ class Saplings(ast.NodeVisitor):
 
         return return_value, func_saplings
 
+    def _process_recursive_function(self, function, namespace):
+        """
+        Processes the body of a function that's part of a cycle in the call
+        graph. Recursive calls return the summary of the called function (its
+        return value in the previous iteration, starting with None), and the
+        body is processed again until no summary in the cycle changes, or
+        `recursion.MAX_ITERATIONS` is reached. Only the changes to the object
+        hierarchies made by the last iteration are kept.
+
+        Inside another function's iteration of the same cycle, the body is
+        processed once per iteration, and later calls in the same iteration
+        return its summary, so the cost is bounded per cycle rather than
+        multiplying with the number of calls along it.
+
+        Parameters
+        ----------
+        function : Function
+            function that's being called
+        namespace : dict
+            namespace within which the function should be processed (after its
+            arguments have been bound)
+
+        Returns
+        -------
+        {ObjectNode, Function, Class, ClassInstance, None}
+            return value of the function
+        {Saplings, None}
+            instance that processed the last iteration; None if the summary
+            was returned
+        """
+
+        call_cycle = function.call_cycle
+        body = ast.Module(body=smry.get_body(function.def_node))
+
+        if call_cycle.is_iterating:
+            if function in call_cycle.processed:
+                return function.summary, None
+
+            call_cycle.processed.add(function)
+            function.is_processing = True
+            try:
+                func_saplings = self._process_subtree_in_new_scope(body, namespace.copy())
+            finally:
+                function.is_processing = False
+
+            return_value = self._get_return_value(function, func_saplings)
+            if not rec.is_same_summary(return_value, function.summary):
+                function.summary = return_value
+                call_cycle.has_changed = True
+
+            return return_value, func_saplings
+
+        outer_recorder = self._recorder
+        self._recorder = log = rec.IterationLog(outer_recorder)
+        call_cycle.is_iterating = True
+        function.is_processing = True
+        try:
+            for member in call_cycle.functions:
+                member.summary = None
+
+            for _ in range(rec.MAX_ITERATIONS):
+                log.begin()
+                call_cycle.has_changed = False
+                call_cycle.processed = {function}
+                func_saplings = self._process_subtree_in_new_scope(body, namespace.copy())
+
+                return_value = self._get_return_value(function, func_saplings)
+                if not rec.is_same_summary(return_value, function.summary):
+                    function.summary = return_value
+                    call_cycle.has_changed = True
+
+                if not call_cycle.has_changed:
+                    break
+        finally:
+            call_cycle.is_iterating = False
+            function.is_processing = False
+            self._recorder = outer_recorder
+
+        log.commit(self._object_hierarchies)
+
+        return return_value, func_saplings
+
+    def _get_return_value(self, function, func_saplings):
+        if not function.is_generator:
+            return func_saplings._return_value
+
+        # Calling a generator function returns its yielded entities
+        return func_saplings._yielded or Container("generator", is_ordered=False)
+
+    def _process_function_body(self, function, namespace):
+        """
+        Processes the body of a function that isn't part of a cycle in the call
+        graph. The bodies of lambdas and generators are summarized (see
+        `summaries.Summary`): a body is processed once per shape of the
+        namespace it's called in (i.e. the entities bound to its arguments and
+        the other names it reads), and calls with the same shape replay the
+        changes it made to the object hierarchies. This way, functional-style
+        code that calls the same lambdas and generators from many places isn't
+        analyzed over and over.
+
+        Parameters
+        ----------
+        function : Function
+            function that's being called
+        namespace : dict
+            namespace within which the function should be processed (after its
+            arguments have been bound)
+
+        Returns
+        -------
+        {ObjectNode, Function, Class, ClassInstance, Container, None}
+            return value of the function
+        {Saplings, None}
+            instance that processed the body; None if a summary was replayed
+        """
+
+        body = ast.Module(body=smry.get_body(function.def_node))
+        is_summarized = function.is_generator \
+            or isinstance(function.def_node, ast.Lambda)
+        if not is_summarized:
+            func_saplings = self._process_subtree_in_new_scope(body, namespace)
+            return func_saplings._return_value, func_saplings
+
+        shape, referents = smry.get_shape(function, namespace)
+        summary = function.summaries.get(shape)
+        if summary and summary.is_valid():
+            self._replay_summary(summary)
+            return summary.get_return_value(), None
+
+        serial = next_serial()
+        outer_recorder = self._recorder
+        self._recorder = log = smry.SummaryLog(outer_recorder)
+        try:
+            func_saplings = self._process_subtree_in_new_scope(body, namespace)
+        finally:
+            self._recorder = outer_recorder
+
+        return_value = self._get_return_value(function, func_saplings)
+        function.summaries[shape] = smry.Summary(
+            return_value,
+            log.changes,
+            referents,
+            serial
+        )
+
+        return return_value, func_saplings
+
+    def _replay_summary(self, summary):
+        location = self._recorder.location if self._recorder else None
+        for is_increment, entity, entity_location in summary.changes:
+            if self._recorder:
+                self._recorder.location = entity_location
+
+            if is_increment:
+                self._increment_count(entity)
+            elif self._recorder:
+                self._recorder.record_use(entity)
+
+        if self._recorder:
+            self._recorder.location = location
+
     def _process_assignment(self, target, val_entity):
         """
         Handles variable assignments and aliasing. There are three types of
@@ -490,12 +894,157 @@ class Saplings(ast.NodeVisitor):
             utils.delete_sub_aliases(targ_str, namespace)
         # Type II: Known entity reassigned to non-entity (E1 = NE1)
         elif targ_entity and not val_entity:
-            del namespace[targ_str]
+            # The entity may have been found through another name (e.g. an
+            # attribute inherited from the class)
+            if targ_str in namespace:
+                del namespace[targ_str]
             utils.delete_sub_aliases(targ_str, namespace)
         # Type III: Non-entity assigned to known entity (NE1 = E1)
         elif not targ_entity and val_entity:
             namespace[targ_str] = val_entity
 
+    def _process_unpacking(self, target, val_entity):
+        """
+        Handles assignments to tuples and lists of targets (e.g. `a, *b = c`),
+        whose elements are bound to the elements of the value if it's a
+        Container, and to the value itself otherwise; and assignments to items
+        of Containers (e.g. `x[0] = a`). Other targets are handled by
+        `_process_assignment`.
+
+        Parameters
+        ----------
+        target : ast.AST
+            node representing the left-hand-side of the assignment
+        val_entity : {ObjectNode, Function, Class, ClassInstance, Container, None}
+            namespace entity corresponding to the right-hand-side of the
+            assignment
+        """
+
+        if isinstance(target, (ast.Tuple, ast.List)):
+            star_index = next(
+                (i for i, elt in enumerate(target.elts) if isinstance(elt, ast.Starred)),
+                None
+            )
+            if isinstance(val_entity, Container):
+                elt_entities = val_entity.unpack(len(target.elts), star_index)
+            else:
+                elt_entities = [val_entity] * len(target.elts)
+                if star_index is not None:
+                    elt_entities[star_index] = None
+
+            for elt, elt_entity in zip(target.elts, elt_entities):
+                if isinstance(elt, ast.Starred):
+                    elt = elt.value
+
+                self._process_unpacking(elt, elt_entity)
+
+            return
+
+        if isinstance(target, ast.Subscript):
+            target_str = utils.stringify_node(target.value)
+            container = self._namespace.get(target_str)
+            if isinstance(container, Container):
+                key, is_known_key = utils.get_constant(target.slice)
+                if not is_known_key:
+                    self.visit(target.slice)
+
+                container.set_element(val_entity, key, is_known_key)
+                return
+
+        self._process_assignment(target, val_entity)
+
+    def _process_container(self, kind, elements, keys=None):
+        """
+        Processes the elements of a list, tuple, set, or dict literal and
+        summarizes them in a Container.
+
+        Parameters
+        ----------
+        kind : str
+            type of container
+        elements : list
+            nodes of the elements (or of the values, for dicts)
+        keys : {list, None}
+            nodes of a dict's keys (None for `**` entries)
+
+        Returns
+        -------
+        Container
+        """
+
+        container = Container(kind, is_ordered=kind != "set")
+        for index, element in enumerate(elements):
+            key, is_known_key = None, False
+            if keys is not None:
+                if keys[index] is None: # e.g. {**a}
+                    entity = self._process_node(element)[1]
+                    self._extend_container(container, entity)
+                    continue
+
+                key, is_known_key = utils.get_constant(keys[index])
+                if not is_known_key:
+                    self._process_node(keys[index])
+
+            if isinstance(element, ast.Starred): # e.g. [*a]
+                entity = self._process_node(element.value)[1]
+                self._extend_container(container, entity)
+                continue
+
+            entity = self._process_node(element)[1]
+            container.add(entity, key if is_known_key else None)
+
+        return container
+
+    def _extend_container(self, container, entity):
+        # The positions of the elements are unknown once another container is
+        # unpacked into it
+        container.elements, container.keys = None, None
+        if isinstance(entity, Container):
+            for element in entity.entities or []:
+                container.add(element)
+
+            if entity.entities is None:
+                container.entities = None
+
+    def _call_container_method(self, container, method, call_token):
+        """
+        Processes a call of a Container's method (including subscripts, which
+        are tokenized as `__index__` calls), and returns the entity it produces.
+        """
+
+        arg_entities = []
+        for arg_token in call_token:
+            arg_entity, _ = self._process_attribute_chain(arg_token.arg_val)
+            arg_entities.append(arg_entity)
+
+        key, is_known_key = None, False
+        if len(call_token.args) == 1:
+            key, is_known_key = utils.get_constant(call_token.args[0].arg_val)
+
+        if method == "__index__":
+            if call_token.is_slice: # e.g. x[1:]
+                return container.get_slice()
+
+            return container.get_element(key, is_known_key)
+        elif method == "__iter__":
+            # Iterating over a dict produces its keys
+            if container.kind == "dict":
+                return None
+
+            element = container.get_element()
+            if element is None and container.entities:
+                self._iterated_entities = container.entities
+
+            return element
+        elif method in ("get", "pop"):
+            return container.get_element(key, is_known_key)
+        elif method == "values":
+            return container.get_slice()
+        elif method in ("append", "add") and arg_entities:
+            container.add(arg_entities[0])
+
+        return None
+
     def _process_attribute_chain(self, attribute_chain):
         """
         Master function for processing attribute chains. An attribute chain is a
@@ -547,6 +1096,7 @@ class Saplings(ast.NodeVisitor):
 
         current_entity = None
         current_instance = {"entity": None, "init_index": 0}
+        container_method = None
         for index, token in enumerate(attribute_chain):
             if index and not current_entity:
                 self._break_and_process_nested_chains(
@@ -557,7 +1107,21 @@ class Saplings(ast.NodeVisitor):
                 break
 
             if isinstance(token, tkn.CallToken):
-                if isinstance(current_entity, Function):
+                if container_method:
+                    current_entity = self._call_container_method(
+                        current_entity,
+                        container_method,
+                        token
+                    )
+                    container_method = None
+                    if isinstance(current_entity, ObjectNode):
+                        self._increment_count(current_entity)
+                    elif isinstance(current_entity, ClassInstance):
+                        current_instance["entity"] = current_entity
+                        current_instance["init_index"] = index
+
+                    continue
+                elif isinstance(current_entity, Function):
                     if current_instance["entity"]:
                         # Process call of function from instance of a
                         # user-defined class
@@ -588,11 +1152,13 @@ class Saplings(ast.NodeVisitor):
                     continue
                 elif isinstance(current_entity, Class):
                     # Process instantiation of user-defined class
+                    if self._recorder:
+                        self._recorder.record_use(current_entity)
 
-                    init_namespace = current_entity.init_instance_namespace
+                    init_namespace = current_entity.get_namespace()
                     class_instance = ClassInstance(
                         current_entity,
-                        init_namespace.copy()
+                        InstanceNamespace(init_namespace)
                     )
 
                     if "__init__" in init_namespace:
@@ -613,12 +1179,12 @@ class Saplings(ast.NodeVisitor):
                             )
                             break
 
-                            # BUG: __init__ may be a lambda function or an
-                            # ObjectNode (e.g. __init__ = module.imported_init)
+                            # BUG: __init__ may be an ObjectNode (e.g.
+                            # __init__ = module.imported_init)
                     else:
-                        # BUG: If __init__ is defined in the base class then
-                        # it's a black box and may make unknown changes to the
-                        # instance namespace
+                        # BUG: If __init__ is defined in a base class that
+                        # isn't user-defined then it's a black box and may
+                        # make unknown changes to the instance namespace
                         pass
 
                     current_entity = class_instance
@@ -631,8 +1197,8 @@ class Saplings(ast.NodeVisitor):
                     if "__call__" in current_entity.namespace:
                         call_entity = current_entity.namespace["__call__"]
 
-                        # BUG: __call__ may be a lambda function or an
-                        # ObjectNode (e.g. __call__ = module.imported_call)
+                        # BUG: __call__ may be an ObjectNode (e.g.
+                        # __call__ = module.imported_call)
                         if isinstance(call_entity, Function):
                             current_entity = self._process_method_call(
                                 call_entity,
@@ -653,15 +1219,19 @@ class Saplings(ast.NodeVisitor):
                     )
                     break
 
-                    # BUG: If __call__ is defined in the base class then
-                    # breaking could produce false negatives
+                    # BUG: If __call__ is defined in a base class that isn't
+                    # user-defined then breaking could produce false negatives
                 else:
                     for arg_token in token:
                         self._process_attribute_chain(arg_token.arg_val)
             elif not isinstance(token, tkn.NameToken): # token is ast.AST node
-                self.visit(token)
+                entity = self.visit(token)
+                if not index and isinstance(entity, (Container, Function)):
+                    # e.g. [a, b][0] or (lambda x: x.attr)(module.foo)
+                    current_entity = entity
+                    continue
 
-                # TODO (V1): Handle IfExps and Lambdas (e.g. (lambda x: x.attr)(module.foo))
+                # TODO (V1): Handle IfExps
 
                 self._break_and_process_nested_chains(
                     attribute_chain[index + 1:],
@@ -678,16 +1248,27 @@ class Saplings(ast.NodeVisitor):
                 token_seq = attribute_chain[:index + 1]
 
             token_str = tkn.stringify_tokenized_nodes(token_seq)
-            if token_str in namespace:
+            is_method_call = index + 1 < len(attribute_chain) \
+                and isinstance(attribute_chain[index + 1], tkn.CallToken)
+            if isinstance(current_entity, Container) and is_method_call \
+                    and str(token) in CONTAINER_METHODS:
+                container_method = str(token)
+            elif token_str in namespace:
                 current_entity = namespace[token_str]
                 if isinstance(current_entity, ClassInstance):
                     current_instance["entity"] = current_entity
                     current_instance["init_index"] = index
                 elif isinstance(current_entity, ObjectNode):
-                    current_entity.increment_count()
+                    self._increment_count(current_entity)
+            elif isinstance(current_entity, Class) \
+                    and str(token) in current_entity.get_namespace():
+                # Attribute inherited from a user-defined base class
+                current_entity = current_entity.get_namespace()[str(token)]
+                if isinstance(current_entity, ObjectNode):
+                    self._increment_count(current_entity)
             elif isinstance(current_entity, ObjectNode):
                 # Base node exists –– create and append its child
-                current_entity = current_entity.add_child(ObjectNode(str(token)))
+                current_entity = self._add_child(current_entity, ObjectNode(str(token)))
                 namespace[token_str] = current_entity
             else:
                 current_entity = None
@@ -705,10 +1286,25 @@ class Saplings(ast.NodeVisitor):
         TODO
         """
 
+        if self._recorder:
+            self._recorder.location = node
+
         for module in node.names:
             if module.name.startswith('.'): # Ignores relative imports
                 continue
 
+            if self._importer:
+                entities = self._importer.import_module(
+                    module.name,
+                    module.asname,
+                    self._object_hierarchies
+                )
+                if entities is not None: # First-party module
+                    for alias_id, entity in entities.items():
+                        self._namespace[alias_id] = entity
+
+                    continue
+
             alias = module.asname if module.asname else module.name
             module_leaf_node = self._process_module(
                 module=module.name,
@@ -722,6 +1318,30 @@ class Saplings(ast.NodeVisitor):
         TODO
         """
 
+        if self._recorder:
+            self._recorder.location = node
+
+        aliases = node.names
+        if self._importer:
+            entities = self._importer.import_from(
+                node.module,
+                node.level,
+                [(alias.name, alias.asname) for alias in node.names],
+                self._object_hierarchies
+            )
+            if entities is not None: # First-party module
+                for alias_id, entity in entities.items():
+                    self._namespace[alias_id] = entity
+
+                # Names the module doesn't bind are treated as attributes of
+                # an external module
+                aliases = [
+                    alias for alias in node.names
+                    if alias.name != '*' and (alias.asname or alias.name) not in entities
+                ]
+                if not aliases:
+                    return
+
         if node.level: # Ignores relative imports
             return
 
@@ -730,7 +1350,7 @@ class Saplings(ast.NodeVisitor):
             standard_import=False
         )
 
-        for alias in node.names:
+        for alias in aliases:
             if alias.name == '*': # Ignore star imports
                 continue
 
@@ -741,6 +1361,10 @@ class Saplings(ast.NodeVisitor):
                 if alias.name == child.name:
                     child_exists = True
                     self._namespace[alias_id] = child
+                    if not child.frequency: # Grafted from a first-party module
+                        self._increment_count(child)
+                    elif self._recorder:
+                        self._recorder.record_use(child)
 
                     break
 
@@ -748,34 +1372,72 @@ class Saplings(ast.NodeVisitor):
                 new_child = ObjectNode(alias.name)
                 self._namespace[alias_id] = new_child
 
-                module_node.add_child(new_child)
+                self._add_child(module_node, new_child)
 
     def visit_Assign(self, node):
         """
         TODO
         """
 
-        if isinstance(node.value, ast.Tuple):
-            values = []
-            for value in node.value.elts:
-                _, val_entity, _ = self._process_node(value)
-                values.append(val_entity)
-        else:
-            _, values, _ = self._process_node(node.value)
+        if getattr(node, "is_loop_target", False):
+            self._bind_loop_target(node)
+            return
+
+        _, val_entity, _ = self._process_node(node.value)
 
         targets = node.targets if hasattr(node, "targets") else (node.target,)
         for target in targets: # Multiple assignment (e.g. a = b = ...)
-            if isinstance(target, ast.Tuple): # Unpacking (e.g. a, b = ...)
-                for index, elt in enumerate(target.elts):
-                    if isinstance(values, list):
-                        self._process_assignment(elt, values[index])
-                    else:
-                        self._process_assignment(elt, values)
-            elif isinstance(values, list):
-                for value in values:
-                    self._process_assignment(target, value)
-            else:
-                self._process_assignment(target, values)
+            self._process_unpacking(target, val_entity)
+
+    def _bind_loop_target(self, node):
+        """
+        Binds the target of a `for` loop to the elements of its iterable. When
+        the iterable is a Container of several distinct entities, the target
+        is bound to each of them in turn: in path-sensitive mode, the state is
+        forked once per entity; otherwise, `visit_For` processes the body once
+        per entity (see `_visit_body_per_element`).
+        """
+
+        self._iterated_entities = None
+        _, val_entity, _ = self._process_node(node.value)
+        entities, self._iterated_entities = self._iterated_entities, None
+
+        if not entities:
+            self._process_unpacking(node.target, val_entity)
+        elif not self._max_states:
+            node.element_entities = entities
+        else:
+            state, states = self._state, []
+            for entity in entities:
+                self._activate_state(self._fork_state(state))
+                self._process_unpacking(node.target, entity)
+                states.append(self._state)
+
+            self._join_states(states)
+
+    def _visit_body_per_element(self, target, entities, body):
+        """
+        Processes the body of a `for` loop once per distinct element of its
+        iterable, bound to the target. Like a statement processed in several
+        states, a use of a node in the body is counted once, no matter how
+        many passes it's processed in (see `states.StateLog`).
+        """
+
+        outer_recorder = self._recorder
+        self._recorder = log = sts.StateLog(outer_recorder)
+        is_halted = True
+        try:
+            for entity in entities:
+                log.begin()
+                self._is_traversal_halted = False
+                self._process_unpacking(target, entity)
+                self.visit(ast.Module(body=body))
+                is_halted = is_halted and self._is_traversal_halted
+        finally:
+            self._recorder = outer_recorder
+
+        log.commit()
+        self._is_traversal_halted = is_halted
 
     def visit_AnnAssign(self, node):
         self.visit_Assign(node)
@@ -827,6 +1489,8 @@ class Saplings(ast.NodeVisitor):
             type_comment : string containing the PEP 484 type comment
         """
 
+        default_entities = self._process_default_args(node.args)
+
         # NOTE: namespace is only used if the function is never called or if its
         # a closure
         function = Function(
@@ -835,12 +1499,16 @@ class Saplings(ast.NodeVisitor):
             is_closure=False,
             called=False
         )
+        function.is_generator = smry.is_generator(node)
+        function.default_entities = default_entities
         self._namespace[node.name] = function
         self._functions.add(function)
 
         if node.decorator_list:
+            # Copied since create_decorator_call_node consumes the list, and
+            # the same node may be visited more than once
             decorator_call_node = utils.create_decorator_call_node(
-                node.decorator_list,
+                list(node.decorator_list),
                 ast.Name(node.name)
             )
             _, entity, _ = self._process_node(decorator_call_node)
@@ -861,45 +1529,116 @@ class Saplings(ast.NodeVisitor):
 
     def visit_Lambda(self, node):
         """
-        TODO
+        Handles lambda functions, which are Functions whose body is a return
+        statement. Lambdas are closures over the namespace they're defined in,
+        with their parameters unbound; like functions, they're processed when
+        they're called, or at the end of the traversal if they never are.
+
+        Parameters
+        ----------
+        node : ast.Lambda
+            args : ast.arguments node
+            body : expression returned by the lambda
+
+        Returns
+        -------
+        Function
+            lambda function entity
         """
 
+        default_entities = self._process_default_args(node.args)
+
         namespace = self._namespace.copy()
-        args = node.args.args + node.args.kwonlyargs
+        args = getattr(node.args, "posonlyargs", []) + node.args.args + node.args.kwonlyargs
         if node.args.vararg:
             args += [node.args.vararg]
         if node.args.kwarg:
             args += [node.args.kwarg]
 
-        # node.args.default
         for arg in args:
             arg_name = arg.arg
             if arg_name not in namespace:
                 continue
 
             del namespace[arg_name]
+            utils.delete_sub_aliases(arg_name, namespace)
 
-        self._process_subtree_in_new_scope(node.body, namespace)
+        function = Function(node, namespace, is_closure=True, called=False)
+        function.default_entities = default_entities
+        self._functions.add(function)
 
-        # TODO (V1): Handle assignments to lambdas and lambda function calls
+        return function
 
     def visit_Return(self, node):
         """
         TODO
         """
 
-        if node.value:
+        # In path-sensitive mode, the first path to return sets the return
+        # value, like the first `if` block does otherwise
+        is_returned = self._max_states and self._return_value
+        if node.value and not is_returned:
             _, self._return_value, _ = self._process_node(node.value)
             # BUG: What about instance, returned by _process_node?
+        elif node.value:
+            self._process_node(node.value)
 
         self._is_traversal_halted = True
 
+    def visit_Yield(self, node):
+        """
+        Handles `yield` expressions by adding the yielded entity to the
+        generator's elements. The value sent into the generator (i.e. the value
+        of the expression) isn't tracked.
+        """
+
+        if self._yielded is None:
+            self._yielded = Container("generator", is_ordered=False)
+
+        if node.value:
+            _, entity, _ = self._process_node(node.value)
+            self._yielded.add(entity)
+
+        return None
+
+    def visit_YieldFrom(self, node):
+        """
+        Handles `yield from` expressions by adding the elements of the
+        delegated-to iterable to the generator's elements. Like in `for` loops,
+        an element is the output of the iterable's `__iter__` method.
+        """
+
+        if self._yielded is None:
+            self._yielded = Container("generator", is_ordered=False)
+
+        iter_call = ast.Call(
+            func=ast.Attribute(value=node.value, attr="__iter__", ctx=ast.Load()),
+            args=[],
+            keywords=[]
+        )
+        _, entity, _ = self._process_node(ast.copy_location(iter_call, node.value))
+        self._yielded.add(entity)
+
+        return None
+
     def visit_ClassDef(self, node):
         """
         TODO
         """
 
-        for base_node in node.bases: # TODO (V2): Handle inheritance
+        # User-defined base classes are resolved through the MRO (see
+        # `Class.get_mro`); other bases are treated as calls
+        bases = []
+        for base_node in node.bases:
+            base_str = utils.stringify_node(base_node)
+            if base_str in self._namespace and isinstance(self._namespace[base_str], Class):
+                base_entity = self._namespace[base_str]
+                if self._recorder:
+                    self._recorder.record_use(base_entity)
+
+                bases.append(base_entity)
+                continue
+
             self.visit(ast.Call(func=base_node, args=[], keywords=[]))
 
         # TODO (V2): Handle metaclasses
@@ -909,7 +1648,9 @@ class Saplings(ast.NodeVisitor):
         for n in node.body:
             if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef)):
                 for decorator in n.decorator_list:
-                    if decorator.id == "staticmethod":
+                    if not isinstance(decorator, ast.Name): # E.g. @x.setter
+                        continue
+                    elif decorator.id == "staticmethod":
                         n.method_type = "static"
                         break
                     elif decorator.id == "classmethod":
@@ -946,7 +1687,7 @@ class Saplings(ast.NodeVisitor):
             self._namespace.copy()
         )._namespace
 
-        class_entity = Class(node, self._namespace.copy())
+        class_entity = Class(node, self._namespace.copy(), bases=bases)
         self._namespace[node.name] = class_entity
 
         static_variable_map = {}
@@ -1010,6 +1751,14 @@ class Saplings(ast.NodeVisitor):
 
         self.visit(node.test)
 
+        if self._max_states:
+            else_state = self._fork_state(self._state)
+            body_states = self._visit_block_in_states(node.body, [self._state])
+            else_states = self._visit_block_in_states(node.orelse, [else_state])
+            self._join_states(body_states + else_states)
+
+            return
+
         # If node is processed last so the Else nodes are processed with an
         # unaltered namespace
         for else_node in node.orelse:
@@ -1052,19 +1801,31 @@ class Saplings(ast.NodeVisitor):
         """
 
         # We treat the target as a subscript of iter
+        iter_call = ast.Call(
+            func=ast.Attribute(
+                value=node.iter,
+                attr="__iter__",
+                ctx=ast.Load()
+            ),
+            args=[],
+            keywords=[]
+        )
         target_assignment = ast.Assign(
             target=node.target,
-            value=ast.Call(
-                func=ast.Attribute(
-                    value=node.iter,
-                    attr="__iter__",
-                    ctx=ast.Load()
-                ),
-                args=[],
-                keywords=[]
-            )
+            value=ast.copy_location(iter_call, node.iter)
         )
-        self.visit(ast.Module(body=[target_assignment] + node.body))
+        ast.copy_location(target_assignment, node.iter)
+        target_assignment.is_loop_target = True
+        if self._max_states:
+            self._visit_loop_in_states([target_assignment] + node.body, node.orelse)
+            return
+
+        self.visit(target_assignment)
+        entities = getattr(target_assignment, "element_entities", None)
+        if entities:
+            self._visit_body_per_element(node.target, entities, node.body)
+        else:
+            self.visit(ast.Module(body=node.body))
 
         if not self._is_traversal_halted:
             self.visit(ast.Module(body=node.orelse))
@@ -1082,6 +1843,10 @@ class Saplings(ast.NodeVisitor):
         TODO
         """
 
+        if self._max_states:
+            self._visit_loop_in_states(node.body, node.orelse)
+            return
+
         self.visit(ast.Module(body=node.body))
 
         if not self._is_traversal_halted:
@@ -1097,6 +1862,10 @@ class Saplings(ast.NodeVisitor):
         TODO
         """
 
+        if self._max_states:
+            self._visit_try_in_states(node)
+            return
+
         for except_handler_node in node.handlers:
             self.visit_ExceptHandler(except_handler_node)
 
@@ -1109,6 +1878,52 @@ class Saplings(ast.NodeVisitor):
         # node.finalbody is executed no matter what
         self.visit(ast.Module(body=node.finalbody))
 
+    def _visit_loop_in_states(self, body, orelse):
+        """
+        Path-sensitive version of `visit_For` and `visit_While`: the loop body
+        is either executed or skipped, and the `else` block runs on both paths
+        unless the body breaks out of the loop.
+        """
+
+        skipped_state = self._fork_state(self._state)
+        states = self._visit_block_in_states(body, [self._state])
+        states = self._visit_block_in_states(orelse, states + [skipped_state])
+
+        # If loop is broken by anything other than a return statement, then we
+        # don't want to halt the traversal outside of the loop
+        if not self._return_value:
+            for state in states:
+                state.is_halted = False
+
+        self._join_states(states)
+
+    def _visit_try_in_states(self, node):
+        """
+        Path-sensitive version of `visit_Try`: each exception handler starts
+        from the namespace before the `try` block, and `finally` runs on the
+        paths through the `try`/`else` blocks and through every handler.
+        """
+
+        state, handler_states = self._state, []
+        for handler in node.handlers:
+            body = handler.body
+            if handler.type and handler.name:
+                exception_alias_assign_node = ast.Assign(
+                    targets=[ast.Name(id=handler.name, ctx=ast.Store())],
+                    value=handler.type
+                )
+                ast.copy_location(exception_alias_assign_node, handler.type)
+                body = [exception_alias_assign_node] + body
+            elif handler.type:
+                body = [ast.copy_location(ast.Expr(value=handler.type), handler.type)] + body
+
+            handler_states += self._visit_block_in_states(body, [self._fork_state(state)])
+
+        states = self._visit_block_in_states(node.body, [state])
+        states = self._visit_block_in_states(node.orelse, states)
+        states = self._visit_block_in_states(node.finalbody, states + handler_states)
+        self._join_states(states)
+
     def visit_ExceptHandler(self, node):
         """
         TODO
@@ -1122,7 +1937,8 @@ class Saplings(ast.NodeVisitor):
                 targets=[ast.Name(id=node.name, ctx=ast.Store())],
                 value=node.type
             )
-            body_to_process.insert(0, exception_alias_assign_node)
+            ast.copy_location(exception_alias_assign_node, node.type)
+            body_to_process = [exception_alias_assign_node] + body_to_process
         elif node.type:
             self.visit(node.type)
 
@@ -1141,7 +1957,7 @@ class Saplings(ast.NodeVisitor):
                 targets=[node.optional_vars],
                 value=node.context_expr
             )
-            self.visit(assign_node)
+            self.visit(ast.copy_location(assign_node, node.context_expr))
         else:
             self.visit(node.context_expr)
 
@@ -1186,40 +2002,66 @@ class Saplings(ast.NodeVisitor):
     #   my_var = [module.func0(), module.func1(), module.func2()]
     #   my_var[0].attr
 
+    def visit_List(self, node):
+        return self._process_container("list", node.elts)
+
+    def visit_Tuple(self, node):
+        return self._process_container("tuple", node.elts)
+
+    def visit_Set(self, node):
+        return self._process_container("set", node.elts)
+
+    def visit_Dict(self, node):
+        return self._process_container("dict", node.values, node.keys)
+
     def _comprehension_helper(self, elts, generators):
         """
-        TODO
+        Processes a comprehension in its own scope, and returns the entity
+        produced by its last element expression (e.g. the value of a dict
+        comprehension).
         """
 
+        # The synthesized nodes take the position of the nodes they stand for,
+        # so that uses are located there rather than at the enclosing statement
         comprehension_body = []
         for generator in generators:
+            iter_subscript = ast.Subscript(
+                value=generator.iter,
+                slice=ast.Index(value=ast.NameConstant(None)),
+                ctx=ast.Load()
+            )
             iter_node = ast.Assign(
                 target=generator.target,
-                value=ast.Subscript(
-                    value=generator.iter,
-                    slice=ast.Index(value=ast.NameConstant(None)),
-                    ctx=ast.Load()
-                )
+                value=ast.copy_location(iter_subscript, generator.iter)
             )
-            comprehension_body.append(iter_node)
+            comprehension_body.append(ast.copy_location(iter_node, generator.iter))
             comprehension_body.extend(generator.ifs)
 
-        self._process_subtree_in_new_scope(
-            ast.Module(body=comprehension_body + elts),
+        return_node = ast.copy_location(ast.Return(value=elts[-1]), elts[-1])
+        comprehension_saplings = self._process_subtree_in_new_scope(
+            ast.Module(body=comprehension_body + elts[:-1] + [return_node]),
             self._namespace.copy()
         )
 
+        return comprehension_saplings._return_value
+
+    def _comprehension_container(self, kind, elts, generators):
+        container = Container(kind, is_ordered=False)
+        container.add(self._comprehension_helper(elts, generators))
+
+        return container
+
     def visit_ListComp(self, node):
-        self._comprehension_helper([node.elt], node.generators)
+        return self._comprehension_container("list", [node.elt], node.generators)
 
     def visit_SetComp(self, node):
-        return self.visit_ListComp(node)
+        return self._comprehension_container("set", [node.elt], node.generators)
 
     def visit_GeneratorExp(self, node):
-        return self.visit_ListComp(node)
+        return self._comprehension_container("generator", [node.elt], node.generators)
 
     def visit_DictComp(self, node):
-        self._comprehension_helper([node.key, node.value], node.generators)
+        return self._comprehension_container("dict", [node.key, node.value], node.generators)
 
     ## Public Methods ##
 
@@ -1230,6 +2072,10 @@ class Saplings(ast.NodeVisitor):
 
         trees = []
         for root_node in self._object_hierarchies:
+            # Nodes grafted in from first-party modules that were never used
+            if self._importer and not utils.prune_unused_nodes(root_node):
+                continue
+
             utils.consolidate_call_nodes(root_node)
             trees.append(root_node)
 
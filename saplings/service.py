@@ -0,0 +1,299 @@
+# Standard Library
+import asyncio
+import multiprocessing
+import os
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+
+# Local Modules
+from saplings.analysis import analyze_source
+from saplings.rendering import dictify_tree
+
+QUEUE_SIZE_PER_WORKER = 4
+
+
+#########
+# WORKERS
+#########
+
+
+def _make_picklable(error):
+    try:
+        pickle.loads(pickle.dumps(error))
+        return error
+    except Exception:
+        return RuntimeError(f"{type(error).__name__}: {error}")
+
+
+def _serve(connection):
+    """
+    Main loop of a worker process: analyzes the `(source, filename, modules)`
+    requests it receives, until it's killed. Replies are `(is_ok, value)`
+    tuples, where `value` is a list of dictified trees or the exception that
+    the analysis raised.
+    """
+
+    while True:
+        source, filename, modules = connection.recv()
+        try:
+            trees = analyze_source(source, filename, modules)
+            reply = (True, [dictify_tree(tree) for tree in trees])
+        except Exception as error:
+            reply = (False, _make_picklable(error))
+
+        connection.send(reply)
+
+
+class _Worker(object):
+    """
+    Handle on a worker process and the parent's end of its pipe.
+    """
+
+    def __init__(self, context):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child_connection,), daemon=True)
+        self.process.start()
+        child_connection.close()
+
+    def exchange(self, request):
+        self.connection.send(request)
+        return self.connection.recv()
+
+    def stop(self):
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+
+class WorkerCrashedError(RuntimeError):
+    """
+    Raised when a worker process dies in the middle of an analysis (e.g. if
+    it's killed for running out of memory).
+    """
+
+
+###############
+# ANALYSIS POOL
+###############
+
+
+class AnalysisPool(object):
+    """
+    Pool of worker processes that analyze sources off the event loop, for
+    asyncio applications (e.g. web services), where analyzing a large file
+    would otherwise block the loop.
+
+    Requests wait in a bounded queue, so callers are slowed down (rather than
+    the queue growing without bound) when sources arrive faster than the
+    workers can analyze them. Each worker takes one request at a time from
+    the queue. If a request is cancelled or times out while it's being
+    analyzed, its worker is killed and replaced, so abandoned analyses don't
+    keep using CPU.
+
+    The worker processes are started on first use and bound to the event loop
+    they're started in.
+    """
+
+    def __init__(self, workers=None, max_queued=None, timeout=None, context=None):
+        """
+        Parameters
+        ----------
+        workers : {int, None}
+            number of worker processes; the number of CPUs if None
+        max_queued : {int, None}
+            number of requests that can wait for a worker before callers start
+            waiting to enqueue theirs; `QUEUE_SIZE_PER_WORKER` per worker if
+            None
+        timeout : {float, None}
+            default timeout of a request, in seconds; no timeout if None
+        context : {multiprocessing.context.BaseContext, None}
+            multiprocessing context the workers are started with; the "spawn"
+            context if None, since forking a process that runs threads (as an
+            event loop's executors do) isn't safe
+        """
+
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queued = max_queued or QUEUE_SIZE_PER_WORKER * self.workers
+        self.timeout = timeout
+        self.context = context or multiprocessing.get_context("spawn")
+
+        self._loop = None
+        self._requests = None # Queue of (source, filename, modules, future) tuples
+        self._dispatchers = []
+        self._receivers = None # Threads that wait on the workers' pipes
+
+    ## Helpers ##
+
+    def _start(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+
+        # Dispatchers from a previous (closed) loop were cancelled with it
+        self._loop = loop
+        self._requests = asyncio.Queue(self.max_queued)
+        if self._receivers is None:
+            self._receivers = ThreadPoolExecutor(self.workers)
+        self._dispatchers = [loop.create_task(self._dispatch()) for _ in range(self.workers)]
+
+    async def _dispatch(self):
+        worker = _Worker(self.context)
+        try:
+            while True:
+                source, filename, modules, future = await self._requests.get()
+                if future.done(): # Cancelled or timed out while queued
+                    continue
+
+                worker = await self._run(worker, (source, filename, modules), future)
+        finally:
+            worker.stop()
+
+    async def _run(self, worker, request, future):
+        """
+        Runs one request on a worker and resolves its future. Returns the
+        worker to use for the next request (a new one if this one was killed or
+        crashed).
+        """
+
+        reply = self._loop.run_in_executor(self._receivers, worker.exchange, request)
+        try:
+            await asyncio.wait((reply, future), return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError: # The pool is closing
+            reply.add_done_callback(lambda reply: reply.exception())
+            future.cancel()
+            raise
+
+        if not reply.done(): # Cancelled or timed out while running
+            worker.process.kill()
+            await asyncio.wait((reply,)) # Unblocked by the end of the pipe closing
+            reply.exception()
+            worker.stop()
+
+            return _Worker(self.context)
+
+        try:
+            is_ok, value = reply.result()
+        except (EOFError, OSError):
+            worker.stop()
+            if not future.done():
+                exit_code = worker.process.exitcode
+                future.set_exception(WorkerCrashedError(f"worker exited with code {exit_code}"))
+
+            return _Worker(self.context)
+
+        if not future.done():
+            if is_ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+        return worker
+
+    async def _submit(self, source, filename, modules):
+        future, requests = self._loop.create_future(), self._requests
+        try:
+            await requests.put((source, filename, modules, future))
+            if requests is not self._requests: # Closed while waiting to enqueue
+                raise RuntimeError("analysis pool was closed")
+
+            return await future
+        finally:
+            future.cancel() # Tells the dispatcher to abandon the request, if needed
+
+    ## Public Methods ##
+
+    async def analyze(self, source, filename="<unknown>", modules=None, timeout=None):
+        """
+        Parses a program and extracts its object hierarchies in a worker
+        process (see `analysis.analyze_source`).
+
+        Parameters
+        ----------
+        source : {str, bytes}
+            source code of the program
+        filename : str
+            name used in syntax errors; sources whose name ends in `.ipynb`
+            are parsed as Jupyter notebooks
+        modules : {set, None}
+            names of the root modules to keep; all hierarchies are kept if None
+        timeout : {float, None}
+            seconds to wait for the result, including the time spent waiting
+            for a worker; the pool's default timeout if None
+
+        Returns
+        -------
+        list
+            dictified object hierarchies (see `rendering.dictify_tree`), which
+            can be serialized as JSON
+
+        Raises
+        ------
+        SyntaxError
+            if the program can't be parsed (or whatever else the analysis
+            raises)
+        asyncio.TimeoutError
+            if the timeout expires
+        WorkerCrashedError
+            if the worker process died
+        """
+
+        self._start()
+        timeout = self.timeout if timeout is None else timeout
+
+        return await asyncio.wait_for(self._submit(source, filename, modules), timeout)
+
+    async def close(self):
+        """
+        Stops the worker processes. Requests that are still queued or running
+        are cancelled.
+        """
+
+        for dispatcher in self._dispatchers:
+            dispatcher.cancel()
+
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        while self._requests is not None and not self._requests.empty():
+            self._requests.get_nowait()[-1].cancel()
+
+        if self._receivers is not None:
+            self._receivers.shutdown()
+
+        self._loop, self._requests = None, None
+        self._dispatchers, self._receivers = [], None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+_default_pool = None
+
+
+async def analyze_async(source, filename="<unknown>", modules=None, timeout=None, pool=None):
+    """
+    Coroutine version of `analysis.analyze_source`, for asyncio applications:
+    the source is parsed and analyzed in a worker process, so the event loop
+    isn't blocked. See `AnalysisPool.analyze` for the parameters.
+
+    Parameters
+    ----------
+    pool : {AnalysisPool, None}
+        pool the source is analyzed in; a shared pool with the default
+        settings, created on first use, if None
+
+    Returns
+    -------
+    list
+        dictified object hierarchies (see `rendering.dictify_tree`)
+    """
+
+    global _default_pool
+    if pool is None:
+        if _default_pool is None:
+            _default_pool = AnalysisPool()
+
+        pool = _default_pool
+
+    return await pool.analyze(source, filename, modules, timeout)
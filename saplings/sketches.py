@@ -0,0 +1,338 @@
+# Standard Library
+import heapq
+import math
+from array import array
+from hashlib import blake2b
+
+# Local Modules
+from saplings.rendering import iter_tree_paths
+
+DEFAULT_SKETCH_WIDTH = 1 << 18
+DEFAULT_SKETCH_DEPTH = 4
+DEFAULT_TOP_K = 100
+DEFAULT_HLL_PRECISION = 10
+
+
+class CountMinSketch(object):
+    """
+    Approximate counter with a fixed memory footprint (`width * depth`
+    counters), no matter how many distinct keys are counted. Estimates never
+    undercount; with probability at least `1 - e^-depth`, a key's estimate
+    overcounts by at most `e / width` times the total of all counts.
+
+    Uses conservative updates, which only raise the counters that are at the
+    minimum, and so overcount less than plain count-min in practice.
+    """
+
+    def __init__(self, width=DEFAULT_SKETCH_WIDTH, depth=DEFAULT_SKETCH_DEPTH):
+        """
+        Parameters
+        ----------
+        width : int
+            counters per row; the error bound is inversely proportional to it
+        depth : int
+            number of rows (hash functions); the probability that the error
+            bound doesn't hold decreases exponentially with it
+        """
+
+        self.width = width
+        self.depth = depth
+        self.total = 0
+
+        self._rows = [array('q', bytes(8 * width)) for _ in range(depth)]
+
+    @classmethod
+    def from_error(cls, epsilon, delta):
+        """
+        Creates a sketch whose estimates overcount by at most `epsilon` times
+        the total, with probability at least `1 - delta`.
+        """
+
+        return cls(math.ceil(math.e / epsilon), math.ceil(math.log(1 / delta)))
+
+    @property
+    def error_bound(self):
+        """
+        Maximum overcount of an estimate (with probability `1 - e^-depth`).
+        """
+
+        return math.ceil(math.e / self.width * self.total)
+
+    def _indices(self, key):
+        # Double hashing: the ith index is h1 + i * h2
+        digest = blake2b(key.encode("utf-8", "surrogateescape"), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little")
+
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def add(self, key, count=1):
+        """
+        Adds `count` to a key's count and returns the key's new estimate.
+        """
+
+        indices = self._indices(key)
+        estimate = min(row[i] for row, i in zip(self._rows, indices)) + count
+        for row, index in zip(self._rows, indices):
+            if row[index] < estimate:
+                row[index] = estimate
+
+        self.total += count
+        return estimate
+
+    def estimate(self, key):
+        return min(row[i] for row, i in zip(self._rows, self._indices(key)))
+
+
+class TopKPaths(object):
+    """
+    Streaming aggregation that keeps approximate counts of every API path in a
+    count-min sketch, plus the `k` paths with the highest estimated counts (the
+    heavy hitters) in a heap. Memory is set by `k`, `width`, and `depth`, not by
+    the number of files or distinct paths.
+    """
+
+    def __init__(self, k=DEFAULT_TOP_K, width=DEFAULT_SKETCH_WIDTH, depth=DEFAULT_SKETCH_DEPTH):
+        """
+        Parameters
+        ----------
+        k : int
+            number of heavy hitters to keep
+        width : int
+            see `CountMinSketch`
+        depth : int
+            see `CountMinSketch`
+        """
+
+        self.k = k
+        self.sketch = CountMinSketch(width, depth)
+
+        # Heavy hitters: estimates by path, and a min-heap of (estimate, path)
+        # with lazy deletion (entries whose estimate is stale are skipped)
+        self._estimates = {}
+        self._heap = []
+
+    def _pop_min(self):
+        while True:
+            estimate, path = heapq.heappop(self._heap)
+            if self._estimates.get(path) == estimate:
+                return estimate, path
+
+    def _peek_min(self):
+        while self._heap:
+            estimate, path = self._heap[0]
+            if self._estimates.get(path) == estimate:
+                return estimate
+
+            heapq.heappop(self._heap)
+
+        return None
+
+    def add(self, path, count=1):
+        estimate = self.sketch.add(path, count)
+
+        if path in self._estimates or len(self._estimates) < self.k:
+            self._estimates[path] = estimate
+            heapq.heappush(self._heap, (estimate, path))
+        elif estimate > self._peek_min():
+            _, evicted_path = self._pop_min()
+            del self._estimates[evicted_path]
+
+            self._estimates[path] = estimate
+            heapq.heappush(self._heap, (estimate, path))
+
+        # Keeps stale entries from piling up
+        if len(self._heap) > 4 * self.k + 64:
+            self._heap = [(e, p) for p, e in self._estimates.items()]
+            heapq.heapify(self._heap)
+
+    def add_trees(self, trees):
+        """
+        Adds the frequencies of every path in one file's object hierarchies.
+
+        Parameters
+        ----------
+        trees : list
+            root nodes of the hierarchies, either ObjectNodes or tuplified trees
+        """
+
+        for tree in trees:
+            if isinstance(tree, tuple):
+                self._add_tuplified_tree(tree, None)
+            else:
+                for path, node in iter_tree_paths(tree):
+                    self.add(path, node.frequency)
+
+    def _add_tuplified_tree(self, node_tuple, parent_path):
+        name, _, order, frequency, children = node_tuple
+        if parent_path is None:
+            path = name
+        else:
+            path = parent_path + "()" * order + '.' + name
+
+        self.add(path, frequency)
+        for child in children:
+            self._add_tuplified_tree(child, path)
+
+    def top(self):
+        """
+        Returns the heavy hitters, highest estimate first.
+
+        Returns
+        -------
+        list
+            `(path, estimate)` tuples; each path's true count is between
+            `estimate - error_bound` and `estimate` (with probability
+            `1 - e^-depth`)
+        """
+
+        return sorted(self._estimates.items(), key=lambda item: (-item[1], item[0]))
+
+    @property
+    def error_bound(self):
+        return self.sketch.error_bound
+
+
+class HyperLogLog(object):
+    """
+    Approximate counter of distinct items (e.g. the files that use an API
+    path), using `2^precision` one-byte registers no matter how many items are
+    added. The relative standard error is about `1.04 / sqrt(2^precision)`
+    (3.25% at the default precision of 10).
+
+    Sketches that have only seen a few items keep their registers in a dict
+    instead, since most nodes in a large corpus are used by a handful of files.
+    Two sketches with the same precision can be merged, giving the sketch of
+    the union of their items.
+    """
+
+    def __init__(self, precision=DEFAULT_HLL_PRECISION):
+        """
+        Parameters
+        ----------
+        precision : int
+            number of bits of the hash that select a register (4 to 16)
+        """
+
+        if not 4 <= precision <= 16:
+            raise ValueError(f"precision must be between 4 and 16, got {precision}")
+
+        self.precision = precision
+        self._num_registers = 1 << precision
+
+        self._sparse_registers = {} # Maps register indices to values
+        self._registers = None # bytearray once there are too many for a dict
+
+    ## Helpers ##
+
+    def _set_register(self, index, rank):
+        if self._registers is not None:
+            if self._registers[index] < rank:
+                self._registers[index] = rank
+        elif self._sparse_registers.get(index, 0) < rank:
+            self._sparse_registers[index] = rank
+            if len(self._sparse_registers) > self._num_registers // 32:
+                self._densify()
+
+    def _densify(self):
+        self._registers = bytearray(self._num_registers)
+        for index, rank in self._sparse_registers.items():
+            self._registers[index] = rank
+
+        self._sparse_registers = None
+
+    def _iter_registers(self):
+        if self._registers is not None:
+            return enumerate(self._registers)
+
+        return self._sparse_registers.items()
+
+    ## Public Methods ##
+
+    def add(self, item):
+        """
+        Adds an item (hashed by its string form).
+        """
+
+        digest = blake2b(str(item).encode("utf-8", "surrogateescape"), digest_size=8).digest()
+        hashed = int.from_bytes(digest, "little")
+
+        # The first bits pick the register, and the register keeps the
+        # position of the leftmost 1 in the remaining bits
+        num_bits = 64 - self.precision
+        remainder = hashed & ((1 << num_bits) - 1)
+        self._set_register(hashed >> num_bits, num_bits - remainder.bit_length() + 1)
+
+    def merge(self, other):
+        """
+        Merges another sketch into this one, in place.
+        """
+
+        if other.precision != self.precision:
+            raise ValueError("can't merge sketches with different precisions")
+
+        for index, rank in other._iter_registers():
+            if rank:
+                self._set_register(index, rank)
+
+    def copy(self):
+        sketch = HyperLogLog(self.precision)
+        sketch.merge(self)
+
+        return sketch
+
+    def count(self):
+        """
+        Returns the estimated number of distinct items added.
+        """
+
+        num_registers = self._num_registers
+        num_zeros, harmonic_sum = num_registers, 0.0
+        for _, rank in self._iter_registers():
+            if rank:
+                num_zeros -= 1
+                harmonic_sum += 2.0 ** -rank
+
+        harmonic_sum += num_zeros
+        if num_registers >= 128:
+            alpha = 0.7213 / (1 + 1.079 / num_registers)
+        else:
+            alpha = {16: 0.673, 32: 0.697, 64: 0.709}[num_registers]
+
+        estimate = alpha * num_registers * num_registers / harmonic_sum
+        if estimate <= 2.5 * num_registers and num_zeros:
+            # Small-range correction (linear counting)
+            estimate = num_registers * math.log(num_registers / num_zeros)
+
+        return int(round(estimate))
+
+    def to_bytes(self):
+        """
+        Serializes the sketch. Sparse sketches are stored as 3-byte (index,
+        value) pairs, so they stay small.
+        """
+
+        if self._registers is not None:
+            return bytes((self.precision, 0)) + bytes(self._registers)
+
+        payload = b"".join(
+            index.to_bytes(2, "little") + bytes((rank,))
+            for index, rank in sorted(self._sparse_registers.items())
+        )
+        return bytes((self.precision, 1)) + payload
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Inverse of `to_bytes`.
+        """
+
+        sketch = cls(data[0])
+        if data[1]:
+            for offset in range(2, len(data), 3):
+                index = int.from_bytes(data[offset:offset + 2], "little")
+                sketch._sparse_registers[index] = data[offset + 2]
+        else:
+            sketch._registers = bytearray(data[2:])
+            sketch._sparse_registers = None
+
+        return sketch
@@ -0,0 +1,412 @@
+# Standard Library
+from copy import copy
+
+# Local Modules
+from saplings.entities import ClassInstance, Container, InstanceNamespace
+from saplings.entities import MAX_CONTAINER_ENTITIES
+
+DEFAULT_MAX_STATES = 8
+
+
+########
+# STATES
+########
+
+
+MUTABLE_ENTITIES = (ClassInstance, Container)
+
+
+def _is_mutable(entity):
+    return isinstance(entity, MUTABLE_ENTITIES)
+
+
+def _get_base_name(name):
+    return name.split('.', 1)[0].split('(', 1)[0]
+
+
+def _is_version(entity, other_entity):
+    """
+    Checks whether two entities are versions of the same instance or container
+    on different paths (see `_fork_entity`).
+    """
+
+    return _is_mutable(entity) and type(entity) is type(other_entity) \
+        and entity.serial == other_entity.serial
+
+
+def _fork_entity(entity, memo):
+    """
+    Copies an instance or container, and the instances and containers it
+    holds, so that the path it's forked into can change it without the change
+    showing up on other paths. Other entities are shared. Copies keep the
+    serial of the entity they're copied from, which is how the versions of an
+    entity on different paths are matched up.
+    """
+
+    if id(entity) in memo:
+        return memo[id(entity)]
+
+    entity_copy = memo[id(entity)] = copy(entity)
+    if isinstance(entity, Container):
+        if entity.elements is not None:
+            entity_copy.elements = [
+                _fork_entity(e, memo) if _is_mutable(e) else e
+                for e in entity.elements
+            ]
+        if entity.entities is not None:
+            entity_copy.entities = [
+                _fork_entity(e, memo) if _is_mutable(e) else e
+                for e in entity.entities
+            ]
+
+        entity_copy.keys = copy(entity.keys)
+    else:
+        namespace = entity_copy.namespace = entity.namespace.copy()
+        own_namespace = getattr(namespace, "overlay", namespace)
+        for name, e in own_namespace.items():
+            if _is_mutable(e):
+                own_namespace[name] = _fork_entity(e, memo)
+
+    return entity_copy
+
+
+class State(object):
+    """
+    Namespace along one path through a block of code, in path-sensitive mode
+    (see the `max_states` parameter of `Saplings`). A state is halted once its
+    path hits a `return`, `break`, or `continue` statement.
+    """
+
+    def __init__(self, namespace, is_halted=False):
+        self.namespace = namespace
+        self.is_halted = is_halted
+
+    def fork(self, read_names=None):
+        """
+        Returns a copy of the state for another path. The instances and
+        containers in its namespace are copied too, since paths change them
+        independently (e.g. `self.x = a` on one path and `self.x = b` on the
+        other).
+
+        Parameters
+        ----------
+        read_names : {set, None}
+            names that the code processed on the paths may read; entities
+            bound only to other names (or their sub-aliases) can't be changed
+            on the paths, so they're shared rather than copied; every entity
+            is copied if None
+        """
+
+        memo, namespace = {}, dict(self.namespace)
+        mutable_names = [
+            name for name, entity in namespace.items()
+            if isinstance(entity, MUTABLE_ENTITIES)
+        ]
+        for name in mutable_names:
+            if read_names is None or _get_base_name(name) in read_names:
+                namespace[name] = _fork_entity(namespace[name], memo)
+
+        return State(namespace, self.is_halted)
+
+
+def _is_same_list(entities, other_entities, visited):
+    if entities is None or other_entities is None:
+        return entities is other_entities
+    elif len(entities) != len(other_entities):
+        return False
+
+    return all(_is_same_entity(e, o, visited) for e, o in zip(entities, other_entities))
+
+
+def _is_same_entity(entity, other_entity, visited):
+    if entity is other_entity:
+        return True
+    elif not _is_version(entity, other_entity):
+        return False
+    elif (id(entity), id(other_entity)) in visited: # Cycle
+        return True
+
+    visited.add((id(entity), id(other_entity)))
+    if isinstance(entity, Container):
+        return entity.keys == other_entity.keys \
+            and _is_same_list(entity.elements, other_entity.elements, visited) \
+            and _is_same_list(entity.entities, other_entity.entities, visited)
+
+    namespace, other_namespace = entity.namespace, other_entity.namespace
+    if isinstance(namespace, InstanceNamespace):
+        if not isinstance(other_namespace, InstanceNamespace) \
+                or namespace.template is not other_namespace.template \
+                or namespace.deleted != other_namespace.deleted:
+            return False
+
+        namespace, other_namespace = namespace.overlay, other_namespace.overlay
+
+    return _is_same_namespace(namespace, other_namespace, visited)
+
+
+def _is_same_namespace(namespace, other_namespace, visited=None):
+    if namespace is other_namespace:
+        return True
+    elif len(namespace) != len(other_namespace):
+        return False
+
+    visited = set() if visited is None else visited
+    for name, entity in namespace.items():
+        if name not in other_namespace:
+            return False
+        elif not _is_same_entity(entity, other_namespace[name], visited):
+            return False
+
+    return True
+
+
+def _merge_entity(entity, other_entity, visited):
+    """
+    Merges another path's version of an instance or container into this
+    path's version, in place (see `merge_states`).
+    """
+
+    if entity is other_entity or not _is_version(entity, other_entity):
+        return
+    elif id(entity) in visited:
+        return
+
+    visited.add(id(entity))
+    if isinstance(entity, ClassInstance):
+        _merge_namespaces(entity.namespace, other_entity.namespace, visited)
+        return
+
+    elements, other_elements = entity.elements, other_entity.elements
+    is_same_shape = elements is not None and other_elements is not None \
+        and len(elements) == len(other_elements) and entity.keys == other_entity.keys
+    if is_same_shape and all(e is o or _is_version(e, o) for e, o in zip(elements, other_elements)):
+        for element, other_element in zip(elements, other_elements):
+            _merge_entity(element, other_element, visited)
+    else: # Positions differ between the paths
+        entity.elements, entity.keys = None, None
+
+    if entity.entities is None or other_entity.entities is None:
+        entity.entities = None
+        return
+
+    entities = entity.entities + [
+        o for o in other_entity.entities
+        if not any(e is o for e in entity.entities)
+    ]
+    entity.entities = entities if len(entities) <= MAX_CONTAINER_ENTITIES else None
+
+
+def _merge_namespaces(namespace, other_namespace, visited):
+    if isinstance(namespace, InstanceNamespace) \
+            and isinstance(other_namespace, InstanceNamespace) \
+            and namespace.template is other_namespace.template:
+        # Names in the shared template are bound in both, unless deleted
+        for name in namespace.deleted - other_namespace.deleted:
+            if name not in other_namespace.overlay:
+                namespace[name] = namespace.template[name]
+
+        other_namespace = other_namespace.overlay
+
+    for name, other_entity in other_namespace.items():
+        if name not in namespace:
+            namespace[name] = other_entity
+            continue
+
+        entity = namespace[name]
+        if entity is not other_entity and _is_mutable(entity):
+            _merge_entity(entity, other_entity, visited)
+
+
+def merge_states(state, other_state):
+    """
+    Merges a state into another, in place. The merged namespace binds every
+    name bound in either state (and the merged versions of an instance or
+    container have every attribute or element either version has); where the
+    states bind a name to different entities, the entity from `state` is kept
+    (as if the other path hadn't been taken, which is what `Saplings` assumes
+    outside of path-sensitive mode).
+    """
+
+    _merge_namespaces(state.namespace, other_state.namespace, set())
+    state.is_halted = state.is_halted and other_state.is_halted
+
+
+def _write_back_entity(entity, other_entity, visited):
+    """
+    Replaces the contents of an instance or container with those of its
+    version on a path, in place, so that references to it from outside the
+    paths' namespaces see the path's changes.
+    """
+
+    if entity is other_entity or not _is_version(entity, other_entity):
+        return other_entity
+    elif id(other_entity) in visited:
+        return entity
+
+    visited.add(id(other_entity))
+    if isinstance(entity, Container):
+        originals = {
+            e.serial: e
+            for e in (entity.elements or []) + (entity.entities or [])
+            if _is_mutable(e)
+        }
+        for attr in ("elements", "entities"):
+            other_entities = getattr(other_entity, attr)
+            if other_entities is not None:
+                other_entities = [
+                    _write_back_entity(originals[o.serial], o, visited)
+                    if _is_mutable(o) and o.serial in originals else o
+                    for o in other_entities
+                ]
+
+            setattr(entity, attr, other_entities)
+
+        entity.keys = other_entity.keys
+        return entity
+
+    namespace, other_namespace = entity.namespace, other_entity.namespace.copy()
+    own_namespace = getattr(other_namespace, "overlay", other_namespace)
+    for name, other_e in own_namespace.items():
+        if name in namespace:
+            own_namespace[name] = _write_back_entity(namespace[name], other_e, visited)
+
+    entity.namespace = other_namespace
+    return entity
+
+
+def write_back_state(state, namespace):
+    """
+    Updates a namespace, in place, to bind what a state's namespace binds. The
+    instances and containers the namespace already holds are kept, with the
+    contents of their versions in the state.
+    """
+
+    if state.namespace is namespace:
+        return
+
+    visited = set()
+    for name in list(namespace):
+        if name not in state.namespace:
+            del namespace[name]
+
+    for name, entity in state.namespace.items():
+        if name in namespace:
+            entity = _write_back_entity(namespace[name], entity, visited)
+
+        if namespace.get(name) is not entity:
+            namespace[name] = entity
+
+
+def join_states(states, max_states=DEFAULT_MAX_STATES):
+    """
+    Joins the states reaching the end of a branching statement: states with
+    the same bindings are collapsed into one, and if there are still more
+    than `max_states` live states, the extra ones are merged into the last
+    live state that's kept (see `merge_states`). This bounds the cost of
+    path-sensitive analysis, which would otherwise grow exponentially with the
+    number of branches in a block.
+
+    Parameters
+    ----------
+    states : list
+        States, in the order their paths appear in the source
+    max_states : int
+        maximum number of live (i.e. not halted) states
+
+    Returns
+    -------
+    list
+        joined states
+    """
+
+    joined_states = []
+    for state in states:
+        is_duplicate = any(
+            joined_state.is_halted == state.is_halted
+            and _is_same_namespace(joined_state.namespace, state.namespace)
+            for joined_state in joined_states
+        )
+        if not is_duplicate:
+            joined_states.append(state)
+
+    live_states = [state for state in joined_states if not state.is_halted]
+    if len(live_states) <= max_states:
+        return joined_states
+
+    # Halted states aren't processed any further, so they don't count towards
+    # the limit
+    merged_state = live_states[max_states - 1]
+    for state in live_states[max_states:]:
+        merge_states(merged_state, state)
+
+    extra_ids = {id(state) for state in live_states[max_states:]}
+    return [state for state in joined_states if id(state) not in extra_ids]
+
+
+###########
+# STATE LOG
+###########
+
+
+class StateLog(object):
+    """
+    Recorder (see the `recorder` parameter of `Saplings`) that logs the changes
+    made to the object hierarchies while one statement is processed in each
+    live state. A use of a node in the statement is counted once, no matter how
+    many states it's processed in: each node keeps the highest count any one
+    state gave it, and the rest is undone. The remaining changes are passed on
+    to the enclosing recorder, if any.
+    """
+
+    def __init__(self, recorder=None):
+        self.location = recorder.location if recorder else None
+        self._recorder = recorder
+        self._states = []
+
+    def begin(self):
+        self._states.append([])
+
+    def record_increment(self, node):
+        self._states[-1].append((True, node, self.location))
+
+    def record_use(self, entity):
+        self._states[-1].append((False, entity, self.location))
+
+    def commit(self):
+        """
+        Undoes the counts in excess of the highest count per node, and replays
+        the rest to the enclosing recorder.
+        """
+
+        totals, maxima = {}, {}
+        for state in self._states:
+            counts = {}
+            for is_increment, node, _ in state:
+                if is_increment:
+                    counts[id(node)] = counts.get(id(node), 0) + 1
+
+            for node_id, count in counts.items():
+                totals[node_id] = totals.get(node_id, 0) + count
+                maxima[node_id] = max(maxima.get(node_id, 0), count)
+
+        undone = set()
+        for state in self._states:
+            for is_increment, node, _ in state:
+                if is_increment and id(node) not in undone:
+                    node.frequency -= totals[id(node)] - maxima[id(node)]
+                    undone.add(id(node))
+
+        if self._recorder:
+            location = self._recorder.location
+            for state in self._states:
+                for is_increment, entity, entity_location in state:
+                    if not is_increment:
+                        self._recorder.record_use(entity)
+                    elif maxima[id(entity)]:
+                        maxima[id(entity)] -= 1
+                        self._recorder.location = entity_location
+                        self._recorder.record_increment(entity)
+
+            self._recorder.location = location
+
+        self._states = []
@@ -0,0 +1,295 @@
+# Standard Library
+import ast
+from copy import copy
+
+# Local Modules
+from saplings.entities import ObjectNode, Function, Class, ClassInstance, Container
+from saplings.entities import InstanceNamespace, next_serial
+
+
+#################
+# FUNCTION BODIES
+#################
+
+
+def get_body(def_node):
+    """
+    Returns the statements in the body of a function (for a lambda, a `return`
+    of its expression).
+    """
+
+    if isinstance(def_node, ast.Lambda):
+        return [ast.Return(value=def_node.body)]
+
+    return def_node.body
+
+
+def _iter_own_nodes(def_node):
+    """
+    Yields the nodes in a function's body, not counting nested functions and
+    classes.
+    """
+
+    nodes = list(get_body(def_node))
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda)):
+            continue
+
+        yield node
+        nodes.extend(ast.iter_child_nodes(node))
+
+
+def is_generator(def_node):
+    """
+    Checks whether a function is a generator (i.e. has a `yield` in its own
+    body).
+    """
+
+    if isinstance(def_node, ast.Lambda):
+        return False
+
+    return any(isinstance(n, (ast.Yield, ast.YieldFrom)) for n in _iter_own_nodes(def_node))
+
+
+def _get_read_names(def_node):
+    """
+    Returns the names a function's body may read: its parameters, and the
+    names used in its body (including in nested functions, which may be
+    processed with the body's namespace).
+    """
+
+    parameters = def_node.args
+    names = {a.arg for a in parameters.args + parameters.kwonlyargs}
+    for node in (parameters.vararg, parameters.kwarg):
+        if node:
+            names.add(node.arg)
+
+    for statement in get_body(def_node):
+        for node in ast.walk(statement):
+            if isinstance(node, ast.Name):
+                names.add(node.id)
+
+    return names
+
+
+################
+# BODY SUMMARIES
+################
+
+
+def _get_entity_shape(entity, referents):
+    referents.append(entity)
+    if isinstance(entity, ClassInstance):
+        # Instances and containers are mutable, so their contents are part of
+        # the shape (only the attributes set on an instance, if its class's
+        # namespace is shared; see `InstanceNamespace`)
+        namespace = entity.namespace
+        if isinstance(namespace, InstanceNamespace):
+            referents.append(namespace.template)
+            referents.extend(namespace.overlay.values())
+            return (id(entity), id(namespace.template), frozenset(namespace.deleted)) \
+                + tuple((name, id(e)) for name, e in namespace.overlay.items())
+
+        referents.extend(namespace.values())
+        return (id(entity),) + tuple(id(e) for e in namespace.values())
+    elif isinstance(entity, Container):
+        elements = entity.elements or []
+        entities = entity.entities or []
+        referents.extend(elements)
+        referents.extend(entities)
+        return (id(entity), len(elements)) + tuple(id(e) for e in elements + entities)
+
+    return id(entity)
+
+
+def _get_functions(entity):
+    if isinstance(entity, Function):
+        return [entity]
+    elif isinstance(entity, Class):
+        namespace = entity.get_namespace()
+    elif isinstance(entity, ClassInstance):
+        namespace = entity.namespace
+    else:
+        return []
+
+    return [e for e in namespace.values() if isinstance(e, Function)]
+
+
+def get_reachable_names(names, namespace):
+    """
+    Returns the names that processing code which reads `names` may read: those
+    names, and the names read by the user-defined functions (and methods) it
+    can reach through them, since functions that aren't closures are
+    processed in their caller's namespace.
+
+    Parameters
+    ----------
+    names : set
+        names the code reads
+    namespace : dict
+        namespace the code is processed in
+
+    Returns
+    -------
+    set
+        names the code may read
+    """
+
+    names, functions, visited_ids = set(names), [], set()
+    for name in names:
+        functions.extend(_get_functions(namespace.get(name)))
+
+    while functions:
+        function = functions.pop()
+        if id(function) in visited_ids:
+            continue
+
+        visited_ids.add(id(function))
+        if function.read_names is None:
+            function.read_names = _get_read_names(function.def_node)
+
+        for name in function.read_names - names:
+            names.add(name)
+            functions.extend(_get_functions(namespace.get(name)))
+
+    return names
+
+
+def get_shape(function, namespace):
+    """
+    Returns the shape of the namespace a lambda's or generator's body is
+    processed in: the entities bound to the names processing the body may
+    read (or their sub-aliases, e.g. `x.attr`). Processing the body in
+    namespaces of the same shape gives the same result.
+
+    Parameters
+    ----------
+    function : Function
+        function whose body is about to be processed
+    namespace : dict
+        namespace the body is processed in (after its arguments are bound)
+
+    Returns
+    -------
+    tuple
+        hashable shape
+    list
+        entities the shape refers to by id; kept alive with the summary so that
+        the ids aren't reused
+    """
+
+    if function.read_names is None:
+        function.read_names = _get_read_names(function.def_node)
+
+    read_names = get_reachable_names(function.read_names, namespace)
+
+    shape, referents = [], []
+    for name, entity in namespace.items():
+        base_name = name.split('.', 1)[0].split('(', 1)[0]
+        if base_name in read_names:
+            shape.append((name, _get_entity_shape(entity, referents)))
+
+    return tuple(shape), referents
+
+
+def copy_return_value(entity, serial, memo=None):
+    """
+    Copies the containers and instances in a function's return value that were
+    created by its body (i.e. whose serial is at least `serial`), including
+    those nested in them. Entities that existed before the body was processed
+    are shared rather than copied.
+    """
+
+    if not isinstance(entity, (Container, ClassInstance)) or entity.serial < serial:
+        return entity
+
+    memo = {} if memo is None else memo
+    if id(entity) in memo:
+        return memo[id(entity)]
+
+    entity_copy = memo[id(entity)] = copy(entity)
+    entity_copy.serial = next_serial()
+
+    def copy_list(entities):
+        if entities is None:
+            return None
+
+        return [copy_return_value(e, serial, memo) for e in entities]
+
+    if isinstance(entity, Container):
+        entity_copy.elements = copy_list(entity.elements)
+        entity_copy.keys = copy(entity.keys)
+        entity_copy.entities = copy_list(entity.entities)
+    else:
+        namespace = entity_copy.namespace = entity.namespace.copy()
+        for name, e in list(namespace.items()):
+            namespace[name] = copy_return_value(e, serial, memo)
+
+    return entity_copy
+
+
+class Summary(object):
+    """
+    Result of processing a lambda's or generator's body once: its return
+    value, and the changes it made to the object hierarchies, which are
+    replayed instead of processing the body again.
+    """
+
+    def __init__(self, return_value, changes, referents, serial):
+        self.changes = changes # (is_increment, entity, location) tuples
+        self.referents = referents
+        self.serial = serial # Serial of the first entity the body could create
+
+        # Kept apart from the value returned to the caller that processed the
+        # body, since callers may mutate what they're returned
+        self.return_value = copy_return_value(return_value, serial)
+
+    def get_return_value(self):
+        # Every caller gets its own copy of the containers and instances the
+        # body created, as if it had processed the body itself
+        return copy_return_value(self.return_value, self.serial)
+
+    def is_valid(self):
+        # Nodes can be removed from the hierarchies by undone fixed-point
+        # iterations (see `recursion.IterationLog`), which leaves them with a
+        # count of zero
+        return all(
+            entity.frequency
+            for is_increment, entity, _ in self.changes
+            if is_increment and isinstance(entity, ObjectNode)
+        )
+
+
+class SummaryLog(object):
+    """
+    Recorder (see the `recorder` parameter of `Saplings`) that logs the changes
+    made to the object hierarchies while a lambda's or generator's body is
+    processed, for its `Summary`, and passes them on to the enclosing
+    recorder, if any.
+    """
+
+    def __init__(self, recorder=None):
+        self.location = recorder.location if recorder else None
+        self.changes = []
+        self._recorder = recorder
+
+    def _pass_on(self, is_increment, entity):
+        location = self._recorder.location
+        self._recorder.location = self.location
+        if is_increment:
+            self._recorder.record_increment(entity)
+        else:
+            self._recorder.record_use(entity)
+
+        self._recorder.location = location
+
+    def record_increment(self, node):
+        self.changes.append((True, node, self.location))
+        if self._recorder:
+            self._pass_on(True, node)
+
+    def record_use(self, entity):
+        self.changes.append((False, entity, self.location))
+        if self._recorder:
+            self._pass_on(False, entity)
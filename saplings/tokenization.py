@@ -53,8 +53,9 @@ class ArgToken(object):
 
 
 class CallToken(object):
-    def __init__(self, args):
+    def __init__(self, args, is_slice=False):
         self.args = args
+        self.is_slice = is_slice # True for subscripts with a slice (e.g. x[1:])
 
     def __iter__(self):
         yield from self.args
@@ -74,11 +75,12 @@ def tokenize_slice(slice):
 
     Parameters
     ----------
-    slice : {ast.Index, ast.Slice}
-        subscript arguments
+    slice : {ast.Index, ast.Slice, ast.AST}
+        subscript arguments (on Python 3.9+, an index is the expression
+        itself rather than an ast.Index)
     """
 
-    if isinstance(slice, ast.Index): # e.g. x[1]
+    if isinstance(slice, ast.Index): # e.g. x[1] (Python < 3.9)
         yield recursively_tokenize_node(slice.value, [])
     elif isinstance(slice, ast.Slice): # e.g. x[1:2]
         for partial_slice in (slice.lower, slice.upper, slice.step):
@@ -86,6 +88,11 @@ def tokenize_slice(slice):
                 continue
 
             yield recursively_tokenize_node(partial_slice, [])
+    elif isinstance(slice, ast.Tuple): # e.g. x[1:2, 3] (Python 3.9+)
+        for dim_slice in slice.elts:
+            yield from tokenize_slice(dim_slice)
+    else: # e.g. x[1] (Python 3.9+)
+        yield recursively_tokenize_node(slice, [])
 
 
 def recursively_tokenize_node(node, tokens):
@@ -134,7 +141,8 @@ def recursively_tokenize_node(node, tokens):
         else:
             slice_tokens.extend(tokenize_slice(slice))
 
-        arg_tokens = CallToken([ArgToken(token) for token in slice_tokens])
+        is_slice = isinstance(slice, (ast.Slice, ast.ExtSlice, ast.Tuple))
+        arg_tokens = CallToken([ArgToken(token) for token in slice_tokens], is_slice)
         subscript_name = NameToken("__index__")
         tokens.extend([arg_tokens, subscript_name])
 
@@ -169,8 +177,9 @@ def recursively_tokenize_node(node, tokens):
         tokens.extend([op_args, op_name])
 
         return recursively_tokenize_node(node.left, tokens)
-    else:
-        return [node]
+    else: # Base is an expression (e.g. a literal, like in `", ".join(x)`)
+        tokens.append(node)
+        return tokens[::-1]
 
 
 def stringify_tokenized_nodes(tokens):
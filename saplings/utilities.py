@@ -1,9 +1,10 @@
 # Standard Library
 import ast
+import os
+import tempfile
 
 # Local Modules
-# import saplings.tokenization as tkn
-import tokenization as tkn
+import saplings.tokenization as tkn
 
 
 def find_matching_node(subtree, name):
@@ -52,7 +53,8 @@ def create_decorator_call_node(decorator_list, args):
 
 
 def consolidate_call_nodes(node, parent=None):
-    for child in node.children:
+    # Iterates over a copy, since call nodes remove themselves from `children`
+    for child in list(node.children):
         consolidate_call_nodes(child, node)
 
     if node.name == "()":
@@ -63,8 +65,76 @@ def consolidate_call_nodes(node, parent=None):
             parent.children.append(child)
 
 
+def prune_unused_nodes(node):
+    """
+    Removes the descendants of an object hierarchy node that have a frequency
+    of zero and no used descendants. Returns True if the node itself is used
+    or has used descendants.
+    """
+
+    node.children = [child for child in node.children if prune_unused_nodes(child)]
+    return node.frequency > 0 or bool(node.children)
+
+
+def get_constant(node):
+    """
+    Returns the value of a constant expression (e.g. `0`, `-1`, or `"key"`),
+    given its node or its tokens.
+
+    Returns
+    -------
+    object
+        value of the constant (None if it isn't one)
+    bool
+        True if the expression is a constant
+    """
+
+    if isinstance(node, list): # Tokens
+        node = node[0] if len(node) == 1 else None
+
+    is_negative = isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub)
+    if is_negative and isinstance(node.operand, ast.Constant):
+        if isinstance(node.operand.value, (int, float)):
+            return -node.operand.value, True
+    elif isinstance(node, ast.Constant):
+        return node.value, True
+
+    return None, False
+
+
 def stringify_node(node):
     tokens = tkn.recursively_tokenize_node(node, [])
     node_str = tkn.stringify_tokenized_nodes(tokens)
 
     return node_str
+
+
+def atomic_write(path, data, fsync=False):
+    """
+    Writes bytes to a file such that readers either see the old contents or
+    the new contents, never a partial write.
+
+    Parameters
+    ----------
+    path : string
+        path of the file to (over)write
+    data : bytes
+        new contents of the file
+    fsync : bool
+        flushes the contents to disk before they replace the old file, so the
+        file also survives a crash of the machine
+    """
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+            if fsync:
+                file.flush()
+                os.fsync(file.fileno())
+
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
@@ -0,0 +1,192 @@
+# Standard Library
+import argparse
+import json
+import os
+import sys
+import time
+
+# Local Modules
+from saplings.analysis import analyze_source, SOURCE_EXTENSIONS
+from saplings.aggregation import IncrementalAggregate
+from saplings.incremental import IncrementalModule
+from saplings.rendering import dictify_tree
+
+DEFAULT_INTERVAL = 0.5
+IGNORED_DIRECTORIES = {".git", ".hg", ".svn", "__pycache__", ".tox", ".nox", ".venv", "venv"}
+
+
+class Watcher(object):
+    """
+    Keeps the object hierarchies of every Python file under a directory up to
+    date. Each file's hierarchies are kept in memory; when a file changes,
+    only that file is re-analyzed, and its old contribution to the aggregated
+    hierarchies is swapped for the new one.
+
+    Python modules are analyzed with `IncrementalModule`, so within a changed
+    file only the edited top-level definitions (and what depends on them) are
+    re-analyzed.
+
+    Changes are detected by polling file modification times and sizes, which
+    works on every platform without extra dependencies.
+    """
+
+    def __init__(self, directory, modules=None, on_update=None):
+        """
+        Parameters
+        ----------
+        directory : str
+            root of the directory tree to watch
+        modules : {set, None}
+            names of the root modules to keep; all hierarchies are kept if None
+        on_update : {function, None}
+            called with `(changed_paths, forest)` after every update, where
+            `forest` is the list of aggregated root nodes
+        """
+
+        self.directory = directory
+        self.modules = modules
+        self.on_update = on_update
+
+        self.aggregate = IncrementalAggregate()
+        self.errors = {} # Maps paths to the reason they couldn't be analyzed
+
+        # Maps paths to the (mtime, size) they had when last analyzed
+        self._signatures = {}
+
+        # Maps paths of Python modules to their incremental analysis state
+        self._modules = {}
+
+    ## Helpers ##
+
+    def _scan(self):
+        signatures = {}
+        for dir_path, dir_names, file_names in os.walk(self.directory):
+            dir_names[:] = [d for d in dir_names if d not in IGNORED_DIRECTORIES]
+            for file_name in file_names:
+                if not file_name.endswith(SOURCE_EXTENSIONS):
+                    continue
+
+                path = os.path.join(dir_path, file_name)
+                try:
+                    stat = os.stat(path)
+                except OSError: # Deleted mid-scan
+                    continue
+
+                signatures[path] = (stat.st_mtime_ns, stat.st_size)
+
+        return signatures
+
+    def _analyze(self, path):
+        try:
+            with open(path, "rb") as file:
+                source = file.read()
+
+            if path.endswith(".py"):
+                module = self._modules.get(path) or IncrementalModule()
+                module.update(source)
+                self._modules[path] = module
+
+                trees = module.get_trees()
+                if self.modules is not None:
+                    trees = [tree for tree in trees if tree.name in self.modules]
+            else:
+                trees = analyze_source(source, path, self.modules)
+        except (SyntaxError, ValueError, OSError) as error:
+            # A file that's mid-edit often doesn't parse; its last good
+            # contribution is kept until it does
+            self.errors[path] = f"{type(error).__name__}: {error}"
+            return
+        except Exception as error:
+            # The analysis failed partway, so the file's incremental state is
+            # discarded and it's analyzed from scratch when it next changes
+            self._modules.pop(path, None)
+            self.errors[path] = f"{type(error).__name__}: {error}"
+            return
+
+        self.errors.pop(path, None)
+        self.aggregate.replace(path, trees)
+
+    ## Public Methods ##
+
+    def poll(self):
+        """
+        Checks the directory for added, modified, and deleted files once and
+        updates the aggregated hierarchies.
+
+        Returns
+        -------
+        list
+            paths that changed since the last poll
+        """
+
+        signatures = self._scan()
+
+        changed_paths = []
+        for path, signature in signatures.items():
+            if self._signatures.get(path) != signature:
+                self._analyze(path)
+                changed_paths.append(path)
+
+        for path in self._signatures.keys() - signatures.keys():
+            self.aggregate.remove(path)
+            self.errors.pop(path, None)
+            self._modules.pop(path, None)
+            changed_paths.append(path)
+
+        self._signatures = signatures
+
+        if changed_paths and self.on_update:
+            self.on_update(changed_paths, self.aggregate.forest)
+
+        return changed_paths
+
+    def run(self, interval=DEFAULT_INTERVAL):
+        """
+        Polls the directory every `interval` seconds until interrupted.
+        """
+
+        while True:
+            self.poll()
+            time.sleep(interval)
+
+    def get_trees(self):
+        return self.aggregate.forest
+
+
+######
+# MAIN
+######
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m saplings.watch",
+        description="Watches a directory and prints updated object hierarchies "
+                    "(one JSON object per line) whenever a file changes."
+    )
+    parser.add_argument("directory", help="directory to watch")
+    parser.add_argument("-m", "--module", action="append", dest="modules",
+                        metavar="NAME", help="only keep hierarchies rooted at NAME")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL,
+                        help="seconds between polls (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    def publish(changed_paths, forest):
+        print(json.dumps({
+            "changed": changed_paths,
+            "trees": [dictify_tree(tree) for tree in forest]
+        }), flush=True)
+
+    watcher = Watcher(
+        args.directory,
+        set(args.modules) if args.modules else None,
+        publish
+    )
+    try:
+        watcher.run(args.interval)
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
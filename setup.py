@@ -25,6 +25,7 @@ setup(
     author_email="shobrookj@gmail.com",
     # classifiers=[],
     install_requires=[],
+    entry_points={"console_scripts": ["saplings = saplings.cli:main"]},
     keywords=["ast", "object", "hierarchy", "tree", "static", "analysis", "dependency", "module"],
     license="MIT"
 )
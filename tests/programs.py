@@ -0,0 +1,178 @@
+# Standard Library
+import ast
+import random
+
+MODULES = ["numpy as np", "pandas as pd", "os", "torch"]
+NAMES = ["a", "b", "c"]
+ATTRIBUTES = ["x", "y", "fit", "zeros"]
+
+
+class ProgramGenerator(object):
+    """
+    Generates random programs for differential tests: imports, aliases,
+    attribute chains and calls, containers, branches, loops, functions, and
+    classes that set attributes on `self`.
+    """
+
+    def __init__(self, seed, loops=True, nested_calls=True):
+        """
+        Parameters
+        ----------
+        seed : int
+            seed of the random choices
+        loops : bool
+            whether to generate loops, `try` statements, and branches inside
+            functions and classes; if False, the only branches are top-level
+            `if` statements (see `iter_paths`)
+        nested_calls : bool
+            whether functions and classes may call (or instantiate) the ones
+            defined before them; if False, which uncalled functions are
+            processed doesn't depend on the order they're processed in
+        """
+
+        self.random = random.Random(seed)
+        self.loops = loops
+        self.nested_calls = nested_calls
+        self.is_nested = False
+        self.functions = []
+        self.classes = []
+
+    def _name(self):
+        return self.random.choice(NAMES)
+
+    def _module(self):
+        return self.random.choice(["np", "pd", "os", "torch"])
+
+    def expression(self, depth=0):
+        choice = self.random.randrange(9 if depth < 2 else 4)
+        attribute = self.random.choice(ATTRIBUTES)
+        if choice == 0:
+            return f"{self._module()}.{attribute}"
+        elif choice == 1:
+            return f"{self._module()}.{attribute}()"
+        elif choice == 2:
+            return f"{self._name()}.{attribute}"
+        elif choice == 3:
+            return self._name()
+        elif choice == 4:
+            return f"[{self.expression(depth + 1)}, {self.expression(depth + 1)}]"
+        elif choice == 5:
+            return f"{self._name()}[0]"
+        elif choice in (6, 7) and self.is_nested and not self.nested_calls:
+            pass
+        elif choice == 6 and self.functions:
+            return f"{self.random.choice(self.functions)}({self.expression(depth + 1)})"
+        elif choice == 7 and self.classes:
+            return f"{self.random.choice(self.classes)}({self.expression(depth + 1)})"
+
+        return f"{self.expression(depth + 1)}.{attribute}()"
+
+    def statement(self, depth=0, indent="", branches=True):
+        choice = self.random.randrange(9 if depth < 2 and branches else 4)
+        if not self.loops and choice in (5, 7):
+            choice = 4
+        if choice in (0, 1):
+            return [f"{indent}{self._name()} = {self.expression()}"]
+        elif choice == 2:
+            return [f"{indent}{self.expression()}"]
+        elif choice == 3:
+            return [f"{indent}{self._name()}.{self.random.choice(ATTRIBUTES)} = {self.expression()}"]
+        elif choice == 4:
+            lines = [f"{indent}if {self.expression()}:"]
+            lines += self.block(depth + 1, indent + "    ")
+            if self.random.random() < 0.5:
+                lines.append(f"{indent}else:")
+                lines += self.block(depth + 1, indent + "    ")
+
+            return lines
+        elif choice == 5:
+            lines = [f"{indent}for {self._name()} in {self.expression()}:"]
+            return lines + self.block(depth + 1, indent + "    ")
+        elif choice == 6:
+            return [f"{indent}{self._name()}.append({self.expression()})"]
+        elif choice == 7:
+            lines = [f"{indent}try:"] + self.block(depth + 1, indent + "    ")
+            return lines + [f"{indent}except {self._module()}.Error:"] \
+                + self.block(depth + 1, indent + "    ")
+
+        return [f"{indent}del {self._name()}"]
+
+    def block(self, depth, indent, branches=True):
+        lines = []
+        for _ in range(self.random.randint(1, 3)):
+            lines += self.statement(depth, indent, branches)
+
+        return lines
+
+    def function(self):
+        name = f"f{len(self.functions)}"
+        self.is_nested = True
+        lines = [f"def {name}(a):"] + self.block(1, "    ", self.loops)
+        lines.append(f"    return {self.expression()}")
+        self.is_nested = False
+        self.functions.append(name)
+
+        return lines
+
+    def class_(self):
+        name = f"C{len(self.classes)}"
+        self.is_nested = True
+        lines = [f"class {name}:", "    def __init__(self, a):"]
+        lines.append(f"        self.a = {self.expression()}")
+        if self.loops:
+            lines.append(f"        if {self.expression()}:")
+            lines.append(f"            self.a = {self.expression()}")
+            lines.append("        else:")
+            lines.append(f"            self.a.{self.random.choice(ATTRIBUTES)}()")
+        lines += ["    def method(self):", f"        return self.a.{self.random.choice(ATTRIBUTES)}"]
+        self.is_nested = False
+        self.classes.append(name)
+
+        return lines
+
+    def units(self, size=6):
+        """
+        Returns the top-level units (imports, definitions, and statements) of a
+        program, as lists of lines.
+        """
+
+        units = [[f"import {module}"] for module in MODULES]
+        for _ in range(size):
+            choice = self.random.randrange(6)
+            if choice == 0:
+                units.append(self.function())
+            elif choice == 1:
+                units.append(self.class_())
+            else:
+                units.append(self.statement())
+
+        return units
+
+    def program(self, size=6):
+        return "\n".join(line for unit in self.units(size) for line in unit) + "\n"
+
+
+def iter_paths(statements):
+    """
+    Yields the branch-free versions of a block of statements: one per path
+    through its `if` statements, where each `if` is replaced with its test and
+    the block taken on the path.
+    """
+
+    if not statements:
+        yield []
+        return
+
+    statement, rest = statements[0], statements[1:]
+    if isinstance(statement, ast.If):
+        heads = [
+            [ast.Expr(value=statement.test)] + path
+            for block in (statement.body, statement.orelse)
+            for path in iter_paths(block)
+        ]
+    else:
+        heads = [[statement]]
+
+    for head in heads:
+        for tail in iter_paths(rest):
+            yield head + tail
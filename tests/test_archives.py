@@ -0,0 +1,92 @@
+# Standard Library
+import io
+import tarfile
+import zipfile
+
+# Third Party
+import pytest
+
+# Local Modules
+from saplings.aggregation import merge_trees
+from saplings.analysis import ResultCache, analyze_source
+from saplings.archives import analyze_archive, is_archive, iter_archive_sources
+from saplings.rendering import flatten_tree
+
+MEMBERS = {
+    "pkg/__init__.py": "import os\nos.getcwd()\n",
+    "pkg/core.py": "import numpy as np\nnp.zeros(3).sum()\nimport os\nos.getcwd()\n",
+    "pkg/data.txt": "not python",
+    "pkg/broken.py": "def f(:\n"
+}
+
+
+def _get_paths(trees):
+    paths = {}
+    for tree in trees:
+        paths.update(flatten_tree(tree))
+
+    return paths
+
+
+def _write_archive(path, members):
+    if path.endswith((".whl", ".zip")):
+        with zipfile.ZipFile(path, 'w') as archive:
+            for name, source in members.items():
+                archive.writestr(name, source)
+    else:
+        with tarfile.open(path, "w:gz") as archive:
+            for name, source in members.items():
+                data = source.encode("utf-8")
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                archive.addfile(info, io.BytesIO(data))
+
+    return path
+
+
+@pytest.fixture(params=["pkg-1.0-py3-none-any.whl", "pkg-1.0.tar.gz"])
+def archive_path(request, tmp_path):
+    return _write_archive(str(tmp_path / request.param), MEMBERS)
+
+
+def test_is_archive():
+    assert is_archive("a.whl") and is_archive("a.TAR.GZ") and is_archive("a.zip")
+    assert not is_archive("a.py") and not is_archive("a.gz")
+
+
+def test_only_python_members_are_read(archive_path):
+    names = [name for name, _ in iter_archive_sources(archive_path)]
+
+    assert sorted(names) == ["pkg/__init__.py", "pkg/broken.py", "pkg/core.py"]
+
+
+def test_large_members_are_skipped(archive_path):
+    sources = dict(iter_archive_sources(archive_path, max_member_size=30))
+
+    assert set(sources) == {"pkg/__init__.py", "pkg/broken.py"}
+
+
+def test_matches_merged_members(archive_path):
+    trees, errors = analyze_archive(archive_path)
+
+    expected = []
+    for name in ("pkg/__init__.py", "pkg/core.py"):
+        merge_trees(expected, analyze_source(MEMBERS[name], name))
+
+    assert _get_paths(trees) == _get_paths(expected)
+    assert _get_paths(trees)["os.getcwd"] == 2
+    assert [name for name, _ in errors] == ["pkg/broken.py"]
+
+
+def test_module_filter(archive_path):
+    trees, _ = analyze_archive(archive_path, modules={"numpy"})
+
+    assert [tree.name for tree in trees] == ["numpy"]
+
+
+def test_cached_members_match(archive_path, tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"))
+    results = [analyze_archive(archive_path, cache) for _ in range(2)]
+
+    assert _get_paths(results[0][0]) == _get_paths(results[1][0])
+    assert results[0][1] == results[1][1]
@@ -0,0 +1,80 @@
+# Standard Library
+import ast
+import json
+import os
+
+# Third Party
+import pytest
+
+# Local Modules
+import saplings.benchmarks as benchmarks
+from saplings import Saplings
+
+
+def _make_results(**scenarios):
+    return {
+        "python": "3",
+        "calibration_seconds": 1.0,
+        "scenarios": {
+            name: {"time": time, "peak_memory": memory}
+            for name, (time, memory) in scenarios.items()
+        }
+    }
+
+
+@pytest.mark.parametrize("name", list(benchmarks.SCENARIOS))
+def test_scenarios_are_analyzable(name):
+    generator, sizes = benchmarks.SCENARIOS[name]
+    source = generator(min(sizes))
+
+    Saplings(ast.parse(source), [], {}).get_trees()
+    Saplings(ast.parse(source), [], {}, max_states=4).get_trees()
+
+
+def test_baseline_covers_every_run():
+    path = os.path.join(os.path.dirname(__file__), "..", "benchmarks", "baseline.json")
+    with open(path) as file:
+        baseline = json.load(file)
+
+    keys = {key for key, *_ in benchmarks._iter_runs(max_states=[4])}
+
+    assert keys == set(baseline["scenarios"])
+
+
+def test_compare_results():
+    baseline = _make_results(a=(1.0, 1 << 20), b=(1.0, 1000), c=(1.0, 1000))
+    results = _make_results(a=(1.6, 1 << 21), b=(1.4, 2000), d=(1.0, 1000))
+    rows, missing = benchmarks.compare_results(results, baseline, 0.5, 0.1)
+    regressions = {(name, metric) for name, metric, *_, is_regression in rows if is_regression}
+
+    # b's memory doubled, but by less than MIN_MEMORY_INCREASE bytes
+    assert regressions == {("a", "time"), ("a", "peak_memory")}
+    assert missing == ["d"]
+
+
+def test_median_of_batches_is_kept(monkeypatch):
+    times = iter([0.0, 1.0] + [1.0, 3.0, 1.0, 5.0, 1.0, 4.0])
+    monkeypatch.setattr(benchmarks, "_time_once", lambda func: next(times))
+    monkeypatch.setattr(benchmarks, "MIN_BATCH_SECONDS", 0.5)
+    time_ratio, peak_memory = benchmarks.run_scenario(lambda size: "x = 1", 1, repeat=3)
+
+    # Batches of two analyses, each timed against one calibration run
+    assert time_ratio == 2.0
+    assert peak_memory > 0
+
+
+@pytest.mark.parametrize("rerun_time, exit_code", [(1.0, 0), (3.0, 1)])
+def test_time_regressions_are_rerun(monkeypatch, tmp_path, rerun_time, exit_code):
+    name = next(iter(benchmarks.SCENARIOS))
+    monkeypatch.setattr(benchmarks, "SCENARIOS", {name: (None, (1,))})
+    baseline_path = tmp_path / "baseline.json"
+    baseline_path.write_text(json.dumps(_make_results(**{
+        key: (1.0, 1000) for key, *_ in benchmarks._iter_runs([name])
+    })))
+
+    times = iter([3.0] + [rerun_time] * 10)
+    monkeypatch.setattr(benchmarks, "calibrate", lambda repeat: 1.0)
+    monkeypatch.setattr(benchmarks, "run_scenario", lambda *args: (next(times), 1000))
+    argv = ["--scenario", name, "--compare", str(baseline_path)]
+
+    assert benchmarks.main(argv) == exit_code
@@ -0,0 +1,86 @@
+# Standard Library
+import ast
+import json
+import os
+import pickle
+
+# Third Party
+import pytest
+
+# Local Modules
+from saplings import Saplings
+from saplings.aggregation import Aggregate
+from saplings.cli import main
+from saplings.rendering import flatten_tree
+
+SOURCES = {
+    "a.py": "import numpy as np\nnp.zeros(3).sum()\n",
+    "b.py": "import os\nos.getcwd()\nimport numpy\nnumpy.ones\n",
+    "c.py": "import numpy as np\nnp.zeros(3).mean()\n",
+    "d.py": "def f(:\n"
+}
+
+
+def _write_sources(directory):
+    paths = []
+    for name, source in SOURCES.items():
+        path = os.path.join(directory, name)
+        with open(path, 'w') as file:
+            file.write(source)
+
+        paths.append(path)
+
+    return paths
+
+
+def _run_aggregate(argv, capsys):
+    exit_code = main(argv + ["--aggregate", "-f", "ndjson"])
+    out, _ = capsys.readouterr()
+
+    return exit_code, json.loads(out.splitlines()[-1])["trees"]
+
+
+def test_save_and_load(tmp_path):
+    aggregate = Aggregate(sketch_precision=6)
+    for name in ("a.py", "b.py"):
+        aggregate.add(name, Saplings(ast.parse(SOURCES[name]), [], {}).get_trees())
+
+    path = str(tmp_path / "checkpoint")
+    aggregate.save(path)
+    loaded = Aggregate.load(path)
+
+    assert loaded.completed == {"a.py", "b.py"}
+    assert "a.py" in loaded and "c.py" not in loaded
+    assert loaded.sketch_precision == 6
+    assert loaded.count_inputs() == aggregate.count_inputs()
+    assert [flatten_tree(t) for t in loaded.forest] == [flatten_tree(t) for t in aggregate.forest]
+
+
+def test_unsupported_version(tmp_path):
+    path = tmp_path / "checkpoint"
+    path.write_bytes(pickle.dumps((99, [], [])))
+
+    with pytest.raises(ValueError):
+        Aggregate.load(str(path))
+
+
+def test_resumed_run_matches_full_run(tmp_path, capsys):
+    paths = _write_sources(str(tmp_path))
+    checkpoint = str(tmp_path / "checkpoint")
+
+    # An interrupted run that only got through the first two inputs
+    _run_aggregate(paths[:2] + ["--checkpoint", checkpoint], capsys)
+    exit_code, resumed = _run_aggregate(paths + ["--checkpoint", checkpoint], capsys)
+    _, full = _run_aggregate(paths, capsys)
+
+    assert exit_code == 1 # d.py doesn't parse
+    assert resumed == full
+    assert Aggregate.load(checkpoint).completed == set(paths)
+
+    # Every input is done, including the failed one, so nothing is redone
+    assert _run_aggregate(paths + ["--checkpoint", checkpoint], capsys) == (0, full)
+
+
+def test_checkpoint_requires_aggregate(tmp_path):
+    with pytest.raises(SystemExit):
+        main([str(tmp_path), "--checkpoint", str(tmp_path / "checkpoint")])
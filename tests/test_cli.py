@@ -0,0 +1,127 @@
+# Standard Library
+import json
+import os
+import shutil
+
+# Third Party
+import pytest
+
+# Local Modules
+import saplings.analysis as analysis
+from programs import ProgramGenerator
+from saplings.analysis import ResultCache, analyze_source, iter_source_paths
+from saplings.cli import main
+from saplings.rendering import tuplify_tree
+
+
+def _write(directory, name, source):
+    path = os.path.join(directory, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as file:
+        file.write(source)
+
+    return path
+
+
+def _run(argv, capsys):
+    exit_code = main(argv)
+    out, err = capsys.readouterr()
+
+    return exit_code, out, err
+
+
+def test_iter_source_paths(tmp_path):
+    directory = str(tmp_path)
+    first = _write(directory, "a.py", "")
+    second = _write(directory, "pkg/b.py", "")
+    notebook = _write(directory, "pkg/c.ipynb", "{}")
+    _write(directory, "d.txt", "")
+
+    paths = list(iter_source_paths([directory, first, os.path.join(directory, "*.py")]))
+
+    assert paths == [first, second, notebook]
+
+
+def test_ndjson_output(tmp_path, capsys):
+    path = _write(str(tmp_path), "a.py", "import numpy as np\nnp.zeros(3).sum()\n")
+    exit_code, out, _ = _run([path, "-f", "ndjson"], capsys)
+    record = json.loads(out)
+
+    assert exit_code == 0
+    assert record["path"] == path
+    assert list(record["trees"][0]) == ["numpy"]
+
+
+def test_json_output_and_module_filter(tmp_path, capsys):
+    directory = str(tmp_path)
+    first = _write(directory, "a.py", "import os\nimport numpy\nnumpy.zeros\n")
+    second = _write(directory, "b.py", "import numpy as np\n")
+    exit_code, out, _ = _run([directory, "-f", "json", "-m", "numpy"], capsys)
+    results = json.loads(out)
+
+    assert exit_code == 0
+    assert set(results) == {first, second}
+    assert [list(tree) for tree in results[first]] == [["numpy"]]
+
+
+def test_failures_are_reported_per_file(tmp_path, capsys):
+    directory = str(tmp_path)
+    _write(directory, "a.py", "def f(:\n")
+    _write(directory, "b.py", "import os\nos.getcwd()\n")
+    exit_code, out, err = _run([directory, "-f", "ndjson"], capsys)
+
+    assert exit_code == 1
+    assert "a.py: SyntaxError" in err
+    assert [json.loads(line)["path"] for line in out.splitlines()] == [os.path.join(directory, "b.py")]
+
+
+def test_attribute_decorators(tmp_path, capsys):
+    source = "\n".join([
+        "import os",
+        "class A:",
+        "    @property",
+        "    def x(self):",
+        "        return os.sep",
+        "    @x.setter",
+        "    def x(self, value):",
+        "        pass"
+    ])
+    path = _write(str(tmp_path), "a.py", source)
+    exit_code, _, err = _run([path, "-f", "ndjson"], capsys)
+
+    assert exit_code == 0 and err == ""
+
+
+def test_cached_results_match(tmp_path, capsys):
+    directory = str(tmp_path / "src")
+    _write(directory, "a.py", "import numpy as np\nnp.zeros(3).sum()\n")
+    cache_dir = str(tmp_path / "cache")
+
+    outputs = [_run([directory, "--cache", cache_dir], capsys)[1] for _ in range(2)]
+
+    assert outputs[0] == outputs[1]
+    assert os.listdir(cache_dir)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_analysis_is_deterministic(seed):
+    # Cached results stand in for a fresh analysis, so analyzing the same
+    # source again must give the same result
+    source = ProgramGenerator(seed).program(4)
+    results = [[tuplify_tree(t) for t in analyze_source(source)] for _ in range(4)]
+
+    assert all(result == results[0] for result in results)
+
+
+@pytest.mark.parametrize("module", ["rendering.py", "archives.py", "project.py", "saplings.py"])
+def test_cache_key_covers_package(tmp_path, monkeypatch, module):
+    package_dir = os.path.dirname(analysis.__file__)
+    copy_dir = str(tmp_path / "saplings")
+    shutil.copytree(package_dir, copy_dir, ignore=shutil.ignore_patterns("__pycache__"))
+    monkeypatch.setattr(analysis, "__file__", os.path.join(copy_dir, "analysis.py"))
+
+    key = ResultCache(str(tmp_path / "cache")).key("import os")
+    with open(os.path.join(copy_dir, module), 'a') as file:
+        file.write("\n# Changed\n")
+
+    assert ResultCache(str(tmp_path / "cache")).key("import os") != key
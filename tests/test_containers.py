@@ -0,0 +1,71 @@
+# Standard Library
+import ast
+
+# Third Party
+import pytest
+
+# Local Modules
+from saplings import Saplings
+from saplings.entities import MAX_CONTAINER_ENTITIES
+from saplings.rendering import flatten_tree
+
+
+def _analyze(source):
+    paths = {}
+    for tree in Saplings(ast.parse(source), [], {}).get_trees():
+        paths.update(flatten_tree(tree))
+
+    return paths
+
+
+@pytest.mark.parametrize("source, path", [
+    ("vectors = [np.array([0]), np.array([1])]\nvectors[0].mean()", "numpy.array().mean"),
+    ("x, y = np.a, np.b\ny.c", "numpy.b.c"),
+    ("first, *rest = [np.a, np.b, np.c]\nrest[0].d\nfirst.e", "numpy.b.d"),
+    ("first, *rest = [np.a, np.b, np.c]\nfirst.e", "numpy.a.e"),
+    ("d = {'k': np.a, 'j': np.b}\nd['j'].c", "numpy.b.c"),
+    ("d = {'k': np.a, 'j': np.b}\nd.get('k').e", "numpy.a.e"),
+    ("d = {**{'k': np.a}}\nd['k'].c", "numpy.a.c"),
+    ("l = []\nl.append(np.a)\nl.pop().b", "numpy.a.b"),
+    ("l = [np.a for _ in range(3)]\nl[0].b", "numpy.a.b"),
+    ("def f():\n    return np.a, np.b\nx, (y, z) = 1, f()\nz.c", "numpy.b.c"),
+    ("s = {np.a}\nfor x in s:\n    x.b", "numpy.a.b")
+])
+def test_flow_through_containers(source, path):
+    assert path in _analyze("import numpy as np\n" + source)
+
+
+def test_unknown_elements_are_not_tracked():
+    paths = _analyze("import numpy as np\nl = [np.a, np.b]\nl[i].c\n")
+
+    assert "numpy.a.c" not in paths and "numpy.b.c" not in paths
+
+
+def test_iteration_counts_each_use_once():
+    source = "import numpy as np\nfor v in [np.zeros(3), np.ones(3)]:\n    v.sum()\n"
+
+    assert _analyze(source) == {
+        "numpy": 3,
+        "numpy.zeros": 1,
+        "numpy.zeros().sum": 1,
+        "numpy.ones": 1,
+        "numpy.ones().sum": 1
+    }
+
+
+def test_summaries_are_bounded():
+    size = MAX_CONTAINER_ENTITIES + 4
+    elements = ", ".join(f"np.a{i}" for i in range(size))
+    source = f"import numpy as np\nl = [{elements}]\nm = [np.a, np.a, np.b]\nl[0].c\n"
+    saplings = Saplings(ast.parse(source), [], {})
+    large, small = saplings._namespace['l'], saplings._namespace['m']
+
+    assert large.elements is None and large.entities is None
+    assert len(small.elements) == 3 and len(small.entities) == 2
+
+    paths = {}
+    for tree in saplings.get_trees():
+        paths.update(flatten_tree(tree))
+
+    assert paths["numpy"] == size + 4
+    assert "numpy.a0.c" not in paths
@@ -0,0 +1,87 @@
+# Standard Library
+import ast
+
+# Third Party
+import pytest
+
+# Local Modules
+from saplings import Saplings
+from saplings.rendering import flatten_tree
+
+
+def _analyze(source):
+    paths = {}
+    for tree in Saplings(ast.parse("import numpy as np\n" + source), [], {}).get_trees():
+        paths.update(flatten_tree(tree))
+
+    return paths
+
+
+def test_defaults_are_evaluated_once():
+    paths = _analyze("def f(x=np.zeros(3)):\n    return x.sum()\nf()\nf()\nf()\n")
+
+    assert paths["numpy.zeros"] == 1 and paths["numpy.zeros().sum"] == 3
+
+
+def test_calls_dont_spawn_analyzers(monkeypatch):
+    num_analyzers, num_evaluations = [0], [0]
+    init, process_default_args = Saplings.__init__, Saplings._process_default_args
+
+    def counting_init(self, *args, **kwargs):
+        num_analyzers[0] += 1
+        init(self, *args, **kwargs)
+
+    def counting_process_default_args(self, parameters):
+        num_evaluations[0] += 1
+        return process_default_args(self, parameters)
+
+    monkeypatch.setattr(Saplings, "__init__", counting_init)
+    monkeypatch.setattr(Saplings, "_process_default_args", counting_process_default_args)
+
+    params = ", ".join(f"p{i}=np.p{i}" for i in range(20))
+    paths = _analyze(f"def f({params}):\n    return p7.a\n" + "f()\n" * 10)
+    num_analyzers_with_defaults = num_analyzers[0]
+
+    num_analyzers[0] = 0
+    _analyze("def f():\n    return np.p7.a\n" + "f()\n" * 10)
+
+    # Calls only spawn the analyzers that process the function's body
+    assert num_analyzers_with_defaults == num_analyzers[0]
+    assert num_evaluations == [2]
+    assert paths["numpy.p7.a"] == 20
+
+
+def test_defaults_use_the_defining_namespace():
+    paths = _analyze("a = np.a\ndef f(x=a):\n    x.c\na = np.b\nf()\n")
+
+    assert "numpy.a.c" in paths and "numpy.b.c" not in paths
+
+
+@pytest.mark.parametrize("source, present, absent", [
+    ("def f(x=np.a):\n    x.c\nf(np.b)", "numpy.b.c", "numpy.a.c"),
+    ("def f(x=np.a):\n    x.c\nf(x=np.b)", "numpy.b.c", "numpy.a.c"),
+    ("x = np.a\ndef f(x=1):\n    x.c\nf()", None, "numpy.a.c"),
+    ("class C:\n    def m(self, x=np.a):\n        return x.c\nC().m()", "numpy.a.c", None),
+    ("f = lambda v=np.l: v.d\nf()", "numpy.l.d", None)
+])
+def test_binding(source, present, absent):
+    paths = _analyze(source)
+
+    assert present is None or present in paths
+    assert absent is None or absent not in paths
+
+
+def test_defaults_align_with_parameters():
+    source = "\n".join([
+        "def f(p, q=np.q, /, r=np.r, *, s=np.s, t=None, u):",
+        "    p.a; q.b; r.c; s.d; t.e; u.f",
+        "f(np.p, u=np.u)"
+    ])
+
+    assert {path for path in _analyze(source) if path.count('.') == 2} == {
+        "numpy.p.a",
+        "numpy.q.b",
+        "numpy.r.c",
+        "numpy.s.d",
+        "numpy.u.f"
+    }
@@ -0,0 +1,75 @@
+# Standard Library
+import ast
+import json
+
+# Third Party
+import pytest
+
+# Local Modules
+from programs import ProgramGenerator
+from saplings import Saplings
+from saplings.diff import diff_forests, main
+from saplings.fingerprints import TreeInterner
+from saplings.rendering import flatten_tree
+
+
+def _analyze(source):
+    return Saplings(ast.parse(source), [], {}).get_trees()
+
+
+def _diff_paths(old_forest, new_forest):
+    old_paths, new_paths = {}, {}
+    for forest, paths in ((old_forest, old_paths), (new_forest, new_paths)):
+        for tree in forest:
+            paths.update(flatten_tree(tree))
+
+    return {
+        "added": {p: f for p, f in new_paths.items() if p not in old_paths},
+        "removed": {p: f for p, f in old_paths.items() if p not in new_paths},
+        "changed": {
+            p: new_paths[p] - f for p, f in old_paths.items()
+            if p in new_paths and new_paths[p] != f
+        }
+    }
+
+
+def test_diff():
+    old_forest = _analyze("import os\nos.a.b\nos.c\nimport sys\n")
+    new_forest = _analyze("import os\nos.a.b\nos.a.b\nos.d()\nimport json\n")
+
+    assert diff_forests(old_forest, new_forest) == {
+        "added": {"os.d": 1, "json": 1},
+        "removed": {"os.c": 1, "sys": 1},
+        "changed": {"os": 1, "os.a": 1, "os.a.b": 1}
+    }
+
+
+def test_identical_forests():
+    forest = _analyze("import os\nos.a.b\n")
+
+    assert diff_forests(forest, _analyze("import os\nos.a.b\n")) == {"added": {}, "removed": {}, "changed": {}}
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_matches_path_comparison(seed):
+    old_forest = _analyze(ProgramGenerator(seed).program(4))
+    new_forest = _analyze(ProgramGenerator(seed + 1000).program(4))
+
+    assert diff_forests(old_forest, new_forest) == _diff_paths(old_forest, new_forest)
+
+
+def test_shared_subtrees():
+    interner = TreeInterner()
+    old_forest = [interner.intern(t) for t in _analyze("import os\nos.a.b\nos.c\n")]
+    new_forest = [interner.intern(t) for t in _analyze("import os\nos.a.b\nos.d\n")]
+
+    assert diff_forests(old_forest, new_forest) == _diff_paths(old_forest, new_forest)
+
+
+def test_main(tmp_path, capsys):
+    old, new = tmp_path / "old.py", tmp_path / "new.py"
+    old.write_text("import os\nos.getcwd()\n")
+    new.write_text("import os\nos.getcwd()\nos.sep\n")
+
+    assert main([str(old), str(new)]) == 0
+    assert json.loads(capsys.readouterr().out)["added"] == {"os.sep": 1}
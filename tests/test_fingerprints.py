@@ -0,0 +1,97 @@
+# Standard Library
+import ast
+import pickle
+from copy import deepcopy
+
+# Third Party
+import pytest
+
+# Local Modules
+from programs import ProgramGenerator
+from saplings import Saplings
+from saplings.fingerprints import TreeInterner, fingerprint_tree, fingerprint_tuplified_tree
+from saplings.rendering import tuplify_tree, build_tree
+
+
+def _analyze(source):
+    return Saplings(ast.parse(source), [], {}).get_trees()
+
+
+def _canonicalize(node_tuple, frequencies=True):
+    name, is_callable, order, frequency, children = node_tuple
+    children = sorted(_canonicalize(child, frequencies) for child in children)
+
+    return (name, is_callable, order, frequency if frequencies else None, tuple(children))
+
+
+def _iter_trees(num_programs):
+    for seed in range(num_programs):
+        yield from _analyze(ProgramGenerator(seed).program(4))
+
+
+def test_children_order_is_ignored():
+    tree = _analyze("import os\nos.a.b\nos.c\nos.a.d()\n")[0]
+    reordered = deepcopy(tree)
+    reordered.children.reverse()
+    reordered.children[-1].children.reverse()
+
+    assert fingerprint_tree(tree) == fingerprint_tree(reordered)
+
+
+def test_frequencies():
+    first = _analyze("import os\nos.a\n")[0]
+    second = _analyze("import os\nos.a\nos.a\n")[0]
+
+    assert fingerprint_tree(first) != fingerprint_tree(second)
+    assert fingerprint_tree(first, frequencies=False) == fingerprint_tree(second, frequencies=False)
+
+
+@pytest.mark.parametrize("frequencies", [True, False])
+def test_equal_iff_structurally_equal(frequencies):
+    trees = list(_iter_trees(40))
+    for tree in trees:
+        assert fingerprint_tuplified_tree(tuplify_tree(tree), frequencies) == fingerprint_tree(tree, frequencies)
+
+    fingerprints = [fingerprint_tree(tree, frequencies) for tree in trees]
+    canonical_trees = [_canonicalize(tuplify_tree(tree), frequencies) for tree in trees]
+    for fingerprint, canonical_tree in zip(fingerprints, canonical_trees):
+        assert [f == fingerprint for f in fingerprints] == [t == canonical_tree for t in canonical_trees]
+
+
+def test_memo_has_every_subtree():
+    tree = _analyze("import os\nos.a.b\nos.c\n")[0]
+    memo = {}
+    fingerprint_tree(tree, memo=memo)
+
+    assert memo[id(tree.children[0])] == fingerprint_tree(tree.children[0])
+    assert len(memo) == 4
+
+
+def test_interned_trees_are_unchanged_and_shared():
+    interner = TreeInterner()
+    trees = list(_iter_trees(20)) + list(_iter_trees(20))
+    expected = [tuplify_tree(tree) for tree in trees]
+    interned = [interner.intern(tree) for tree in trees]
+
+    assert [tuplify_tree(tree) for tree in interned] == expected
+
+    # The second copy of every tree is the first one
+    half = len(interned) // 2
+    assert all(a is b for a, b in zip(interned[:half], interned[half:]))
+
+
+def test_interned_tuples_are_unchanged_and_shared():
+    interner = TreeInterner()
+    trees = [tuplify_tree(tree) for tree in _iter_trees(20)]
+    interned = [interner.intern_tuple(tree) for tree in trees + deepcopy(trees)]
+
+    assert interned[:len(trees)] == trees
+    assert all(a is b for a, b in zip(interned[:len(trees)], interned[len(trees):]))
+    assert len(pickle.dumps(interned)) < 2 * len(pickle.dumps(trees))
+
+    # Identical subtrees of different trees are shared too
+    first = interner.intern_tuple(tuplify_tree(_analyze("import os\nos.a.b\nimport sys\n")[0]))
+    second = interner.intern_tuple(tuplify_tree(_analyze("import os\nos.a.b\nos.c\n")[0]))
+
+    assert first[4][0] is second[4][0]
+    assert build_tree(first).name == "os"
@@ -0,0 +1,124 @@
+# Standard Library
+import ast
+import os
+import subprocess
+
+# Third Party
+import pytest
+
+# Local Modules
+import saplings.history as history
+from saplings import Saplings
+from saplings.history import HistoryMiner, usage_time_series
+from saplings.rendering import flatten_tree
+
+# Each commit maps paths to their new sources (None deletes the file)
+COMMITS = [
+    {"a.py": "import numpy as np\nnp.zeros(3)\n", "notes.txt": "hi"},
+    {"b.py": "import numpy as np\nnp.zeros(3)\n", "c.py": "import os\nos.getcwd()\n"},
+    {"a.py": "import numpy as np\nnp.ones(3).sum()\n", "d.py": "def f(:\n"},
+    {"c.py": None, "b.py": "import numpy as np\nnp.zeros(3)\n# Changed\n"},
+    {"a.py": "import numpy as np\nnp.zeros(3)\n"}
+]
+
+
+def _git(repo, *args):
+    env = dict(
+        os.environ,
+        GIT_AUTHOR_NAME="a", GIT_AUTHOR_EMAIL="a@a", GIT_COMMITTER_NAME="a",
+        GIT_COMMITTER_EMAIL="a@a"
+    )
+    subprocess.run(["git", "-C", repo, *args], check=True, env=env, capture_output=True)
+
+
+def _get_frequencies(files):
+    frequencies = {}
+    for source in files.values():
+        try:
+            trees = Saplings(ast.parse(source), [], {}).get_trees()
+        except SyntaxError:
+            continue
+
+        for tree in trees:
+            for path, frequency in flatten_tree(tree).items():
+                frequencies[path] = frequencies.get(path, 0) + frequency
+
+    return frequencies
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = str(tmp_path)
+    _git(repo, "init", "-q")
+    for index, changes in enumerate(COMMITS):
+        for path, source in changes.items():
+            if source is None:
+                os.remove(os.path.join(repo, path))
+            else:
+                with open(os.path.join(repo, path), 'w') as file:
+                    file.write(source)
+
+        _git(repo, "add", "-A")
+        _git(repo, "commit", "-q", "-m", f"commit {index}")
+
+    return repo
+
+
+def test_matches_analysis_of_each_commit(repo):
+    miner = HistoryMiner(repo)
+
+    files, previous = {}, {}
+    for (_, _, delta), changes in zip(miner.iter_commits(), COMMITS):
+        for path, source in changes.items():
+            if not path.endswith(".py"):
+                continue
+            elif source is None:
+                del files[path]
+            else:
+                files[path] = source
+
+        frequencies = _get_frequencies(files)
+        changed = {
+            path: frequencies.get(path, 0) - previous.get(path, 0)
+            for path in set(frequencies) | set(previous)
+        }
+
+        assert miner.frequencies == frequencies
+        assert delta == {path: change for path, change in changed.items() if change}
+        assert sorted(miner.files) == sorted(files)
+
+        previous = frequencies
+
+    assert [path for _, path, _ in miner.errors] == ["d.py"]
+
+
+def test_blobs_are_analyzed_once(repo, monkeypatch):
+    sources = []
+    analyze_source = history.analyze_source
+    monkeypatch.setattr(history, "analyze_source", lambda source, path: (
+        sources.append(source) or analyze_source(source, path)
+    ))
+    list(HistoryMiner(repo).iter_commits())
+
+    # a.py's first and last versions, and b.py's first version, are the same
+    assert len(sources) == len(set(sources)) == 5
+
+
+def test_get_trees(repo):
+    miner = HistoryMiner(repo)
+    for _ in miner.iter_commits():
+        paths = {}
+        for tree in miner.get_trees():
+            paths.update(flatten_tree(tree))
+
+        assert paths == miner.frequencies
+
+
+def test_usage_time_series(repo):
+    commits, series = usage_time_series(repo, paths={"numpy.zeros", "os.getcwd"})
+
+    assert len(commits) == len(COMMITS)
+    assert series == {
+        "numpy.zeros": [(0, 1), (1, 2), (2, 1), (4, 2)],
+        "os.getcwd": [(1, 1), (3, 0)]
+    }
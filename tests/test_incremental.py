@@ -0,0 +1,101 @@
+# Standard Library
+import ast
+import random
+
+# Third Party
+import pytest
+
+# Local Modules
+from programs import MODULES, ProgramGenerator
+from saplings import Saplings
+from saplings.incremental import IncrementalModule
+from saplings.rendering import flatten_tree
+
+
+def _get_paths(trees):
+    paths = {}
+    for tree in trees:
+        paths.update(flatten_tree(tree))
+
+    return paths
+
+
+def _analyze(source):
+    return _get_paths(Saplings(ast.parse(source), [], {}).get_trees())
+
+
+def _update(source, new_source):
+    module = IncrementalModule(source)
+    module.update(new_source)
+
+    return _get_paths(module.get_trees())
+
+
+def test_removing_first_import_keeps_module():
+    source = "import pandas as pd\ny = 1\nimport pandas as pd\n"
+    new_source = "y = 1\nimport pandas as pd\n"
+
+    assert _update(source, new_source) == _analyze(new_source) == {"pandas": 1}
+
+
+def test_import_counted_by_inserted_statement():
+    module = IncrementalModule("import os.path\nos.path.join\n")
+    sources = [
+        "from os import path\nimport os.path\nos.path.join\n",
+        "from os import path\nos.path.join\n"
+    ]
+    for source in sources:
+        module.update(source)
+
+        assert _get_paths(module.get_trees()) == _analyze(source)
+
+
+def test_name_deleted_by_inserted_statement():
+    block = "try:\n    b = np.fit\nexcept np.Error:\n    b = b.zeros\n"
+    source = "import numpy as np\n" + block + block
+    new_source = "import numpy as np\n" + block + "for b in x:\n    b = b[0]\n" + block
+
+    assert _update(source, new_source) == _analyze(new_source)
+
+
+def test_sub_alias_bound_by_inserted_statement():
+    source = "\n".join([
+        "import os",
+        "for c in os.x():",
+        "    b = 1",
+        "for b in os.y:",
+        "    c = b[0]",
+        "c.fit"
+    ])
+    new_source = source.replace("for b in os.y", "a = f0(c.fit)\nfor b in os.y")
+
+    assert _update(source, new_source) == _analyze(new_source)
+
+
+@pytest.mark.parametrize("seed", range(400))
+def test_matches_saplings_after_edits(seed):
+    generator = ProgramGenerator(seed, nested_calls=False)
+    units = generator.units(6)
+    if any(unit[0].startswith("class") for unit in units):
+        # Attributes set on instances in place aren't tracked (see
+        # `IncrementalModule`)
+        pytest.skip("program defines classes")
+
+    rng = random.Random(seed)
+    module = IncrementalModule("\n".join(line for unit in units for line in unit))
+    for _ in range(6):
+        index = rng.randrange(len(units) + 1)
+        edit = rng.randrange(4)
+        if edit == 0 and units:
+            del units[min(index, len(units) - 1)]
+        elif edit == 1:
+            units.insert(index, [f"import {rng.choice(MODULES)}"])
+        elif edit == 2:
+            units.insert(index, generator.statement())
+        else: # Duplicate of another unit
+            units.insert(index, units[rng.randrange(len(units))])
+
+        source = "\n".join(line for unit in units for line in unit)
+        module.update(source)
+
+        assert _get_paths(module.get_trees()) == _analyze(source)
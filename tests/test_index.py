@@ -0,0 +1,71 @@
+# Standard Library
+import ast
+
+# Third Party
+import pytest
+
+# Local Modules
+from programs import ProgramGenerator
+from saplings import Saplings
+from saplings.index import TreeIndex, parse_path
+from saplings.rendering import iter_tree_paths
+
+
+def _analyze(source):
+    return Saplings(ast.parse(source), [], {}).get_trees()
+
+
+def _iter_paths(forest):
+    for tree in forest:
+        yield from iter_tree_paths(tree)
+
+
+def _get_ids(items):
+    # ObjectNodes compare by structure, so they're told apart by identity
+    return sorted((path, id(node)) for path, node in items)
+
+
+def test_parse_path():
+    assert parse_path("torch.nn.Linear().forward") == [
+        ("torch", -1), ("nn", 0), ("Linear", 0), ("forward", 1)
+    ]
+    assert parse_path("a()().b") == [("a", -1), ("b", 2)]
+
+
+@pytest.mark.parametrize("path", ["a.", ".a", "a(.b", "a()", "a..b"])
+def test_invalid_paths(path):
+    with pytest.raises(ValueError):
+        parse_path(path)
+
+
+def test_lookup():
+    index = TreeIndex(_analyze("import torch\ntorch.nn.Linear(3).forward(x)\ntorch.nn.Module.x\n"))
+
+    assert index.lookup("torch.nn.Linear().forward").name == "forward"
+    assert index.lookup("torch.nn.Linear()").name == "Linear"
+    assert index.lookup("torch.nn.Module()") is None # Not callable
+    assert index.lookup("torch.nn.Linear.forward") is None
+    assert index.lookup("numpy") is None
+    assert "torch.nn.Module.x" in index
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_matches_scan(seed):
+    forest = _analyze(ProgramGenerator(seed).program(5))
+    index = TreeIndex(forest)
+    paths = list(_iter_paths(forest))
+
+    assert len(index) == len(paths)
+    for path, node in paths:
+        assert index.lookup(path) is node
+        assert all(index.get_parent(child) is node for child in node.children)
+        assert {id(c) for c in index.get_children(node).values()} == {id(c) for c in node.children}
+
+        by_name = [(p, n) for p, n in paths if n.name == node.name]
+        assert _get_ids(index.find(node.name)) == _get_ids(by_name)
+
+    for prefix in {path[:length] for path, _ in paths for length in (1, 3, 8)}:
+        matches = list(index.iter_prefix(prefix))
+
+        assert [p for p, _ in matches] == sorted(p for p, _ in paths if p.startswith(prefix))
+        assert _get_ids(matches) == _get_ids((p, n) for p, n in paths if p.startswith(prefix))
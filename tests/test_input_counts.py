@@ -0,0 +1,98 @@
+# Standard Library
+import ast
+import json
+
+# Third Party
+import pytest
+
+# Local Modules
+from programs import ProgramGenerator
+from saplings import Saplings
+from saplings.aggregation import Aggregate
+from saplings.cli import main
+from saplings.rendering import flatten_tree
+from saplings.sketches import HyperLogLog
+
+
+def _analyze(source):
+    return Saplings(ast.parse(source), [], {}).get_trees()
+
+
+@pytest.mark.parametrize("num_items", [0, 1, 10, 100, 1000, 20000])
+@pytest.mark.parametrize("precision", [4, 10, 14])
+def test_count_is_within_error(num_items, precision):
+    sketch = HyperLogLog(precision)
+    for i in range(num_items):
+        sketch.add(f"file{i}.py")
+        sketch.add(f"file{i}.py") # Duplicates aren't counted
+
+    # Four standard errors, plus one for tiny counts
+    error = 4 * 1.04 / (1 << precision) ** 0.5
+
+    assert abs(sketch.count() - num_items) <= error * num_items + 1
+
+
+@pytest.mark.parametrize("num_items", [5, 5000])
+def test_merge_and_serialization(num_items):
+    first, second, union = HyperLogLog(), HyperLogLog(), HyperLogLog()
+    for i in range(num_items):
+        (first if i % 3 else second).add(i)
+        union.add(i)
+
+    merged = first.copy()
+    merged.merge(second)
+
+    assert merged.count() == union.count()
+    assert first.copy().count() == first.count()
+    assert HyperLogLog.from_bytes(merged.to_bytes()).count() == merged.count()
+
+
+def test_sparse_sketches_stay_small():
+    sketch = HyperLogLog()
+    sketch.add("a.py")
+
+    assert len(sketch.to_bytes()) == 5
+
+
+def test_invalid_merges():
+    with pytest.raises(ValueError):
+        HyperLogLog(3)
+    with pytest.raises(ValueError):
+        HyperLogLog(10).merge(HyperLogLog(11))
+
+
+def test_matches_exact_input_counts():
+    aggregate = Aggregate(sketch_precision=12)
+    inputs = {}
+    for i in range(60):
+        trees = _analyze(ProgramGenerator(i).program(3))
+        for tree in trees:
+            for path in flatten_tree(tree):
+                inputs.setdefault(path, set()).add(i)
+
+        aggregate.add(f"{i}.py", trees)
+
+    counts = aggregate.count_inputs()
+
+    assert set(counts) == set(inputs)
+    for path, files in inputs.items():
+        assert abs(counts[path] - len(files)) <= 0.1 * len(files) + 1
+
+    # Inputs that are in both aggregates are only counted once
+    other = Aggregate(sketch_precision=12)
+    for i in range(30, 90):
+        other.add(f"{i}.py", _analyze(ProgramGenerator(i).program(3)))
+
+    aggregate.merge(other)
+    assert abs(aggregate.count_inputs()["numpy"] - 90) <= 10
+
+
+def test_cli(tmp_path, capsys):
+    for i in range(3):
+        (tmp_path / f"{i}.py").write_text("import os\n" + "os.getcwd()\n" * i)
+
+    assert main([str(tmp_path), "--aggregate", "--count-inputs", "-f", "json"]) == 0
+
+    output = json.loads(capsys.readouterr().out)
+    assert output["total"] == 3
+    assert output["paths"] == [{"path": "os", "inputs": 3}, {"path": "os.getcwd", "inputs": 2}]
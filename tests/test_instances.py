@@ -0,0 +1,116 @@
+# Standard Library
+import ast
+import random
+
+# Third Party
+import pytest
+
+# Local Modules
+import saplings.saplings as sapl
+from programs import ProgramGenerator
+from saplings import Saplings
+from saplings.entities import InstanceNamespace
+from saplings.rendering import flatten_tree
+
+ATTRIBUTES = ["v", "w", "method"]
+
+
+def _analyze(source):
+    paths = {}
+    for tree in Saplings(ast.parse(source), [], {}).get_trees():
+        paths.update(flatten_tree(tree))
+
+    return paths
+
+
+def _program(seed):
+    """
+    Generates a program that instantiates a class several times and sets,
+    reads, and deletes attributes of the instances.
+    """
+
+    rng = random.Random(seed)
+    lines = [
+        "import numpy as np",
+        "class C:",
+        "    v = np.static",
+        "    def __init__(self, a):",
+        "        self.w = a",
+        "    def method(self):",
+        "        return self.v",
+        "x = y = C(np.init)"
+    ]
+    for _ in range(10):
+        name, attribute = rng.choice("xy"), rng.choice(ATTRIBUTES)
+        choice = rng.randrange(5)
+        if choice == 0:
+            lines.append(f"{name} = C(np.{rng.choice('abc')})")
+        elif choice == 1:
+            lines.append(f"{name}.{rng.choice('vw')} = np.{rng.choice('abc')}")
+        elif choice == 2:
+            lines.append(f"del {name}.{rng.choice('vw')}")
+        elif choice == 3:
+            lines.append(f"if cond:\n    {name}.v = {rng.choice('xy')}.{attribute}")
+        else:
+            lines.append(f"{name}.{attribute}.attr")
+
+    lines.append("x.method().end")
+    return "\n".join(lines)
+
+
+def test_instance_namespace():
+    template = {"a": 1, "b": 2}
+    namespace = InstanceNamespace(template)
+    namespace["c"] = 3
+    namespace["a"] = 4
+    del namespace["b"]
+
+    assert dict(namespace) == {"a": 4, "c": 3} and len(namespace) == 2
+    assert "b" not in namespace
+    with pytest.raises(KeyError):
+        namespace["b"]
+
+    namespace_copy = namespace.copy()
+    namespace_copy["b"] = 5
+
+    assert "b" not in namespace and namespace_copy["b"] == 5
+    assert template == {"a": 1, "b": 2}
+
+
+def test_instances_share_the_class_namespace():
+    source = "import numpy as np\nclass C:\n    v = np.a\n    def f(self):\n        return self.v\nx = C()\ny = C()\n"
+    saplings = Saplings(ast.parse(source + "x.v = np.b\n"), [], {})
+    x, y = saplings._namespace['x'], saplings._namespace['y']
+    template = saplings._namespace['C'].init_instance_namespace
+
+    assert x.namespace.template is y.namespace.template is template
+    assert list(x.namespace.overlay) == ["v"] and not y.namespace.overlay
+    assert template["v"] is y.namespace["v"]
+
+
+def test_writes_are_per_instance():
+    source = "\n".join([
+        "import numpy as np",
+        "class C:",
+        "    v = np.a",
+        "x = C()",
+        "y = C()",
+        "x.v = np.b",
+        "y.v.c",
+        "x.v.d"
+    ])
+    paths = _analyze(source)
+
+    assert "numpy.a.c" in paths and "numpy.b.d" in paths
+    assert "numpy.b.c" not in paths and "numpy.a.d" not in paths
+
+
+@pytest.mark.parametrize("seed", range(150))
+def test_matches_copied_namespaces(seed, monkeypatch):
+    sources = [_program(seed), ProgramGenerator(seed).program(6)]
+    paths = [_analyze(source) for source in sources]
+
+    # Every instance gets a copy of its class's namespace
+    monkeypatch.setattr(sapl, "InstanceNamespace", dict)
+
+    assert paths == [_analyze(source) for source in sources]
@@ -0,0 +1,85 @@
+# Standard Library
+import ast
+import io
+from itertools import combinations
+
+# Third Party
+import pytest
+
+# Local Modules
+from programs import ProgramGenerator
+from saplings import Saplings
+from saplings.analysis import write_binary_result
+from saplings.mining import _iter_ancestor_paths, get_path_set, main, mine_frequent_pathsets
+from saplings.rendering import tuplify_tree
+
+
+def _analyze(source):
+    return Saplings(ast.parse(source), [], {}).get_trees()
+
+
+def _mine_exhaustively(path_sets, min_support, max_size):
+    # Every set of paths, none of which is an ancestor of another (a file that
+    # uses a path always uses its ancestors)
+    counts = {}
+    for paths in path_sets:
+        for size in range(1, max_size + 1):
+            for itemset in combinations(sorted(paths), size):
+                counts[itemset] = counts.get(itemset, 0) + 1
+
+    return {
+        itemset: count for itemset, count in counts.items()
+        if count >= min_support and not any(
+            first in _iter_ancestor_paths(second) or second in _iter_ancestor_paths(first)
+            for first, second in combinations(itemset, 2)
+        )
+    }
+
+
+def test_get_path_set():
+    trees = _analyze("import numpy as np\nnp.array(x).sum()\n")
+    paths = {"numpy", "numpy.array", "numpy.array().sum"}
+
+    assert get_path_set(trees) == paths
+    assert get_path_set([tuplify_tree(tree) for tree in trees]) == paths
+
+
+def test_ancestors_are_not_paired():
+    forests = [_analyze("import os\nos.path.join()\nimport sys\n")] * 2
+    results = dict(mine_frequent_pathsets(lambda: iter(forests), 2, max_size=2))
+
+    assert ("os", "sys") in results and ("os.path.join", "sys") in results
+    assert ("os", "os.path") not in results and ("os.path", "os.path.join") not in results
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_matches_exhaustive_mining(seed):
+    forests = [
+        [tuplify_tree(tree) for tree in _analyze(ProgramGenerator(seed * 100 + i).program(2))]
+        for i in range(8)
+    ]
+    results = mine_frequent_pathsets(lambda: iter(forests), 3, max_size=3)
+    expected = _mine_exhaustively([get_path_set(f) for f in forests], 3, 3)
+
+    assert dict(results) == expected
+    assert [support for _, support in results] == sorted(expected.values(), reverse=True)
+
+
+def test_fractional_support():
+    forests = [_analyze("import os\n")] * 3 + [_analyze("import sys\n")]
+
+    assert mine_frequent_pathsets(lambda: iter(forests), 0.5) == [(("os",), 3)]
+
+
+def test_main(tmp_path, capsys):
+    results_path = tmp_path / "results.bin"
+    stream = io.BytesIO()
+    for i, source in enumerate(["import os\nos.sep\n", "import os\nos.sep\nimport sys\n"]):
+        write_binary_result(stream, f"{i}.py", [tuplify_tree(t) for t in _analyze(source)])
+    results_path.write_bytes(stream.getvalue())
+
+    assert main([str(results_path), "-s", "2", "--min-size", "1"]) == 0
+    assert capsys.readouterr().out.splitlines() == [
+        '{"paths": ["os"], "support": 2}',
+        '{"paths": ["os.sep"], "support": 2}'
+    ]
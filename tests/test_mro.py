@@ -0,0 +1,100 @@
+# Standard Library
+import ast
+import random
+
+# Third Party
+import pytest
+
+# Local Modules
+from saplings import Saplings
+from saplings.entities import Class
+from saplings.rendering import flatten_tree
+
+
+def _analyze(source):
+    paths = {}
+    for tree in Saplings(ast.parse("import numpy as np\n" + source), [], {}).get_trees():
+        paths.update(flatten_tree(tree))
+
+    return paths
+
+
+def _hierarchy(seed, size=8):
+    """
+    Generates a random class hierarchy that Python accepts (i.e. one with a
+    consistent MRO).
+    """
+
+    rng = random.Random(seed)
+    lines = []
+    for i in range(size):
+        bases = rng.sample(range(i), rng.randint(0, min(i, 3)))
+        line = f"class C{i}({', '.join(f'C{b}' for b in bases)}):\n    pass"
+        try:
+            exec("\n".join(lines + [line]), {})
+        except TypeError: # Inconsistent MRO
+            line = f"class C{i}:\n    pass"
+
+        lines.append(line)
+
+    return "\n".join(lines)
+
+
+@pytest.mark.parametrize("source, path", [
+    ("class A:\n    def f(self):\n        return np.a\nclass B(A):\n    pass\nB().f().x", "numpy.a.x"),
+    ("class A:\n    def __init__(self, v):\n        self.v = v\nclass B(A):\n    pass\nB(np.a).v.c", "numpy.a.c"),
+    ("class A:\n    def __call__(self):\n        return np.a\nclass B(A):\n    pass\nB()().c", "numpy.a.c"),
+    ("class A:\n    def f(self):\n        return np.a\nclass B(A):\n    def f(self):\n        return np.b\nB().f().x", "numpy.b.x"),
+    ("class A:\n    def f(self):\n        return self.g()\nclass B(A):\n    def g(self):\n        return np.b\nB().f().x", "numpy.b.x")
+])
+def test_inherited_methods(source, path):
+    assert path in _analyze(source)
+
+
+def test_diamond_follows_c3():
+    source = "\n".join([
+        "class A:",
+        "    def f(self):",
+        "        return np.a",
+        "class B(A):",
+        "    pass",
+        "class C(A):",
+        "    def f(self):",
+        "        return np.c",
+        "class D(B, C):",
+        "    pass",
+        "D().f().x"
+    ])
+    paths = _analyze(source)
+
+    # A depth-first search would resolve `f` to `A.f`
+    assert "numpy.c.x" in paths and "numpy.a.x" not in paths
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_matches_python_mro(seed):
+    source = _hierarchy(seed)
+    classes = {}
+    exec(source, classes)
+    saplings = Saplings(ast.parse(source), [], {})
+
+    for name, cls in classes.items():
+        if not name.startswith('C'):
+            continue
+
+        mro = saplings._namespace[name].get_mro()
+        assert [c.def_node.name for c in mro] == [c.__name__ for c in cls.__mro__[:-1]]
+
+
+def test_namespaces_are_cached_until_a_base_changes():
+    base = Class(None, {}, {"f": "base", "g": "base"})
+    sub = Class(None, {}, {"g": "sub"}, bases=[base])
+
+    assert sub.get_mro() is sub.get_mro()
+
+    namespace = sub.get_namespace()
+    assert namespace == {"f": "base", "g": "sub"}
+    assert sub.get_namespace() is namespace
+
+    base.init_instance_namespace = {"f": "new", "h": "new"}
+    assert sub.get_namespace() == {"f": "new", "g": "sub", "h": "new"}
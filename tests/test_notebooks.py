@@ -0,0 +1,122 @@
+# Standard Library
+import ast
+import json
+
+# Third Party
+import pytest
+
+# Local Modules
+from saplings import Saplings
+from saplings.analysis import _analyze_input, _init_worker
+from saplings.notebooks import NotebookAnalyzer, analyze_notebook, strip_magics
+from saplings.rendering import flatten_tree
+
+
+def _get_paths(trees):
+    paths = {}
+    for tree in trees:
+        paths.update(flatten_tree(tree))
+
+    return paths
+
+
+def _make_notebook(*cells):
+    return json.dumps({
+        "cells": [{"cell_type": "code", "source": cell} for cell in cells]
+    })
+
+
+@pytest.mark.parametrize("source, stripped", [
+    ("%matplotlib inline\nimport os\n", "pass\nimport os\n"),
+    ("files = !ls\nif files:\n    !rm x\n", "pass\nif files:\n    pass\n"),
+    ("np.array?\n??np.load\n", "pass\npass\n"),
+    ("%time df = pd.read_csv(f)\n", "df = pd.read_csv(f)\n"),
+    ("x = 'is it?'\n", "x = 'is it?'\n"),
+    ("%%bash\nls\n", None),
+    ("!echo don't\nfoo?\n", "pass\npass\n")
+])
+def test_strip_magics(source, stripped):
+    assert strip_magics(source) == stripped
+
+
+@pytest.mark.parametrize("source", [
+    "x = 1 + \\\n%d\n",
+    "x = (a\n     % b)\n",
+    "x = [a,\n!b]\n",
+    "s = \"\"\"\n!not a magic\n%neither\n\"\"\"\n",
+    "s = 'a\\\n!b'\n"
+])
+def test_continuation_lines_are_kept(source):
+    assert strip_magics(source) == source
+
+
+def test_magic_after_continued_line_is_stripped():
+    source = "x = (1 +\n     2)\n%pwd\n"
+
+    assert strip_magics(source) == "x = (1 +\n     2)\npass\n"
+
+
+def test_cells_share_a_namespace():
+    notebook = _make_notebook("import numpy as np", "%pwd\nx = np.zeros(3)", "x.sum()")
+    trees, errors = analyze_notebook(notebook)
+
+    assert errors == []
+    assert "numpy.zeros().sum" in _get_paths(trees)
+
+
+def test_broken_cells_are_reported():
+    notebook = _make_notebook("import os", "def f(:\n    pass", "os.getcwd()")
+    trees, errors = analyze_notebook(notebook)
+
+    assert [index for index, _ in errors] == [1]
+    assert errors[0][1].startswith("SyntaxError")
+    assert "os.getcwd" in _get_paths(trees)
+
+
+def test_cli_reports_broken_cells(tmp_path):
+    path = tmp_path / "notebook.ipynb"
+    path.write_text(_make_notebook("import os", "x = (", "os.getcwd()"))
+
+    _init_worker(None, None)
+    _, tuplified_trees, errors = _analyze_input(str(path))
+
+    assert tuplified_trees
+    assert len(errors) == 1 and errors[0].startswith("cell 1: SyntaxError")
+
+
+def test_cells_run_in_execution_order():
+    notebook = json.dumps({"cells": [
+        {"cell_type": "code", "execution_count": 2, "source": "import os\nos.x"},
+        {"cell_type": "code", "execution_count": 1, "source": "os = None"}
+    ]})
+    trees, _ = analyze_notebook(notebook)
+
+    assert "os.x" in _get_paths(trees)
+
+
+def test_analyzer_matches_full_analysis_after_edits():
+    cells = ["import numpy as np", "x = np.zeros(3)", "def f(a):\n    return a.sum()", "f(x)"]
+    analyzer = NotebookAnalyzer(cells)
+    edits = [
+        ("update_cell", 1, "x = np.ones(3)"),
+        ("insert_cell", 2, "y = x.mean()"),
+        ("delete_cell", 3, None),
+        ("append_cell", None, "f(y)")
+    ]
+    for method, index, source in edits:
+        if method == "delete_cell":
+            analyzer.delete_cell(index)
+            del cells[index]
+        elif method == "append_cell":
+            analyzer.append_cell(source)
+            cells.append(source)
+        else:
+            getattr(analyzer, method)(index, source)
+            if method == "insert_cell":
+                cells.insert(index, source)
+            else:
+                cells[index] = source
+
+        program = Saplings(ast.parse("\n".join(cells)), [], {})
+
+        assert _get_paths(analyzer.get_trees()) == _get_paths(program.get_trees())
@@ -0,0 +1,95 @@
+# Standard Library
+import ast
+import random
+
+# Third Party
+import pytest
+
+# Local Modules
+from programs import ProgramGenerator, ATTRIBUTES
+from saplings import Saplings
+from saplings.index import TreeIndex
+from saplings.patterns import Pattern
+
+SOURCE = "\n".join([
+    "import torch",
+    "import numpy as np",
+    "model = torch.nn.Linear(3)",
+    "model.forward(x).sum()",
+    "model.weight.shape",
+    "torch.nn.Module",
+    "np.linalg.svd(x)",
+    "np.linspace(0, 1)",
+    "np.array(x).__index__",
+    "np.array(x).T.__index__",
+    "np.array(x).T.__index__"
+])
+
+
+def _query(pattern, source=SOURCE):
+    index = TreeIndex(Saplings(ast.parse(source), [], {}).get_trees())
+    return [path for path, _ in index.query(pattern)]
+
+
+def _scan(pattern, index):
+    # Runs the pattern's automaton over every node, without the pruning and
+    # anchoring that `Pattern.search` does
+    results = []
+    stack = [(root, root.name, pattern._initial_states) for root in index.roots.values()]
+    while stack:
+        node, path, states = stack.pop()
+        next_states, is_match = pattern._step(node, states)
+        if is_match:
+            results.append((path, id(node)))
+
+        for child in node.children:
+            stack.append((child, path + "()" * child.order + '.' + child.name, next_states))
+
+    return sorted(results)
+
+
+@pytest.mark.parametrize("pattern, paths", [
+    ("torch.nn.Linear().forward", ["torch.nn.Linear().forward"]),
+    ("torch.nn.Linear.forward", []),
+    ("torch.nn.*", ["torch.nn.Linear", "torch.nn.Module"]),
+    ("torch.nn.*()", ["torch.nn.Linear"]),
+    ("np.lin*", []),
+    ("numpy.lin*", ["numpy.linalg", "numpy.linspace"]),
+    ("numpy.**.svd", ["numpy.linalg.svd"]),
+    ("numpy.**.__index__", ["numpy.array().T.__index__", "numpy.array().__index__"]),
+    ("numpy.array().**.__index__", ["numpy.array().T.__index__", "numpy.array().__index__"]),
+    ("numpy.**.__index__[freq>=2]", ["numpy.array().T.__index__"]),
+    ("torch.**.*[callable,order=1]", ["torch.nn.Linear().forward", "torch.nn.Linear().forward().sum"]),
+    ("torch.**.*[!callable]", [
+        "torch.nn",
+        "torch.nn.Linear().weight",
+        "torch.nn.Linear().weight.shape",
+        "torch.nn.Module"
+    ]),
+    ("**.shape", ["torch.nn.Linear().weight.shape"]),
+    ("*", ["numpy", "torch"])
+])
+def test_query(pattern, paths):
+    assert _query(pattern) == sorted(paths)
+
+
+@pytest.mark.parametrize("pattern", ["a..b", "a.[callable]", "a.**[callable]", "a.b[size>1]", "a.b("])
+def test_invalid_patterns(pattern):
+    with pytest.raises(ValueError):
+        Pattern(pattern)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_matches_exhaustive_scan(seed):
+    rng = random.Random(seed)
+    index = TreeIndex(Saplings(ast.parse(ProgramGenerator(seed).program(5)), [], {}).get_trees())
+    names = [rng.choice(["numpy", "pandas", "os", "torch", "*"])]
+    for _ in range(rng.randrange(1, 4)):
+        names.append(rng.choice(ATTRIBUTES + ["**", "*", "?e*", "*[callable]", "*[order>=1]"]))
+        names[-1] += rng.choice(["", "", "()"])
+
+    pattern = Pattern('.'.join(names))
+    results = index.query(pattern)
+
+    assert sorted((path, id(node)) for path, node in results) == _scan(pattern, index)
+    assert [path for path, _ in results] == sorted(path for path, _ in results)
@@ -0,0 +1,89 @@
+# Local Modules
+from saplings.project import Project
+from saplings.rendering import flatten_tree
+
+
+def _analyze(root, files, path):
+    for name, source in files.items():
+        file_path = root.joinpath(name)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text(source)
+
+    paths = {}
+    for tree in Project(str(root)).analyze_path(str(root.joinpath(path))):
+        paths.update(flatten_tree(tree))
+
+    return paths
+
+
+FILES = {
+    "pkg/__init__.py": "",
+    "pkg/utils.py": "import torch\ndef load_model(x):\n    return torch.load(x)\n"
+}
+
+
+def test_from_import_of_submodule(tmp_path):
+    files = {**FILES, "main.py": "from pkg import utils\nutils.load_model(2).cpu()\n"}
+
+    assert _analyze(tmp_path, files, "main.py") == {
+        "torch": 1,
+        "torch.load": 1,
+        "torch.load().cpu": 1
+    }
+
+
+def test_relative_import_of_submodule(tmp_path):
+    files = {**FILES, "pkg/main.py": "from . import utils\nutils.load_model(2).cpu()\n"}
+
+    assert "torch.load().cpu" in _analyze(tmp_path, files, "pkg/main.py")
+
+
+def test_import_of_submodule(tmp_path):
+    source = "import pkg.utils\npkg.utils.load_model(2).cpu()\n"
+    files = {**FILES, "main.py": source}
+
+    assert "torch.load().cpu" in _analyze(tmp_path, files, "main.py")
+
+
+def test_import_of_submodule_as_alias(tmp_path):
+    source = "import pkg.utils as u\nu.load_model(2).cuda()\n"
+    files = {**FILES, "main.py": source}
+
+    assert "torch.load().cuda" in _analyze(tmp_path, files, "main.py")
+
+
+def test_unknown_name_is_external(tmp_path):
+    source = "from pkg import utils, missing\nmissing.x()\n"
+    files = {**FILES, "main.py": source}
+
+    assert _analyze(tmp_path, files, "main.py") == {
+        "pkg": 1,
+        "pkg.missing": 2,
+        "pkg.missing.x": 1
+    }
+
+
+def test_external_import(tmp_path):
+    files = {"main.py": "import numpy.linalg\nnumpy.linalg.norm()\n"}
+
+    assert "numpy.linalg.norm" in _analyze(tmp_path, files, "main.py")
+
+
+def test_package_imports_own_submodule(tmp_path):
+    files = {
+        **FILES,
+        "pkg/__init__.py": "from . import utils\n",
+        "main.py": "import pkg\npkg.utils.load_model(2).cpu()\n"
+    }
+
+    assert "torch.load().cpu" in _analyze(tmp_path, files, "main.py")
+
+
+def test_function_reexported_by_package(tmp_path):
+    files = {
+        **FILES,
+        "pkg/__init__.py": "from .utils import load_model\n",
+        "main.py": "from pkg import load_model\nload_model(2).cpu()\n"
+    }
+
+    assert "torch.load().cpu" in _analyze(tmp_path, files, "main.py")
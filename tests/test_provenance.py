@@ -0,0 +1,44 @@
+# Standard Library
+import ast
+
+# Third Party
+import pytest
+
+# Local Modules
+from saplings import Saplings
+from saplings.provenance import ProvenanceStore
+
+
+def _locate(source, path, **kwargs):
+    store = ProvenanceStore(**kwargs)
+    recorder = store.recorder("module.py")
+    saplings = Saplings(ast.parse(source), [], {}, recorder=recorder)
+    recorder.commit(saplings._object_hierarchies)
+
+    return store.locate(path)
+
+
+@pytest.mark.parametrize("source, path, line", [
+    ("import numpy as np\nx = [\n    y\n    for y in\n    np.arange(3)\n]\n", "numpy.arange", 5),
+    ("import numpy as np\nx = {\n    y: 0\n    for y in np.arange(3)\n    if y\n}\n", "numpy.arange", 4),
+    ("import numpy as np\nx = [\n    np.abs(y)\n    for y in range(3)\n]\n", "numpy.abs", 3),
+    ("import os\nfor x in (\n    os.walk()\n):\n    pass\n", "os.walk", 3),
+    ("import io\nwith (\n    io.open()\n) as f:\n    pass\n", "io.open", 3),
+    ("import os\ntry:\n    pass\nexcept (\n    os.error\n) as e:\n    pass\n", "os.error", 5)
+])
+def test_synthesized_uses_are_located(source, path, line):
+    assert [use[1] for use in _locate(source, path)] == [line]
+
+
+def test_one_row_per_use():
+    source = "import os\nos.path\nos.path.join()\n"
+
+    assert _locate(source, "os.path") == [("module.py", 2, 0), ("module.py", 3, 0)]
+    assert _locate(source, "os.path.join") == [("module.py", 3, 0)]
+
+
+def test_spilled_rows_are_found(tmp_path):
+    source = "\n".join(["import os"] + ["os.getcwd()"] * 10)
+    uses = _locate(source, "os.getcwd", spill_dir=str(tmp_path), max_buffered_rows=3)
+
+    assert [use[1] for use in uses] == list(range(2, 12))
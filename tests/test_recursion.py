@@ -0,0 +1,102 @@
+# Standard Library
+import ast
+
+# Third Party
+import pytest
+
+# Local Modules
+from saplings import Saplings
+from saplings.rendering import flatten_tree
+
+
+def _analyze(source, max_states=None):
+    paths = {}
+    for tree in Saplings(ast.parse(source), [], {}, max_states=max_states).get_trees():
+        paths.update(flatten_tree(tree))
+
+    return paths
+
+
+@pytest.mark.parametrize("max_states", [None, 4])
+def test_recursive_return_value(max_states):
+    source = "\n".join([
+        "import numpy as np",
+        "def ones(n):",
+        "    if n > 1:",
+        "        prev = ones(n - 1)",
+        "        prev.fill(1)",
+        "    return np.ones(n)",
+        "ones(3).sum()"
+    ])
+
+    # Only the uses of the last pass are counted
+    assert _analyze(source, max_states) == {
+        "numpy": 2,
+        "numpy.ones": 1,
+        "numpy.ones().fill": 1,
+        "numpy.ones().sum": 1
+    }
+
+
+def test_mutually_recursive_return_value():
+    source = "\n".join([
+        "import numpy as np",
+        "def a(n):",
+        "    if n:",
+        "        r = b(n - 1)",
+        "        r.fill()",
+        "    return np.ones(n)",
+        "def b(n):",
+        "    return a(n)",
+        "a(3).sum()"
+    ])
+
+    assert _analyze(source) == {
+        "numpy": 2,
+        "numpy.ones": 1,
+        "numpy.ones().fill": 1,
+        "numpy.ones().sum": 1
+    }
+
+
+def test_recursive_methods():
+    source = "\n".join([
+        "import numpy as np",
+        "class Tree:",
+        "    def build(self, n):",
+        "        if n:",
+        "            self.build(n - 1).grow()",
+        "        return np.zeros(n)",
+        "Tree().build(3).sum()"
+    ])
+    paths = _analyze(source)
+
+    assert "numpy.zeros().grow" in paths and "numpy.zeros().sum" in paths
+
+
+def test_ambiguous_base_case():
+    source = "\n".join([
+        "import some_module",
+        "def my_recursive_func(input):",
+        "    if input > 5:",
+        "        return my_recursive_func(input - 1)",
+        "    elif input > 1:",
+        "        return some_module.foo",
+        "    else:",
+        "        return some_module.bar",
+        "output = my_recursive_func(5)",
+        "output.attr()"
+    ])
+
+    assert _analyze(source) == {"some_module": 3, "some_module.foo": 1, "some_module.bar": 1}
+
+
+@pytest.mark.parametrize("source", [
+    "import os\ndef grow(x):\n    return grow(x).a\ngrow(os.sep).b\n",
+    "import os\ndef f(n):\n    return g(n)\ndef g(n):\n    return f(n)\nf(os.path).c\n",
+    "import os\ndef f(x):\n    return [f(x), x.a]\nf(os.sep)[0][0][1].b\n"
+])
+def test_unbounded_recursion_terminates(source):
+    paths = _analyze(source)
+
+    assert all(path.count('.') <= 6 for path in paths)
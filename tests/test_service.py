@@ -0,0 +1,176 @@
+# Standard Library
+import asyncio
+import multiprocessing
+import os
+import time
+
+# Third Party
+import pytest
+
+# Local Modules
+import saplings.service as service
+from programs import ProgramGenerator
+from saplings.analysis import analyze_source
+from saplings.rendering import dictify_tree
+from saplings.service import AnalysisPool, WorkerCrashedError, analyze_async
+
+# Workers are forked, so that they start quickly and see the monkeypatched
+# `analyze_source`
+FORK = multiprocessing.get_context("fork")
+
+
+def _run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def _slow_analyze_source(source, filename, modules):
+    if source.startswith("#sleep"):
+        time.sleep(float(source.split()[1]))
+    elif source.startswith("#crash"):
+        os._exit(3)
+
+    return analyze_source(source, filename, modules)
+
+
+@pytest.fixture
+def slow_workers(monkeypatch):
+    monkeypatch.setattr(service, "analyze_source", _slow_analyze_source)
+
+
+def test_matches_analyze_source():
+    sources = [ProgramGenerator(seed).program(6) for seed in range(12)]
+
+    async def analyze_all():
+        # The default ("spawn") context
+        async with AnalysisPool(workers=2) as pool:
+            return await asyncio.gather(*(pool.analyze(source) for source in sources))
+
+    results = _run(analyze_all())
+
+    assert results == [[dictify_tree(tree) for tree in analyze_source(source)] for source in sources]
+
+
+def test_filters_modules_and_parses_notebooks():
+    notebook = '{"cells": [{"cell_type": "code", "source": ["import os\\n", "os.getcwd()"]}]}'
+
+    async def analyze_all():
+        async with AnalysisPool(workers=1, context=FORK) as pool:
+            return (
+                await pool.analyze("import os\nimport numpy\nnumpy.zeros", modules={"numpy"}),
+                await pool.analyze(notebook, "notebook.ipynb")
+            )
+
+    filtered, notebook_trees = _run(analyze_all())
+
+    assert [list(tree) for tree in filtered] == [["numpy"]]
+    assert [list(tree) for tree in notebook_trees] == [["os"]]
+
+
+def test_errors_are_raised():
+    async def analyze():
+        async with AnalysisPool(workers=1, context=FORK) as pool:
+            with pytest.raises(SyntaxError):
+                await pool.analyze("def (:", "broken.py")
+
+            return await pool.analyze("import os")
+
+    assert [list(tree) for tree in _run(analyze())] == [["os"]]
+
+
+def test_timeouts_replace_the_worker(slow_workers):
+    async def analyze():
+        async with AnalysisPool(workers=1, timeout=0.5, context=FORK) as pool:
+            await pool.analyze("import os") # Starts the worker
+            with pytest.raises(asyncio.TimeoutError):
+                await pool.analyze("#sleep 30")
+
+            start = time.monotonic()
+            trees = await pool.analyze("import os", timeout=10)
+
+            return trees, time.monotonic() - start
+
+    trees, seconds = _run(analyze())
+
+    # The abandoned analysis isn't waited for
+    assert [list(tree) for tree in trees] == [["os"]] and seconds < 10
+
+
+def test_cancellation(slow_workers):
+    async def analyze():
+        async with AnalysisPool(workers=1, context=FORK) as pool:
+            task = asyncio.ensure_future(pool.analyze("#sleep 30"))
+            await asyncio.sleep(0.5)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+            return await asyncio.wait_for(pool.analyze("import os"), 10)
+
+    assert [list(tree) for tree in _run(analyze())] == [["os"]]
+
+
+def test_crashed_workers_are_replaced(slow_workers):
+    async def analyze():
+        async with AnalysisPool(workers=1, context=FORK) as pool:
+            with pytest.raises(WorkerCrashedError, match="code 3"):
+                await pool.analyze("#crash")
+
+            return await pool.analyze("import os")
+
+    assert [list(tree) for tree in _run(analyze())] == [["os"]]
+
+
+def test_backpressure(slow_workers):
+    async def analyze():
+        async with AnalysisPool(workers=1, max_queued=2, context=FORK) as pool:
+            await pool.analyze("import os") # Starts the worker
+            tasks = [asyncio.ensure_future(pool.analyze("#sleep 0.1")) for _ in range(8)]
+
+            queue_sizes = []
+            while not all(task.done() for task in tasks):
+                queue_sizes.append(pool._requests.qsize())
+                await asyncio.sleep(0.01)
+
+            return max(queue_sizes), [task.result() for task in tasks]
+
+    max_queue_size, results = _run(analyze())
+
+    assert max_queue_size == 2 and results == [[]] * 8
+
+
+def test_event_loop_isnt_blocked(slow_workers):
+    async def analyze():
+        async with AnalysisPool(workers=1, context=FORK) as pool:
+            await pool.analyze("import os") # Starts the worker
+
+            gaps, last_tick = [], time.monotonic()
+            task = asyncio.ensure_future(pool.analyze("#sleep 1"))
+            while not task.done():
+                await asyncio.sleep(0.01)
+                gaps.append(time.monotonic() - last_tick)
+                last_tick = time.monotonic()
+
+            return max(gaps), len(gaps)
+
+    max_gap, num_ticks = _run(analyze())
+
+    assert num_ticks > 10 and max_gap < 0.5
+
+
+def test_default_pool(slow_workers, monkeypatch):
+    monkeypatch.setattr(service, "_default_pool", None)
+    monkeypatch.setattr(service, "AnalysisPool", lambda: AnalysisPool(workers=1, context=FORK))
+
+    async def analyze():
+        first = await analyze_async("import os")
+        pool = service._default_pool
+        second = await analyze_async("import sys")
+        assert service._default_pool is pool
+        await pool.close()
+
+        return first, second
+
+    first, second = _run(analyze())
+
+    assert [list(tree) for tree in first] == [["os"]]
+    assert [list(tree) for tree in second] == [["sys"]]
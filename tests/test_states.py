@@ -0,0 +1,72 @@
+# Standard Library
+import ast
+import dataclasses
+
+# Third Party
+import pytest
+
+# Local Modules
+from programs import ProgramGenerator, iter_paths
+from saplings import Saplings
+from saplings.rendering import flatten_tree
+
+
+def _analyze(source, max_states=None):
+    tree = ast.parse(source) if isinstance(source, str) else source
+    return Saplings(tree, [], {}, max_states=max_states).get_trees()
+
+
+def _get_paths(trees):
+    paths = {}
+    for tree in trees:
+        paths.update(flatten_tree(tree))
+
+    return paths
+
+
+def test_branches_change_forked_instances_independently():
+    source = "\n".join([
+        "import io",
+        "class W:",
+        "    def __init__(self, f):",
+        "        self.fp = io.open(f)",
+        "        if f:",
+        "            self.fp = None",
+        "        else:",
+        "            self.fp.close()",
+        "W('x')"
+    ])
+    trees = _analyze(source, max_states=4)
+
+    assert "io.open().close" in _get_paths(trees)
+
+
+def test_name_bound_on_one_path_only():
+    source = open(dataclasses.__file__).read()
+
+    _analyze(source, max_states=4) # Used to raise a KeyError
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_matches_default_mode_without_branches(seed):
+    source = ProgramGenerator(seed).program(5)
+    tree = ast.parse(source)
+    if any(isinstance(n, (ast.If, ast.IfExp, ast.For, ast.While, ast.Try)) for n in ast.walk(tree)):
+        pytest.skip("program has branches")
+
+    assert _get_paths(_analyze(source, max_states=4)) == _get_paths(_analyze(source))
+
+
+@pytest.mark.parametrize("seed", range(300))
+def test_matches_union_of_paths(seed):
+    source = ProgramGenerator(seed, loops=False).program(5)
+    paths = list(iter_paths(ast.parse(source).body))
+    if len(paths) > 64:
+        pytest.skip("too many paths")
+
+    union = set()
+    for body in paths:
+        module = ast.fix_missing_locations(ast.Module(body=body, type_ignores=[]))
+        union |= set(_get_paths(_analyze(module)))
+
+    assert set(_get_paths(_analyze(source, max_states=64))) == union
@@ -0,0 +1,124 @@
+# Standard Library
+import ast
+import random
+
+# Third Party
+import pytest
+
+# Local Modules
+import saplings.summaries as smry
+from saplings import Saplings
+from saplings.rendering import flatten_tree
+
+ATTRIBUTES = ["x", "y", "fit"]
+DEFINITIONS = [
+    "f0 = lambda v: v.{0}",
+    "f1 = lambda v, w: [v, w.{0}]",
+    "f2 = lambda: a.{0}",
+    "f3 = lambda v: C(v)",
+    "def g0(vs):\n    for v in vs:\n        yield v.{0}",
+    "def g1(v):\n    yield from [v, np.{0}]",
+    "class C:\n    def __init__(self, v):\n        self.v = v.{0}"
+]
+
+
+def _expression(rng, depth=0):
+    choice = rng.randrange(9 if depth < 2 else 3)
+    attribute = rng.choice(ATTRIBUTES)
+    if choice == 0:
+        return f"np.{attribute}"
+    elif choice == 1:
+        return f"pd.{attribute}()"
+    elif choice == 2:
+        return rng.choice(["a", "b", "c"])
+    elif choice == 3:
+        return f"f0({_expression(rng, depth + 1)})"
+    elif choice == 4:
+        return f"f1({_expression(rng, depth + 1)}, {_expression(rng, depth + 1)})[{rng.randrange(2)}]"
+    elif choice == 5:
+        return "f2()"
+    elif choice == 6:
+        return f"f3({_expression(rng, depth + 1)}).v"
+    elif choice == 7:
+        return f"list(g0([{_expression(rng, depth + 1)}]))[0]"
+
+    return f"next(g1({_expression(rng, depth + 1)}))"
+
+
+def _program(seed):
+    rng = random.Random(seed)
+    lines = ["import numpy as np", "import pandas as pd", "a = b = c = np"]
+    lines += [definition.format(rng.choice(ATTRIBUTES)) for definition in DEFINITIONS]
+    for _ in range(8):
+        choice = rng.randrange(3)
+        if choice == 0:
+            lines.append(f"{rng.choice('abc')} = {_expression(rng)}")
+        elif choice == 1:
+            lines.append(f"{_expression(rng)}.{rng.choice(ATTRIBUTES)}")
+        else:
+            lines.append(f"for v in g0([{_expression(rng)}, {_expression(rng)}]):\n    v.{rng.choice(ATTRIBUTES)}")
+
+    return "\n".join(lines)
+
+
+def _analyze(source):
+    paths = {}
+    for tree in Saplings(ast.parse(source), [], {}).get_trees():
+        paths.update(flatten_tree(tree))
+
+    return paths
+
+
+def test_generator_yields():
+    source = "\n".join([
+        "import some_module",
+        "def my_generator():",
+        "    yield from some_module.some_items",
+        "for item in my_generator():",
+        "    print(item.name)"
+    ])
+
+    assert "some_module.some_items.__iter__().name" in _analyze(source)
+
+
+def test_lambda_flow():
+    source = "import numpy as np\ntrans_diag = lambda x: np.diagonal(x.T)\ntrans_diag(np.random.randn(5, 5))\n"
+    paths = _analyze(source)
+
+    assert "numpy.random.randn().T" in paths and "numpy.diagonal" in paths
+
+
+def test_replayed_lambda_matches_function():
+    calls = "f(np.a)\nf(np.a)\nf(np.b)\n"
+    paths = _analyze("import numpy as np\nf = lambda v: v.sum()\n" + calls)
+
+    assert paths == _analyze("import numpy as np\ndef f(v):\n    return v.sum()\n" + calls)
+    assert paths["numpy.a.sum"] == 2 and paths["numpy.b.sum"] == 1
+
+
+@pytest.mark.parametrize("returned", ["[]", "{}", "C()"])
+def test_replayed_return_values_are_not_shared(returned):
+    source = "\n".join([
+        "import numpy as np",
+        "class C:",
+        "    pass",
+        f"make = lambda: {returned}",
+        "a = make()",
+        "a.append(np.zeros) if isinstance(a, list) else None",
+        "b = make()",
+        "b[0].foo"
+    ])
+
+    assert "numpy.zeros.foo" not in _analyze(source)
+
+
+@pytest.mark.parametrize("seed", range(150))
+def test_matches_unsummarized_analysis(seed, monkeypatch):
+    source = _program(seed)
+    summarized = _analyze(source)
+
+    # Every call gets a shape of its own, so no summary is ever replayed
+    get_shape = smry.get_shape
+    monkeypatch.setattr(smry, "get_shape", lambda *args: (object(), get_shape(*args)[1]))
+
+    assert summarized == _analyze(source)
@@ -0,0 +1,80 @@
+# Standard Library
+import ast
+import json
+import random
+
+# Third Party
+import pytest
+
+# Local Modules
+from programs import ProgramGenerator
+from saplings import Saplings
+from saplings.cli import main
+from saplings.rendering import flatten_tree, tuplify_tree
+from saplings.sketches import CountMinSketch, TopKPaths
+
+
+def _analyze(source):
+    return Saplings(ast.parse(source), [], {}).get_trees()
+
+
+def test_estimates_never_undercount():
+    rng = random.Random(0)
+    sketch = CountMinSketch(width=64, depth=4)
+    counts = {}
+    for _ in range(5000):
+        key = f"key{int(rng.paretovariate(1.2))}"
+        counts[key] = counts.get(key, 0) + 1
+        sketch.add(key)
+
+    assert sketch.total == 5000
+    for key, count in counts.items():
+        assert count <= sketch.estimate(key) <= count + sketch.error_bound
+
+
+def test_from_error():
+    sketch = CountMinSketch.from_error(0.01, 0.01)
+
+    assert sketch.width == 272 and sketch.depth == 5
+
+
+def test_heavy_hitters():
+    top_paths = TopKPaths(k=3, width=1024)
+    counts = {"a": 50, "b": 5, "c": 40, "d": 1, "e": 30, "f": 2}
+    items = [path for path, count in counts.items() for _ in range(count)]
+    random.Random(0).shuffle(items)
+    for path in items:
+        top_paths.add(path)
+
+    assert top_paths.top() == [("a", 50), ("c", 40), ("e", 30)]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_matches_exact_top_k(seed):
+    # With a sketch much wider than the number of paths, estimates are exact
+    top_paths = TopKPaths(k=5, width=1 << 16)
+    counts = {}
+    for i in range(20):
+        trees = _analyze(ProgramGenerator(seed * 100 + i).program(4))
+        for tree in trees:
+            for path, frequency in flatten_tree(tree).items():
+                counts[path] = counts.get(path, 0) + frequency
+
+        top_paths.add_trees(trees if i % 2 else [tuplify_tree(tree) for tree in trees])
+
+    expected = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+    top = top_paths.top()
+
+    assert [count for _, count in top] == [count for _, count in expected[:5]]
+    assert all(counts[path] == count for path, count in top)
+
+
+def test_cli(tmp_path, capsys):
+    for i in range(3):
+        (tmp_path / f"{i}.py").write_text("import os\n" + "os.getcwd()\n" * i)
+
+    assert main([str(tmp_path), "--top-k", "2", "-f", "json"]) == 0
+
+    output = json.loads(capsys.readouterr().out)
+    assert output["paths"] == [{"path": "os", "count": 6}, {"path": "os.getcwd", "count": 3}]
+    assert output["error_bound"] >= 0
@@ -0,0 +1,136 @@
+# Standard Library
+import ast
+import os
+import random
+
+# Third Party
+import pytest
+
+# Local Modules
+from programs import ProgramGenerator
+from saplings import Saplings
+from saplings.aggregation import IncrementalAggregate
+from saplings.rendering import flatten_tree
+from saplings.watch import Watcher
+
+
+def _get_frequencies(trees):
+    frequencies = {}
+    for tree in trees:
+        for path, frequency in flatten_tree(tree).items():
+            frequencies[path] = frequencies.get(path, 0) + frequency
+
+    return frequencies
+
+
+def _analyze(source):
+    return Saplings(ast.parse(source), [], {}).get_trees()
+
+
+class _Directory(object):
+    def __init__(self, root):
+        self.root = root
+        self._mtime = 10 ** 18
+
+    def write(self, name, source):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as file:
+            file.write(source)
+
+        # Modification times can be coarser than the edits, so each write
+        # gets a distinct one
+        self._mtime += 1
+        os.utime(path, ns=(self._mtime, self._mtime))
+
+    def remove(self, name):
+        os.remove(os.path.join(self.root, name))
+
+
+def test_incremental_aggregate():
+    aggregate = IncrementalAggregate()
+    sources = {
+        "a": "import numpy as np\nnp.zeros(3).sum()\n",
+        "b": "import numpy as np\nnp.zeros(3)\nimport os\n",
+        "c": "import os\nos.getcwd()\n"
+    }
+    for key, source in sources.items():
+        aggregate.add(key, _analyze(source))
+
+    aggregate.replace("a", _analyze("import numpy\nnumpy.ones\n"))
+    aggregate.remove("c")
+    expected = _analyze("import numpy\nnumpy.ones\n") + _analyze(sources["b"])
+
+    assert "c" not in aggregate and "a" in aggregate
+    assert _get_frequencies(aggregate.forest) == _get_frequencies(expected)
+
+
+def test_poll_tracks_edits(tmp_path):
+    directory = _Directory(str(tmp_path))
+    updates = []
+    watcher = Watcher(directory.root, on_update=lambda paths, forest: updates.append(paths))
+
+    directory.write("a.py", "import numpy as np\nnp.zeros(3)\n")
+    directory.write("pkg/b.py", "import os\nos.getcwd()\n")
+    directory.write("__pycache__/c.py", "import sys\n")
+    directory.write("notes.txt", "import sys\n")
+    watcher.poll()
+
+    expected = _analyze("import numpy as np\nnp.zeros(3)\n") + _analyze("import os\nos.getcwd()\n")
+
+    assert _get_frequencies(watcher.get_trees()) == _get_frequencies(expected)
+    assert watcher.poll() == [] and len(updates) == 1
+
+    # A file that doesn't parse keeps its last good contribution
+    directory.write("a.py", "import numpy as np\nnp.zeros(\n")
+    watcher.poll()
+
+    assert list(watcher.errors) == [os.path.join(directory.root, "a.py")]
+    assert _get_frequencies(watcher.get_trees())["numpy.zeros"] == 1
+
+    directory.write("a.py", "import numpy as np\nnp.ones(3)\n")
+    directory.remove("pkg/b.py")
+    changed = watcher.poll()
+
+    assert sorted(changed) == sorted(os.path.join(directory.root, p) for p in ("a.py", "pkg/b.py"))
+    assert watcher.errors == {}
+    assert _get_frequencies(watcher.get_trees()) == _get_frequencies(_analyze("import numpy as np\nnp.ones(3)\n"))
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_matches_fresh_analysis(tmp_path, seed):
+    rng = random.Random(seed)
+    generator = ProgramGenerator(seed, nested_calls=False)
+    directory = _Directory(str(tmp_path))
+    watcher = Watcher(directory.root)
+
+    files = {}
+    for _ in range(8):
+        name = f"m{rng.randrange(3)}.py"
+        if name in files and rng.random() < 0.3:
+            del files[name]
+            directory.remove(name)
+        elif name in files and rng.random() < 0.5:
+            # An edit to one statement, like in an editor
+            units = files[name]
+            units[rng.randrange(len(units))] = generator.statement()
+        else:
+            files[name] = generator.units(4)
+
+        if name in files:
+            source = "\n".join(line for unit in files[name] for line in unit)
+            if "class" in source:
+                # In-place instance mutation isn't tracked (see
+                # `IncrementalModule`)
+                del files[name]
+                if os.path.exists(os.path.join(directory.root, name)):
+                    directory.remove(name)
+            else:
+                directory.write(name, source)
+
+        watcher.poll()
+        expected = []
+        for units in files.values():
+            expected += _analyze("\n".join(line for unit in units for line in unit))
+
+        assert _get_frequencies(watcher.get_trees()) == _get_frequencies(expected)